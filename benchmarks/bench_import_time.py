@@ -0,0 +1,64 @@
+"""Start-up cost of the ``vectordb`` package and short CLI commands.
+
+Run from the repository root::
+
+    PYTHONPATH=core python benchmarks/bench_import_time.py --runs 20
+
+Each measurement starts a fresh interpreter, so the numbers include Python's
+own start-up. ``stats`` runs against a temporary data file of three texts; it
+should never load the embedding model or the index.
+``tests/package/test_import_time.py`` guards the set of modules imported by
+the CLI so regressions show up in the test suite as well.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+CORE = Path(__file__).resolve().parents[1] / "core"
+
+
+def wall_time(cmd: list[str], runs: int, env: dict[str, str]) -> list[float]:
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(cmd, check=True, env=env, stdout=subprocess.DEVNULL)
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    env = dict(os.environ, PYTHONPATH=str(CORE))
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [
+            "--index-path",
+            str(Path(tmp) / "index.bin"),
+            "--data-path",
+            str(Path(tmp) / "data.json"),
+        ]
+        Path(tmp, "index.bin").write_bytes(b"")
+        Path(tmp, "data.json").write_text('["a", "b", "c"]')
+        commands = {
+            "python": [sys.executable, "-c", "pass"],
+            "import vectordb": [sys.executable, "-c", "import vectordb"],
+            "import vectordb.cli": [sys.executable, "-c", "import vectordb.cli"],
+            "vectordb --help": [sys.executable, "-m", "vectordb", "--help"],
+            "vectordb stats": [sys.executable, "-m", "vectordb", *paths, "stats"],
+        }
+        print(f"{'command':<22} {'median ms':>10} {'min ms':>8}")
+        for name, cmd in commands.items():
+            times = wall_time(cmd, args.runs, env)
+            print(f"{name:<22} {statistics.median(times):>10.1f} {min(times):>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Latency of ``VectorDB.search`` with and without MMR diversification.
+
+Run from the repository root::
+
+    PYTHONPATH=core python benchmarks/bench_mmr.py --n 100000 --dim 256 --k 10
+
+Random unit vectors are stored with ``add_vectors`` and queried with
+``search(..., vector=...)``, so encoding is excluded and the numbers show the
+cost of the oversampled ``knn_query``, ``get_items`` and the NumPy MMR
+re-ranking. A pure-Python MMR over the same candidates is timed for
+comparison.
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from vectordb import VectorDB
+from vectordb.db import MMR_OVERSAMPLE
+from vectordb.db.embedders import HashingEmbedder
+
+
+def python_mmr(query, candidates, k: int, diversity: float) -> list[int]:
+    def cos(a, b):
+        dot = sum(x * y for x, y in zip(a, b))
+        return dot / ((sum(x * x for x in a) * sum(y * y for y in b)) ** 0.5 or 1.0)
+
+    rows = [list(map(float, row)) for row in candidates]
+    relevance = [cos(query, row) for row in rows]
+    order: list[int] = []
+    while len(order) < min(k, len(rows)):
+        best, best_score = -1, float("-inf")
+        for i, row in enumerate(rows):
+            if i in order:
+                continue
+            redundancy = max((cos(row, rows[j]) for j in order), default=0.0)
+            score = (1 - diversity) * relevance[i] - diversity * redundancy
+            if score > best_score:
+                best, best_score = i, score
+        order.append(best)
+    return order
+
+
+def timed(fn, queries) -> float:
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query)
+        latencies.append((time.perf_counter() - start) * 1e3)
+    return statistics.median(latencies)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--n", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--diversity", type=float, default=0.5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    data = rng.normal(size=(args.n, args.dim)).astype(np.float32)
+    data /= np.linalg.norm(data, axis=1, keepdims=True)
+    queries = data[rng.choice(args.n, args.queries)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        vdb = VectorDB(
+            index_path=f"{tmp}/index.bin",
+            data_path=f"{tmp}/data.json",
+            max_elements=args.n,
+            model=HashingEmbedder(args.dim),
+        )
+        vdb.add_vectors(data, [str(i) for i in range(args.n)])
+
+        plain = timed(lambda q: vdb.search("", args.k, vector=q), queries)
+        diverse = timed(
+            lambda q: vdb.search("", args.k, vector=q, diversity=args.diversity),
+            queries,
+        )
+        depth = args.k * MMR_OVERSAMPLE
+        candidates = [
+            (q, vdb.index.get_items(vdb.index.knn_query([q], k=depth)[0][0]))
+            for q in queries[:20]
+        ]
+        rerank_py = timed(
+            lambda c: python_mmr(c[0], c[1], args.k, args.diversity), candidates
+        )
+
+    print(f"n={args.n} dim={args.dim} k={args.k} candidates={depth}")
+    print(f"{'search':<28}{'p50 ms':>8}")
+    print(f"{'plain':<28}{plain:>8.3f}")
+    print(f"{f'diversity={args.diversity}':<28}{diverse:>8.3f}")
+    print(f"{'MMR re-rank in pure Python':<28}{rerank_py:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Recall, memory and latency of the quantized vector tiers.
+
+Run from the repository root::
+
+    PYTHONPATH=core python benchmarks/bench_quantization.py --n 100000 --dim 256
+
+Random unit vectors stand in for embeddings so no model download is needed.
+Ground truth comes from an exact float32 scan. When ``hnswlib`` is installed
+the default float32 HNSW index is measured as well.
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from vectordb.db.quantized import QuantizedIndex
+
+
+def recall(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def timed_query(index, queries: np.ndarray, k: int) -> tuple[np.ndarray, float]:
+    start = time.perf_counter()
+    labels = np.vstack([index.knn_query(q[None, :], k=k)[0] for q in queries])
+    return labels, (time.perf_counter() - start) / len(queries) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--n", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--ef", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    data = rng.normal(size=(args.n, args.dim)).astype(np.float32)
+    data /= np.linalg.norm(data, axis=1, keepdims=True)
+    queries = data[rng.choice(args.n, args.queries, replace=False)]
+    queries = queries + rng.normal(scale=0.05, size=queries.shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    truth = np.argsort(-(queries @ data.T), axis=1)[:, : args.k]
+
+    print(f"n={args.n} dim={args.dim} k={args.k} ef={args.ef}")
+    print(f"{'index':<10} {'recall':>7} {'ms/query':>9} {'RAM MiB':>8}")
+    print(f"{'float32':<10} {1.0:>7.3f} {'-':>9} {data.nbytes / 2**20:>8.1f}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for quantization in ("float16", "int8"):
+            index = QuantizedIndex(
+                space="cosine",
+                dim=args.dim,
+                quantization=quantization,
+                vectors_path=Path(tmp) / f"{quantization}.f32",
+            )
+            index.init_index(max_elements=args.n)
+            index.add_items(data, range(args.n))
+            index.set_ef(args.ef)
+            labels, ms = timed_query(index, queries, args.k)
+            ram = index._codes.nbytes + index._sq_norms.nbytes + index._labels.nbytes
+            print(
+                f"{quantization:<10} {recall(labels, truth):>7.3f} {ms:>9.2f} "
+                f"{ram / 2**20:>8.1f}"
+            )
+
+    try:
+        import hnswlib
+    except ImportError:
+        return
+    index = hnswlib.Index(space="cosine", dim=args.dim)
+    index.init_index(max_elements=args.n, ef_construction=200, M=16)
+    index.add_items(data, np.arange(args.n))
+    index.set_ef(args.ef)
+    labels, ms = timed_query(index, queries, args.k)
+    # float32 vector plus level-0 links (2 * M ids) and label per element
+    ram = args.n * (args.dim * 4 + 2 * 16 * 4 + 8)
+    print(
+        f"{'hnsw f32':<10} {recall(labels, truth):>7.3f} {ms:>9.2f} {ram / 2**20:>8.1f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
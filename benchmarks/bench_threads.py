@@ -0,0 +1,73 @@
+"""Scaling of hnswlib inserts and batched queries with ``num_threads``.
+
+Run from the repository root::
+
+    PYTHONPATH=core python benchmarks/bench_threads.py --n 100000 --dim 256
+
+Random unit vectors stand in for embeddings so no model download is needed.
+For every thread count up to the CPUs available to the process (see
+:func:`vectordb.db.available_cpus`) a fresh index is built with ``add_items``
+and queried with one batched ``knn_query``, the same calls ``VectorDB`` makes
+for ``add_texts`` and ``search_batch``.
+"""
+
+import argparse
+import time
+
+import hnswlib
+import numpy as np
+
+from vectordb.db import available_cpus
+
+
+def thread_counts(limit: int) -> list[int]:
+    counts = [1]
+    while counts[-1] * 2 <= limit:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != limit:
+        counts.append(limit)
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--n", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--ef", type=int, default=50)
+    parser.add_argument("--max-threads", type=int, default=available_cpus())
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    data = rng.normal(size=(args.n, args.dim)).astype(np.float32)
+    data /= np.linalg.norm(data, axis=1, keepdims=True)
+    queries = data[rng.choice(args.n, args.queries)]
+
+    print(f"n={args.n} dim={args.dim} queries={args.queries} k={args.k}")
+    print(
+        f"{'threads':>7} {'inserts/s':>10} {'speedup':>8} "
+        f"{'queries/s':>10} {'speedup':>8}"
+    )
+    base = None
+    for threads in thread_counts(args.max_threads):
+        index = hnswlib.Index(space="cosine", dim=args.dim)
+        index.init_index(max_elements=args.n, ef_construction=200, M=16)
+        start = time.perf_counter()
+        index.add_items(data, np.arange(args.n), num_threads=threads)
+        inserts = args.n / (time.perf_counter() - start)
+
+        index.set_ef(args.ef)
+        start = time.perf_counter()
+        index.knn_query(queries, k=args.k, num_threads=threads)
+        searches = args.queries / (time.perf_counter() - start)
+
+        base = base or (inserts, searches)
+        print(
+            f"{threads:>7} {inserts:>10.0f} {inserts / base[0]:>7.2f}x "
+            f"{searches:>10.0f} {searches / base[1]:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""``GET /search`` latency over a Unix domain socket versus loopback TCP.
+
+Run from the repository root::
+
+    PYTHONPATH=core python benchmarks/bench_uds.py --texts 10000 --requests 5000
+
+Two ``vectordb serve`` processes are started on the same temporary database
+with the hashing embedder, so no model download is needed: one listening on
+``127.0.0.1`` and one on a socket (``--uds``). Each is queried sequentially
+through a pooled keep-alive ``httpx`` client, which isolates the per-request
+transport cost. The server side work is identical for both.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from vectordb import VectorDB
+from vectordb.db.embedders import HashingEmbedder
+
+CORE = Path(__file__).resolve().parents[1] / "core"
+QUERIES = ["vector search", "unix domain sockets", "loopback tcp", "hnsw graph"]
+
+
+def wait_ready(client: httpx.Client, proc: subprocess.Popen) -> None:
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            sys.exit("server exited during start-up")
+        try:
+            if client.get("/health").status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.1)
+    sys.exit("server did not start")
+
+
+def measure(client: httpx.Client, requests: int, k: int) -> list[float]:
+    for query in QUERIES * 25:
+        client.get("/search", params={"q": query, "k": k})
+    latencies = []
+    for i in range(requests):
+        start = time.perf_counter()
+        client.get("/search", params={"q": QUERIES[i % len(QUERIES)], "k": k})
+        latencies.append((time.perf_counter() - start) * 1e6)
+    return sorted(latencies)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--texts", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    env = dict(os.environ, PYTHONPATH=str(CORE))
+    with tempfile.TemporaryDirectory() as tmp:
+        base = [
+            sys.executable,
+            "-m",
+            "vectordb",
+            "--index-path",
+            f"{tmp}/index.bin",
+            "--data-path",
+            f"{tmp}/data.json",
+            "--embedder",
+            "hashing",
+            "--max-elements",
+            str(args.texts),
+        ]
+        vdb = VectorDB(
+            index_path=f"{tmp}/index.bin",
+            data_path=f"{tmp}/data.json",
+            max_elements=args.texts,
+            model=HashingEmbedder(),
+        )
+        vdb.add_texts([f"text {i} about {QUERIES[i % 4]}" for i in range(args.texts)])
+
+        sock = f"{tmp}/vectordb.sock"
+        servers = {
+            "tcp": (
+                base + ["serve", "--host", "127.0.0.1", "--port", str(args.port)],
+                httpx.Client(base_url=f"http://127.0.0.1:{args.port}"),
+            ),
+            "uds": (
+                base + ["serve", "--uds", sock],
+                httpx.Client(
+                    base_url="http://localhost", transport=httpx.HTTPTransport(uds=sock)
+                ),
+            ),
+        }
+        print(f"texts={args.texts} requests={args.requests} k={args.k}")
+        print(
+            f"{'transport':<10}{'mean us':>10}{'p50 us':>10}{'p99 us':>10}{'req/s':>10}"
+        )
+        for name, (cmd, client) in servers.items():
+            proc = subprocess.Popen(cmd, env=env)
+            try:
+                with client:
+                    wait_ready(client, proc)
+                    latencies = measure(client, args.requests, args.k)
+            finally:
+                proc.terminate()
+                proc.wait()
+            mean = statistics.fmean(latencies)
+            p50 = latencies[len(latencies) // 2]
+            p99 = latencies[int(len(latencies) * 0.99) - 1]
+            print(f"{name:<10}{mean:>10.0f}{p50:>10.0f}{p99:>10.0f}{1e6 / mean:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,10 +9,15 @@ configure an optional API key. ``INDEX_PATH_ENV_VAR`` and ``DATA_PATH_ENV_VAR``
 can override the default locations of the index and stored texts. ``MODEL_NAME_ENV_VAR``
 and ``LOG_LEVEL_ENV_VAR`` allow overriding the default embedding model and log
 level used by :class:`VectorDB` and the command line interface.
+
+:func:`create_app` and :class:`CollectionManager` are imported on first access
+so that importing the package (and running the CLI) does not load FastAPI.
 """
 
+from importlib import import_module
+from typing import Any
+
 from .db import DATA_PATH, INDEX_PATH, MODEL_NAME, VectorDB
-from .api import create_app
 
 API_KEY_ENV_VAR = "VECTORDB_API_KEY"
 HOST_ENV_VAR = "VECTORDB_HOST"
@@ -27,11 +32,32 @@ M_ENV_VAR = "VECTORDB_M"
 EF_ENV_VAR = "VECTORDB_EF"
 SPACE_ENV_VAR = "VECTORDB_SPACE"
 MAX_TEXT_LENGTH_ENV_VAR = "VECTORDB_MAX_TEXT_LENGTH"
+QUANTIZATION_ENV_VAR = "VECTORDB_QUANTIZATION"
+COLLECTIONS_DIR_ENV_VAR = "VECTORDB_COLLECTIONS_DIR"
+EMBEDDER_ENV_VAR = "VECTORDB_EMBEDDER"
+ENCODE_WORKERS_ENV_VAR = "VECTORDB_ENCODE_WORKERS"
+NUM_THREADS_ENV_VAR = "VECTORDB_NUM_THREADS"
+UDS_ENV_VAR = "VECTORDB_UDS"
 
 __version__ = "0.1.0"
 
+_LAZY_ATTRS = {
+    "create_app": ".api",
+    "CollectionManager": ".db.manager",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_ATTRS:
+        value = getattr(import_module(_LAZY_ATTRS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 __all__ = [
     "VectorDB",
+    "CollectionManager",
     "create_app",
     "INDEX_PATH",
     "DATA_PATH",
@@ -49,5 +75,11 @@ __all__ = [
     "EF_ENV_VAR",
     "SPACE_ENV_VAR",
     "MAX_TEXT_LENGTH_ENV_VAR",
+    "QUANTIZATION_ENV_VAR",
+    "COLLECTIONS_DIR_ENV_VAR",
+    "EMBEDDER_ENV_VAR",
+    "ENCODE_WORKERS_ENV_VAR",
+    "NUM_THREADS_ENV_VAR",
+    "UDS_ENV_VAR",
     "__version__",
 ]
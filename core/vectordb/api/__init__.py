@@ -1,14 +1,34 @@
-from fastapi import Depends, FastAPI, Header, HTTPException, Query
+import asyncio
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
+from fastapi.responses import JSONResponse
 import hmac
 import logging
-from pydantic import BaseModel, constr
+from typing import Literal
+
+from pydantic import BaseModel, Field, conlist, constr
 
 from ..db import VectorDB
+from ..db.manager import CollectionManager
+from .admission import Gate
+from .cursors import Cursor, CursorCache, next_page
+from .encoding import FastJSONResponse, parse_body, respond
+from .ingest import IngestQueue
 
 logger = logging.getLogger(__name__)
 
 
-def create_app(vdb: VectorDB, api_key: str | None = None) -> FastAPI:
+def create_app(
+    vdb: VectorDB,
+    api_key: str | None = None,
+    *,
+    ingest_queue_size: int = 0,
+    ingest_batch_size: int = 256,
+    collections: CollectionManager | None = None,
+    warmup: bool = False,
+    max_searches: int = 0,
+    max_writes: int = 0,
+    max_waiting: int = 64,
+) -> FastAPI:
     """Create a REST API application for ``vdb``.
 
     Parameters
@@ -17,48 +37,469 @@ def create_app(vdb: VectorDB, api_key: str | None = None) -> FastAPI:
         Database instance to expose via the API.
     api_key:
         Optional API key required in the ``X-API-Key`` header for all requests.
+    ingest_queue_size:
+        When greater than ``0``, ``POST /add`` queues texts in a bounded queue
+        of this size and returns ``202`` with a job id instead of waiting for
+        the write. A full queue is reported with ``429`` and a batch larger
+        than the whole queue with ``413``.
+    ingest_batch_size:
+        Maximum number of queued texts written per ``add_texts`` call.
+    collections:
+        Optional manager whose collections are served below
+        ``/collections/{name}``.
+    warmup:
+        Run :meth:`VectorDB.warmup` in the background after start-up. ``GET
+        /ready`` answers ``503`` until it has finished.
+    max_searches:
+        Searches processed at the same time on worker threads; ``0`` runs
+        them on the event loop without a limit. See
+        :class:`~vectordb.api.admission.Gate`.
+    max_writes:
+        Synchronous writes processed at the same time; ``0`` for no limit.
+    max_waiting:
+        Searches and writes each allowed to wait for a slot. Further
+        requests are rejected with ``503``, and waiting requests whose
+        ``X-Deadline-Ms`` budget has passed with ``504``.
+
+    When ``vdb`` was opened read-only the write endpoints answer ``403``
+    and no ingest queue is started.
+
+    Search results and batch responses are rendered as MessagePack when the
+    ``Accept`` header asks for ``application/msgpack`` and the batch endpoints
+    accept MessagePack bodies (see :mod:`vectordb.api.encoding`).
     """
 
-    app = FastAPI()
+    app = FastAPI(default_response_class=FastJSONResponse)
+    readiness: dict[str, object] = {"ready": not warmup}
+    searches = Gate("search", max_searches, max_waiting)
+    writes = Gate("write", max_writes, max_waiting)
+
+    if warmup:
+
+        @app.on_event("startup")
+        async def start_warmup() -> None:
+            async def run_warmup() -> None:
+                loop = asyncio.get_running_loop()
+                try:
+                    timings = await loop.run_in_executor(None, vdb.warmup)
+                except Exception as exc:
+                    logger.exception("warmup failed")
+                    readiness["error"] = str(exc)
+                    return
+                readiness["timings"] = timings
+                readiness["ready"] = True
+
+            app.state.warmup = asyncio.get_running_loop().create_task(run_warmup())
+
+    ingest = (
+        IngestQueue(vdb, maxsize=ingest_queue_size, batch_size=ingest_batch_size)
+        if ingest_queue_size > 0 and not vdb.read_only
+        else None
+    )
+
+    if ingest is not None:
+
+        @app.on_event("startup")
+        async def start_ingest() -> None:
+            ingest.start()
+
+        @app.on_event("shutdown")
+        async def stop_ingest() -> None:
+            await ingest.stop()
 
     @app.get("/health")
     async def health() -> dict[str, str]:
         logger.debug("health check")
         return {"status": "ok"}
 
+    @app.get("/ready")
+    async def ready():
+        """Report whether start-up warmup has completed."""
+        body = {
+            "status": "ready" if readiness["ready"] else "warming up",
+            **{key: value for key, value in readiness.items() if key != "ready"},
+        }
+        return JSONResponse(
+            status_code=200 if readiness["ready"] else 503, content=body
+        )
+
     def check_key(x_api_key: str | None = Header(None)) -> None:
         if api_key and not (x_api_key and hmac.compare_digest(x_api_key, api_key)):
             raise HTTPException(status_code=401, detail="invalid API key")
 
+    def check_writable() -> None:
+        if vdb.read_only:
+            raise HTTPException(status_code=403, detail="database is read-only")
+
     class Item(BaseModel):
         text: constr(min_length=1, max_length=vdb.max_text_length)
 
-    @app.post("/add", dependencies=[Depends(check_key)])
-    async def add_item(item: Item) -> dict[str, str]:
+    def enqueue(texts: list[str]) -> list[str]:
+        assert ingest is not None
+        try:
+            return ingest.submit_many(texts)
+        except ValueError as exc:
+            # Waiting would not help, so no Retry-After.
+            raise HTTPException(status_code=413, detail=str(exc))
+        except asyncio.QueueFull:
+            logger.warning("ingest queue full (%d texts)", ingest.maxsize)
+            raise HTTPException(
+                status_code=429,
+                detail="ingest queue is full",
+                headers={"Retry-After": "1"},
+            )
+
+    @app.post("/add", dependencies=[Depends(check_key), Depends(check_writable)])
+    async def add_item(request: Request, item: Item):
         logger.info("add text (%d chars)", len(item.text))
+        if ingest is not None:
+            job_id = enqueue([item.text])[0]
+            return JSONResponse(
+                status_code=202, content={"status": "queued", "job": job_id}
+            )
         try:
-            vdb.add_text(item.text)
+            await writes.run(request, lambda: vdb.add_text(item.text))
         except ValueError as exc:
             logger.warning("failed to add text: %s", exc)
             raise HTTPException(status_code=400, detail=str(exc))
         return {"status": "ok"}
 
+    class ItemBatch(BaseModel):
+        texts: conlist(
+            constr(min_length=1, max_length=vdb.max_text_length), min_items=1
+        )
+        dedupe_threshold: float | None = Field(None, ge=0)
+
+    def added(duplicates: list, dedupe_threshold: float | None) -> dict:
+        if dedupe_threshold is None:
+            return {"status": "ok"}
+        return {"status": "ok", "duplicates": duplicates}
+
+    @app.post("/add/batch", dependencies=[Depends(check_key), Depends(check_writable)])
+    async def add_batch(request: Request):
+        body = await parse_body(request, ItemBatch)
+        logger.info("add %d texts", len(body.texts))
+        # Deduplicated adds are written directly so the skipped texts can be
+        # reported in the response.
+        if ingest is not None and body.dedupe_threshold is None:
+            jobs = enqueue(body.texts)
+            return respond(request, {"status": "queued", "jobs": jobs}, 202)
+        try:
+            duplicates = await writes.run(
+                request,
+                lambda: vdb.add_texts(
+                    body.texts, dedupe_threshold=body.dedupe_threshold
+                ),
+            )
+        except ValueError as exc:
+            logger.warning("failed to add texts: %s", exc)
+            raise HTTPException(status_code=400, detail=str(exc))
+        return respond(request, added(duplicates, body.dedupe_threshold))
+
+    class Documents(BaseModel):
+        documents: list[constr(min_length=1)]
+        chunk_size: int | None = Field(None, ge=1, le=vdb.max_text_length)
+        overlap: int = Field(0, ge=0)
+
+    @app.get("/jobs/{job_id}", dependencies=[Depends(check_key)])
+    async def job_status(job_id: str) -> dict[str, str]:
+        status = ingest.status(job_id) if ingest is not None else None
+        if status is None:
+            raise HTTPException(status_code=404, detail="unknown job")
+        return status
+
+    @app.post("/documents", dependencies=[Depends(check_key), Depends(check_writable)])
+    async def add_documents(
+        request: Request, body: Documents
+    ) -> dict[str, str | list[int]]:
+        logger.info("add %d documents", len(body.documents))
+        try:
+            ids = await writes.run(
+                request,
+                lambda: vdb.add_documents(
+                    body.documents, body.chunk_size, body.overlap
+                ),
+            )
+        except ValueError as exc:
+            logger.warning("failed to add documents: %s", exc)
+            raise HTTPException(status_code=400, detail=str(exc))
+        return {"status": "ok", "ids": ids}
+
+    cursors = CursorCache()
+
+    def page(cursor: Cursor) -> dict:
+        results = next_page(vdb, cursor)
+        more = cursor.depth < vdb.count() or any(
+            r["id"] not in cursor.seen for r in cursor.results
+        )
+        token = cursors.put(cursor) if results and more else None
+        return {"results": results, "cursor": token}
+
     @app.get("/search", dependencies=[Depends(check_key)])
     async def search(
-        q: constr(min_length=1) = Query(...),
+        request: Request,
+        q: constr(min_length=1) | None = Query(None),
         k: int = Query(5, ge=1),
-    ) -> list[dict[str, float | str]]:
-        logger.info("search q=%s k=%d", q, k)
+        mode: Literal["vector", "hybrid"] = Query("vector"),
+        collapse: bool = Query(False),
+        paginate: bool = Query(False),
+        cursor: str | None = Query(None),
+        diversity: float | None = Query(None, ge=0, le=1),
+        rerank: bool = Query(False),
+        oversample: int = Query(4, ge=1),
+    ) -> list[dict[str, float | int | str]]:
+        if cursor is not None:
+            state = cursors.pop(cursor)
+            if state is None:
+                raise HTTPException(status_code=404, detail="unknown or expired cursor")
+            logger.info("search next page q=%s k=%d", state.query, state.k)
+            return respond(request, await searches.run(request, lambda: page(state)))
+        if q is None:
+            raise HTTPException(status_code=422, detail="q or cursor is required")
+        logger.info("search q=%s k=%d mode=%s", q, k, mode)
         if k > len(vdb.texts):
             raise HTTPException(
                 status_code=400, detail="k exceeds number of stored texts"
             )
-        return vdb.search(q, k)
+        if paginate:
+            if diversity is not None:
+                raise HTTPException(
+                    status_code=400, detail="diversity cannot be paginated"
+                )
+            if rerank:
+                raise HTTPException(
+                    status_code=400, detail="rerank cannot be paginated"
+                )
+            return respond(
+                request,
+                await searches.run(
+                    request,
+                    lambda: page(Cursor(q, vdb.encode_query(q), k, mode, collapse)),
+                ),
+            )
+        try:
+            results = await searches.run(
+                request,
+                lambda: vdb.search(
+                    q,
+                    k,
+                    mode=mode,
+                    collapse=collapse,
+                    diversity=diversity,
+                    rerank=rerank,
+                    oversample=oversample,
+                ),
+            )
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        return respond(request, results)
+
+    @app.get("/search/range", dependencies=[Depends(check_key)])
+    async def search_range(
+        request: Request,
+        q: constr(min_length=1) = Query(...),
+        max_distance: float = Query(..., ge=0),
+        limit: int | None = Query(None, ge=1),
+    ):
+        logger.info("range search q=%s max_distance=%s", q, max_distance)
+        return respond(
+            request,
+            await searches.run(
+                request, lambda: vdb.search_range(q, max_distance, limit)
+            ),
+        )
+
+    class SearchBatch(BaseModel):
+        queries: conlist(constr(min_length=1), min_items=1)
+        k: int = Field(5, ge=1)
+        mode: Literal["vector", "hybrid"] = "vector"
+        collapse: bool = False
+
+    @app.post("/search/batch", dependencies=[Depends(check_key)])
+    async def search_batch(request: Request):
+        body = await parse_body(request, SearchBatch)
+        logger.info(
+            "search %d queries k=%d mode=%s", len(body.queries), body.k, body.mode
+        )
+        try:
+            results = await searches.run(
+                request,
+                lambda: vdb.search_batch(
+                    body.queries, body.k, mode=body.mode, collapse=body.collapse
+                ),
+            )
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        return respond(request, results)
+
+    class VectorQuery(BaseModel):
+        vector: conlist(float, min_items=1)
+        k: int = Field(5, ge=1)
+        collapse: bool = False
+
+    @app.post("/search/vector", dependencies=[Depends(check_key)])
+    async def search_vector(request: Request):
+        body = await parse_body(request, VectorQuery)
+        logger.info("search by vector k=%d", body.k)
+        try:
+            results = await searches.run(
+                request,
+                lambda: vdb.search_vector(body.vector, body.k, collapse=body.collapse),
+            )
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        return respond(request, results)
+
+    class VectorItems(BaseModel):
+        vectors: conlist(conlist(float, min_items=1), min_items=1)
+        texts: conlist(
+            constr(min_length=1, max_length=vdb.max_text_length), min_items=1
+        )
+        dedupe_threshold: float | None = Field(None, ge=0)
+
+    @app.post(
+        "/add/vectors", dependencies=[Depends(check_key), Depends(check_writable)]
+    )
+    async def add_vectors(request: Request):
+        body = await parse_body(request, VectorItems)
+        logger.info("add %d texts with vectors", len(body.texts))
+        try:
+            duplicates = await writes.run(
+                request,
+                lambda: vdb.add_vectors(
+                    body.vectors, body.texts, dedupe_threshold=body.dedupe_threshold
+                ),
+            )
+        except ValueError as exc:
+            logger.warning("failed to add vectors: %s", exc)
+            raise HTTPException(status_code=400, detail=str(exc))
+        return respond(request, added(duplicates, body.dedupe_threshold))
+
+    @app.get("/items/{item_id}/similar", dependencies=[Depends(check_key)])
+    async def similar(request: Request, item_id: int, k: int = Query(5, ge=1)):
+        logger.info("similar id=%d k=%d", item_id, k)
+        try:
+            results = await searches.run(request, lambda: vdb.similar(item_id, k))
+        except KeyError:
+            raise HTTPException(status_code=404, detail="unknown item")
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        return respond(request, results)
 
     @app.get("/stats", dependencies=[Depends(check_key)])
-    async def stats() -> dict[str, int]:
-        """Return basic statistics about the database."""
-        logger.debug("stats request")
+    async def stats(verbose: bool = Query(False)) -> dict:
+        """Return the number of texts or, with ``verbose``, :meth:`VectorDB.stats`."""
+        logger.debug("stats request verbose=%s", verbose)
+        if verbose:
+            admission = {
+                gate.name: {
+                    "max_in_flight": gate.max_in_flight,
+                    "waiting": gate.waiting,
+                    "rejected": gate.rejected,
+                    "expired": gate.expired,
+                }
+                for gate in (searches, writes)
+            }
+            return {**vdb.stats(), "admission": admission}
         return {"count": vdb.count()}
 
+    if collections is not None:
+        _add_collection_routes(app, collections, check_key)
+
     return app
+
+
+def _add_collection_routes(
+    app: FastAPI, collections: CollectionManager, check_key
+) -> None:
+    """Register the ``/collections`` endpoints backed by ``collections``."""
+
+    class CollectionSpec(BaseModel):
+        max_elements: int | None = Field(None, ge=1)
+        ef_construction: int | None = Field(None, ge=1)
+        M: int | None = Field(None, ge=1)
+        ef: int | None = Field(None, ge=1)
+        space: Literal["cosine", "l2", "ip"] | None = None
+        max_text_length: int | None = Field(None, ge=1)
+        lexical_index: bool | None = None
+        quantization: Literal["float16", "int8"] | None = None
+        segmented: bool | None = None
+        text_codec: Literal["zlib", "lzma"] | None = None
+
+    class CollectionItem(BaseModel):
+        text: constr(min_length=1)
+
+    async def run(name: str, fn):
+        def work():
+            with collections.use(name) as vdb:
+                return fn(vdb)
+
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(collections.executor, work)
+        except KeyError:
+            raise HTTPException(status_code=404, detail="unknown collection")
+        except ValueError as exc:
+            logger.warning("collection %s request failed: %s", name, exc)
+            raise HTTPException(status_code=400, detail=str(exc))
+
+    @app.on_event("startup")
+    async def start_eviction() -> None:
+        if collections.idle_timeout is None:
+            return
+
+        async def evict() -> None:
+            while True:
+                await asyncio.sleep(max(collections.idle_timeout / 2, 1))
+                collections.evict_idle()
+
+        app.state.collection_evictor = asyncio.get_running_loop().create_task(evict())
+
+    @app.on_event("shutdown")
+    async def stop_eviction() -> None:
+        task = getattr(app.state, "collection_evictor", None)
+        if task is not None:
+            task.cancel()
+
+    @app.get("/collections", dependencies=[Depends(check_key)])
+    async def list_collections() -> dict[str, list[str]]:
+        return {"collections": collections.names(), "loaded": collections.loaded()}
+
+    @app.put("/collections/{name}", dependencies=[Depends(check_key)])
+    async def create_collection(name: str, spec: CollectionSpec) -> dict[str, str]:
+        logger.info("create collection %s", name)
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                collections.executor,
+                lambda: collections.create(name, **spec.dict(exclude_none=True)),
+            )
+        except FileExistsError as exc:
+            raise HTTPException(status_code=409, detail=str(exc))
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        return {"status": "ok"}
+
+    @app.post("/collections/{name}/add", dependencies=[Depends(check_key)])
+    async def add_to_collection(name: str, item: CollectionItem) -> dict[str, str]:
+        logger.info("add text to %s (%d chars)", name, len(item.text))
+        await run(name, lambda vdb: vdb.add_text(item.text))
+        return {"status": "ok"}
+
+    @app.get("/collections/{name}/search", dependencies=[Depends(check_key)])
+    async def search_collection(
+        name: str,
+        q: constr(min_length=1) = Query(...),
+        k: int = Query(5, ge=1),
+        mode: Literal["vector", "hybrid"] = Query("vector"),
+        collapse: bool = Query(False),
+    ) -> list[dict[str, float | int | str]]:
+        logger.info("search %s q=%s k=%d mode=%s", name, q, k, mode)
+        return await run(
+            name, lambda vdb: vdb.search(q, k, mode=mode, collapse=collapse)
+        )
+
+    @app.get("/collections/{name}/stats", dependencies=[Depends(check_key)])
+    async def collection_stats(name: str, verbose: bool = Query(False)) -> dict:
+        if verbose:
+            return await run(name, lambda vdb: vdb.stats())
+        return {"count": await run(name, lambda vdb: vdb.count())}
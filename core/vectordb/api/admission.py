@@ -0,0 +1,106 @@
+"""Admission control for the search and write endpoints.
+
+A :class:`Gate` bounds the number of requests of one kind that are processed
+at the same time and the number waiting for a slot. Requests arriving while
+the queue is full are rejected at once with ``503`` and ``Retry-After``
+instead of adding to the latency of everything behind them. Clients may send
+their remaining time budget in the :data:`DEADLINE_HEADER` header; a request
+still waiting when its budget runs out is dropped with ``504`` without
+touching the index.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Callable, TypeVar
+
+from fastapi import HTTPException, Request
+
+logger = logging.getLogger(__name__)
+
+#: Request header holding the client's remaining time budget in milliseconds.
+DEADLINE_HEADER = "X-Deadline-Ms"
+
+T = TypeVar("T")
+
+
+def request_deadline(request: Request) -> float | None:
+    """Return the ``time.monotonic()`` deadline sent with ``request``, if any."""
+    value = request.headers.get(DEADLINE_HEADER)
+    if value is None:
+        return None
+    try:
+        budget = float(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"invalid {DEADLINE_HEADER} header")
+    return time.monotonic() + budget / 1000
+
+
+class Gate:
+    """Limit concurrent work of one kind and the queue in front of it.
+
+    Parameters
+    ----------
+    name:
+        Kind of work, used in error messages and logs.
+    max_in_flight:
+        Requests processed at the same time, each on a worker thread. ``0``
+        disables the gate: work runs directly on the event loop as before
+        and only the deadline is checked.
+    max_waiting:
+        Requests allowed to wait for a slot; more are rejected with ``503``.
+    """
+
+    def __init__(
+        self, name: str, max_in_flight: int = 0, max_waiting: int = 64
+    ) -> None:
+        if max_in_flight < 0:
+            raise ValueError("max_in_flight must be >= 0")
+        if max_waiting < 0:
+            raise ValueError("max_waiting must be >= 0")
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.max_waiting = max_waiting
+        self.waiting = 0
+        self.rejected = 0
+        self.expired = 0
+        self._slots = asyncio.Semaphore(max_in_flight) if max_in_flight else None
+
+    async def run(self, request: Request, fn: Callable[[], T]) -> T:
+        """Run ``fn`` once admitted, or raise ``HTTPException`` (503/504)."""
+        deadline = request_deadline(request)
+        if self._slots is None:
+            self._check(deadline)
+            return fn()
+        if self._slots.locked() and self.waiting >= self.max_waiting:
+            self.rejected += 1
+            logger.warning("rejecting %s request: %d waiting", self.name, self.waiting)
+            raise HTTPException(
+                status_code=503,
+                detail=f"too many concurrent {self.name} requests",
+                headers={"Retry-After": "1"},
+            )
+        self.waiting += 1
+        try:
+            timeout = (
+                None if deadline is None else max(0.0, deadline - time.monotonic())
+            )
+            await asyncio.wait_for(self._slots.acquire(), timeout)
+        except asyncio.TimeoutError:
+            self._expire()
+        finally:
+            self.waiting -= 1
+        try:
+            self._check(deadline)
+            return await asyncio.get_running_loop().run_in_executor(None, fn)
+        finally:
+            self._slots.release()
+
+    def _check(self, deadline: float | None) -> None:
+        if deadline is not None and time.monotonic() >= deadline:
+            self._expire()
+
+    def _expire(self) -> None:
+        self.expired += 1
+        logger.info("dropping %s request: deadline exceeded", self.name)
+        raise HTTPException(status_code=504, detail="deadline exceeded")
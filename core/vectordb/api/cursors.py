@@ -0,0 +1,86 @@
+"""Server-side state of paginated searches."""
+
+from collections import OrderedDict
+import secrets
+import threading
+import time
+from typing import Any
+
+#: Pages fetched from the index whenever a cursor needs more results.
+PREFETCH_PAGES = 4
+
+
+class Cursor:
+    """A search whose further pages can be fetched without re-encoding."""
+
+    def __init__(
+        self, query: str, vector: Any, k: int, mode: str, collapse: bool
+    ) -> None:
+        self.query = query
+        self.vector = vector
+        self.k = k
+        self.mode = mode
+        self.collapse = collapse
+        # Ranked results fetched so far and the depth they were fetched with.
+        self.results: list[dict[str, Any]] = []
+        self.depth = 0
+        # Ids already returned, so inserts between pages cannot repeat results.
+        self.seen: set[int] = set()
+
+
+class CursorCache:
+    """Bounded, expiring map from opaque tokens to :class:`Cursor` objects.
+
+    Parameters
+    ----------
+    maxsize:
+        Maximum number of open cursors; the least recently used are dropped.
+    ttl:
+        Seconds after which an unused cursor expires.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._cursors: OrderedDict[str, tuple[float, Cursor]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, cursor: Cursor) -> str:
+        """Store ``cursor`` and return a new token for it."""
+        token = secrets.token_urlsafe(16)
+        with self._lock:
+            self._cursors[token] = (time.monotonic(), cursor)
+            while len(self._cursors) > self.maxsize:
+                self._cursors.popitem(last=False)
+        return token
+
+    def pop(self, token: str) -> Cursor | None:
+        """Remove and return the cursor for ``token`` if it has not expired."""
+        with self._lock:
+            now = time.monotonic()
+            while self._cursors:
+                oldest, (created, _) = next(iter(self._cursors.items()))
+                if now - created < self.ttl:
+                    break
+                del self._cursors[oldest]
+            entry = self._cursors.pop(token, None)
+        return entry[1] if entry is not None else None
+
+
+def next_page(vdb: Any, cursor: Cursor) -> list:
+    """Return the next ``cursor.k`` unseen results, querying deeper if needed."""
+    count = vdb.count()
+    while True:
+        page = [r for r in cursor.results if r["id"] not in cursor.seen][: cursor.k]
+        if len(page) == cursor.k or cursor.depth >= count:
+            break
+        cursor.depth = min(count, max(cursor.depth * 2, cursor.k * PREFETCH_PAGES))
+        cursor.results = vdb.search(
+            cursor.query,
+            cursor.depth,
+            mode=cursor.mode,
+            collapse=cursor.collapse,
+            vector=cursor.vector,
+        )
+    cursor.seen.update(r["id"] for r in page)
+    return page
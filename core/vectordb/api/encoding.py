@@ -0,0 +1,100 @@
+"""Response rendering and request decoding for the REST API.
+
+JSON is rendered with ``orjson`` when it is installed and with the standard
+library otherwise. Clients may ask for MessagePack instead by sending
+``Accept: application/msgpack`` and may send MessagePack request bodies with
+``Content-Type: application/msgpack``; this requires the ``msgpack`` package.
+Both are available through the ``fast`` extra.
+"""
+
+import json
+from typing import Any, Type, TypeVar
+
+from fastapi import HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, ValidationError
+from pydantic.error_wrappers import ErrorWrapper
+
+try:  # pragma: no cover - depends on the installed extras
+    import orjson
+except ImportError:  # pragma: no cover - depends on the installed extras
+    orjson = None
+
+try:  # pragma: no cover - depends on the installed extras
+    import msgpack
+except ImportError:  # pragma: no cover - depends on the installed extras
+    msgpack = None
+
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack")
+
+Model = TypeVar("Model", bound=BaseModel)
+
+
+def dumps(content: Any) -> bytes:
+    """Serialise ``content`` to compact JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def loads(body: bytes) -> Any:
+    """Parse JSON ``body``."""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered without FastAPI's encoder or pydantic."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class MsgpackResponse(Response):
+    """MessagePack encoded response."""
+
+    media_type = MSGPACK_TYPES[0]
+
+    def render(self, content: Any) -> bytes:
+        return msgpack.packb(content, use_bin_type=True)
+
+
+def wants_msgpack(request: Request) -> bool:
+    """Return whether the ``Accept`` header asks for MessagePack."""
+    accept = request.headers.get("accept", "")
+    return any(media in accept for media in MSGPACK_TYPES)
+
+
+def respond(request: Request, content: Any, status_code: int = 200) -> Response:
+    """Render ``content`` in the format negotiated via ``Accept``."""
+    if wants_msgpack(request):
+        if msgpack is None:
+            raise HTTPException(status_code=406, detail="msgpack is not installed")
+        return MsgpackResponse(content, status_code=status_code)
+    return FastJSONResponse(content, status_code=status_code)
+
+
+async def parse_body(request: Request, model: Type[Model]) -> Model:
+    """Decode the JSON or MessagePack request body into ``model``.
+
+    Malformed bodies and validation errors produce the same ``422`` response
+    as FastAPI's own body parsing.
+    """
+
+    body = await request.body()
+    content_type = request.headers.get("content-type", "")
+    try:
+        if any(media in content_type for media in MSGPACK_TYPES):
+            if msgpack is None:
+                raise HTTPException(status_code=415, detail="msgpack is not installed")
+            data = msgpack.unpackb(body, raw=False)
+        else:
+            data = loads(body)
+    except (ValueError, TypeError) as exc:
+        raise RequestValidationError([ErrorWrapper(exc, loc=("body",))])
+    try:
+        return model.parse_obj(data)
+    except ValidationError as exc:
+        raise RequestValidationError([ErrorWrapper(exc, loc=("body",))])
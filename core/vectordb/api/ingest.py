@@ -0,0 +1,144 @@
+"""Background ingestion queue used by the asynchronous ``/add`` mode."""
+
+import asyncio
+from collections import deque
+import logging
+import uuid
+
+from ..db import VectorDB
+
+logger = logging.getLogger(__name__)
+
+
+class IngestQueue:
+    """Bounded in-process queue drained in batches by a background task.
+
+    Parameters
+    ----------
+    vdb:
+        Database receiving the queued texts.
+    maxsize:
+        Maximum number of queued texts. :meth:`submit` raises
+        ``asyncio.QueueFull`` once it is reached and :meth:`submit_many`
+        raises ``ValueError`` for batches that could never fit.
+    batch_size:
+        Maximum number of texts passed to a single ``add_texts`` call.
+    max_jobs:
+        Number of finished jobs whose status is remembered.
+    """
+
+    def __init__(
+        self,
+        vdb: VectorDB,
+        maxsize: int = 1000,
+        batch_size: int = 256,
+        max_jobs: int = 10000,
+    ) -> None:
+        if maxsize < 1:
+            raise ValueError("maxsize must be >= 1")
+        if batch_size < 1:
+            raise ValueError("batch_size must be >= 1")
+        self.vdb = vdb
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.max_jobs = max_jobs
+        self.jobs: dict[str, dict[str, str]] = {}
+        self._finished: deque[str] = deque()
+        self._queue: asyncio.Queue[tuple[str, str]] | None = None
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        """Start the background writer on the running event loop."""
+        self._queue = asyncio.Queue(self.maxsize)
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Write everything still queued, then stop the background writer."""
+        if self._task is None:
+            return
+        assert self._queue is not None
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def submit(self, text: str) -> str:
+        """Queue ``text`` for insertion and return its job id."""
+        if self._queue is None:
+            raise RuntimeError("ingest queue is not running")
+        job_id = uuid.uuid4().hex
+        self._queue.put_nowait((job_id, text))
+        self.jobs[job_id] = {"id": job_id, "status": "queued"}
+        return job_id
+
+    def submit_many(self, texts: list[str]) -> list[str]:
+        """Queue all ``texts`` or none of them and return their job ids."""
+        if self._queue is None:
+            raise RuntimeError("ingest queue is not running")
+        if len(texts) > self.maxsize:
+            raise ValueError(
+                f"batch of {len(texts)} texts exceeds the ingest queue size "
+                f"of {self.maxsize}"
+            )
+        if self._queue.qsize() + len(texts) > self.maxsize:
+            raise asyncio.QueueFull
+        return [self.submit(text) for text in texts]
+
+    def status(self, job_id: str) -> dict[str, str] | None:
+        """Return the status record of ``job_id`` or ``None`` if unknown."""
+        return self.jobs.get(job_id)
+
+    def qsize(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def _run(self) -> None:
+        assert self._queue is not None
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            for job_id, _ in batch:
+                self._set(job_id, "running")
+            try:
+                await loop.run_in_executor(None, self._write, batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, batch: list[tuple[str, str]]) -> None:
+        logger.info("writing %d queued texts", len(batch))
+        try:
+            self.vdb.add_texts([text for _, text in batch])
+        except ValueError as exc:
+            # Invalid texts and capacity are checked before anything is
+            # inserted, so retry one by one and fail only the bad texts.
+            if len(batch) == 1:
+                logger.warning("queued add failed: %s", exc)
+                self._set(batch[0][0], "failed", str(exc))
+                return
+            for item in batch:
+                self._write([item])
+            return
+        except Exception as exc:
+            # Other errors (e.g. a failed save) may come after the texts were
+            # inserted; retrying would insert them a second time.
+            logger.warning("queued add of %d texts failed: %s", len(batch), exc)
+            for job_id, _ in batch:
+                self._set(job_id, "failed", str(exc))
+            return
+        for job_id, _ in batch:
+            self._set(job_id, "done")
+
+    def _set(self, job_id: str, status: str, error: str | None = None) -> None:
+        record = {"id": job_id, "status": status}
+        if error is not None:
+            record["error"] = error
+        self.jobs[job_id] = record
+        if status in ("done", "failed"):
+            self._finished.append(job_id)
+            while len(self._finished) > self.max_jobs:
+                self.jobs.pop(self._finished.popleft(), None)
@@ -1,10 +1,13 @@
 """Command line interface for :mod:`vectordb`."""
 
 import argparse
+from contextlib import contextmanager
+from importlib import import_module
 from pathlib import Path
 import logging
 import os
-import uvicorn
+import sys
+from typing import Any, Iterator
 
 from .. import (
     API_KEY_ENV_VAR,
@@ -19,11 +22,33 @@ from .. import (
     EF_ENV_VAR,
     SPACE_ENV_VAR,
     MAX_TEXT_LENGTH_ENV_VAR,
+    QUANTIZATION_ENV_VAR,
+    COLLECTIONS_DIR_ENV_VAR,
+    EMBEDDER_ENV_VAR,
+    ENCODE_WORKERS_ENV_VAR,
+    NUM_THREADS_ENV_VAR,
+    UDS_ENV_VAR,
     __version__,
 )
 
 from ..db import VectorDB, INDEX_PATH, DATA_PATH, MODEL_NAME
-from ..api import create_app
+
+# Commands that encode texts and so may use ``--encode-workers``.
+_ENCODING_COMMANDS = ("add", "add-document", "query", "serve")
+
+# The REST stack is only needed by ``serve``; import it on first access.
+_LAZY_ATTRS = {
+    "create_app": "..api",
+    "CollectionManager": "..db.manager",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_ATTRS:
+        value = getattr(import_module(_LAZY_ATTRS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def main(argv: list[str] | None = None) -> None:
@@ -103,6 +128,73 @@ def main(argv: list[str] | None = None) -> None:
         default=max_text_length_default,
         help="maximum length of text entries",
     )
+    parser.add_argument(
+        "--quantization",
+        choices=["float16", "int8"],
+        default=os.getenv(QUANTIZATION_ENV_VAR) or None,
+        help=(
+            "keep vectors in memory as compressed codes and re-rank exactly "
+            f"(or set {QUANTIZATION_ENV_VAR})"
+        ),
+    )
+    parser.add_argument(
+        "--embedder",
+        choices=["model2vec", "hashing"],
+        default=os.getenv(EMBEDDER_ENV_VAR, "model2vec"),
+        help=(
+            "text encoder; hashing needs no model download and is meant for "
+            f"benchmarks (or set {EMBEDDER_ENV_VAR})"
+        ),
+    )
+    parser.add_argument(
+        "--encode-workers",
+        type=int,
+        default=int(os.getenv(ENCODE_WORKERS_ENV_VAR, "0")),
+        help=(
+            "encode in this many worker processes (default 0: encode in "
+            f"process) (or set {ENCODE_WORKERS_ENV_VAR})"
+        ),
+    )
+    num_threads_env = os.getenv(NUM_THREADS_ENV_VAR)
+    parser.add_argument(
+        "--num-threads",
+        type=int,
+        default=int(num_threads_env) if num_threads_env else None,
+        help=(
+            "hnswlib threads for bulk inserts and batched queries (default: "
+            f"usable CPUs) (or set {NUM_THREADS_ENV_VAR})"
+        ),
+    )
+    parser.add_argument(
+        "--lexical-index",
+        action="store_true",
+        help="maintain and persist the BM25 index used by hybrid search",
+    )
+    parser.add_argument(
+        "--text-codec",
+        choices=["zlib", "lzma"],
+        default=None,
+        help=(
+            "store texts as compressed blocks that are written once instead "
+            "of a JSON list rewritten on every save"
+        ),
+    )
+    parser.add_argument(
+        "--segmented",
+        action="store_true",
+        help=(
+            "store vectors in immutable segments merged in the background so "
+            "saves only write new vectors"
+        ),
+    )
+    parser.add_argument(
+        "--read-only",
+        action="store_true",
+        help=(
+            "open a saved database without writing to it; texts and vectors "
+            "are memory-mapped where possible and writes are rejected"
+        ),
+    )
     from .. import LOG_LEVEL_ENV_VAR
 
     parser.add_argument(
@@ -130,6 +222,14 @@ def main(argv: list[str] | None = None) -> None:
         default=port_default,
         help=f"port for REST server (or set {PORT_ENV_VAR})",
     )
+    serve.add_argument(
+        "--uds",
+        default=os.getenv(UDS_ENV_VAR),
+        help=(
+            "listen on this Unix domain socket instead of --host/--port "
+            f"(or set {UDS_ENV_VAR})"
+        ),
+    )
     serve.add_argument(
         "--workers",
         type=int,
@@ -143,8 +243,89 @@ def main(argv: list[str] | None = None) -> None:
             f"(or set {API_KEY_ENV_VAR} env var)"
         ),
     )
+    serve.add_argument(
+        "--warmup",
+        action="store_true",
+        help="load and exercise the model and index before reporting ready",
+    )
+    serve.add_argument(
+        "--max-searches",
+        type=int,
+        default=0,
+        help=(
+            "searches processed concurrently on worker threads; more wait in "
+            "a bounded queue (default 0: no limit)"
+        ),
+    )
+    serve.add_argument(
+        "--max-writes",
+        type=int,
+        default=0,
+        help="synchronous writes processed concurrently (default 0: no limit)",
+    )
+    serve.add_argument(
+        "--max-waiting",
+        type=int,
+        default=64,
+        help=(
+            "searches and writes each allowed to wait for a slot before "
+            "requests are rejected with 503"
+        ),
+    )
+    serve.add_argument(
+        "--ingest-queue-size",
+        type=int,
+        default=0,
+        help=(
+            "queue up to this many texts from POST /add and write them in the "
+            "background (default 0: write synchronously)"
+        ),
+    )
+    serve.add_argument(
+        "--ingest-batch-size",
+        type=int,
+        default=256,
+        help="maximum number of queued texts written per batch",
+    )
+    collections_env = os.getenv(COLLECTIONS_DIR_ENV_VAR)
+    serve.add_argument(
+        "--collections-dir",
+        type=Path,
+        default=Path(collections_env) if collections_env else None,
+        help=(
+            "serve named collections stored below this directory at "
+            f"/collections/<name> (or set {COLLECTIONS_DIR_ENV_VAR})"
+        ),
+    )
+    serve.add_argument(
+        "--collection-idle-timeout",
+        type=float,
+        default=600.0,
+        help="seconds after which an unused collection is unloaded",
+    )
+    serve.add_argument(
+        "--max-loaded-collections",
+        type=int,
+        default=16,
+        help="maximum number of collections kept in memory",
+    )
     add = subparsers.add_parser("add", help="add text")
     add.add_argument("text", help="text to add")
+    add_document = subparsers.add_parser(
+        "add-document", help="split a long document into chunks and add them"
+    )
+    add_document.add_argument("text", help="document text to add")
+    add_document.add_argument(
+        "--chunk-size",
+        type=int,
+        help="maximum chunk length (default: --max-text-length)",
+    )
+    add_document.add_argument(
+        "--overlap",
+        type=int,
+        default=0,
+        help="number of characters shared by consecutive chunks",
+    )
     query = subparsers.add_parser("query", help="query text")
     query.add_argument("text", help="text to query")
     query.add_argument(
@@ -153,7 +334,71 @@ def main(argv: list[str] | None = None) -> None:
         default=5,
         help="number of results to return",
     )
-    subparsers.add_parser("stats", help="show number of stored texts")
+    query.add_argument(
+        "--mode",
+        choices=["vector", "hybrid"],
+        default="vector",
+        help="search mode; hybrid fuses vector and BM25 rankings",
+    )
+    query.add_argument(
+        "--collapse",
+        action="store_true",
+        help="return only the best chunk of each document",
+    )
+    stats = subparsers.add_parser("stats", help="show number of stored texts")
+    stats.add_argument(
+        "--verbose",
+        action="store_true",
+        help="also show memory, disk and capacity figures as JSON",
+    )
+    loadtest = subparsers.add_parser(
+        "loadtest", help="measure throughput and latency of a running server"
+    )
+    loadtest.add_argument(
+        "--url",
+        default=f"http://127.0.0.1:{port_default}",
+        help="base URL of the server",
+    )
+    loadtest.add_argument(
+        "--uds",
+        default=os.getenv(UDS_ENV_VAR),
+        help=f"connect through this Unix domain socket (or set {UDS_ENV_VAR})",
+    )
+    loadtest.add_argument(
+        "--api-key",
+        help=f"API key of the server (or set {API_KEY_ENV_VAR} env var)",
+    )
+    loadtest.add_argument(
+        "--requests", type=int, default=1000, help="total number of requests"
+    )
+    loadtest.add_argument(
+        "--concurrency",
+        type=int,
+        default=10,
+        help="pooled connections and closed-loop workers",
+    )
+    loadtest.add_argument(
+        "--rate",
+        type=float,
+        help="open-loop arrival rate in requests per second (default: closed loop)",
+    )
+    loadtest.add_argument(
+        "--add-ratio",
+        type=float,
+        default=0.1,
+        help="fraction of requests that are POST /add",
+    )
+    loadtest.add_argument(
+        "--queries",
+        help="file with one query per line (default: built-in samples)",
+    )
+    loadtest.add_argument(
+        "--k", type=int, default=5, help="results requested per search"
+    )
+    loadtest.add_argument("--seed", type=int, help="seed for the request mix")
+    loadtest.add_argument(
+        "--json", action="store_true", help="print the report as JSON"
+    )
     args = parser.parse_args(argv)
 
     logging.basicConfig(level=getattr(logging, args.log_level.upper()))
@@ -162,34 +407,139 @@ def main(argv: list[str] | None = None) -> None:
         VectorDB.clear(index_path=args.index_path, data_path=args.data_path)
         return
 
+    if args.command == "loadtest":
+        _loadtest(args)
+        return
+
+    if args.read_only and args.delete:
+        parser.error("--delete cannot be combined with --read-only")
+    if args.read_only and args.command == "serve" and args.collections_dir:
+        parser.error("--collections-dir cannot be combined with --read-only")
+
     if args.delete:
         VectorDB.clear(index_path=args.index_path, data_path=args.data_path)
 
-    vdb = VectorDB(
-        index_path=args.index_path,
-        data_path=args.data_path,
-        model_name=args.model_name,
-        max_elements=args.max_elements,
-        ef_construction=args.ef_construction,
-        M=args.M,
-        ef=args.ef,
-        space=args.space,
-        max_text_length=args.max_text_length,
-    )
-
-    if args.command == "serve":
-        api_key = args.api_key or os.getenv(API_KEY_ENV_VAR)
-        app = create_app(vdb, api_key=api_key)
-        uvicorn.run(
-            app,
-            host=args.host,
-            port=args.port,
-            log_level=args.log_level.lower(),
-            workers=args.workers,
+    with _embedder(args) as model:
+        vdb = VectorDB(
+            index_path=args.index_path,
+            data_path=args.data_path,
+            model_name=args.model_name,
+            max_elements=args.max_elements,
+            ef_construction=args.ef_construction,
+            M=args.M,
+            ef=args.ef,
+            space=args.space,
+            max_text_length=args.max_text_length,
+            lexical_index=args.lexical_index,
+            quantization=args.quantization,
+            segmented=args.segmented,
+            text_codec=args.text_codec,
+            read_only=args.read_only,
+            model=model,
+            num_threads=args.num_threads,
+        )
+
+        if args.command == "serve":
+            import uvicorn
+
+            cli = sys.modules[__name__]
+            api_key = args.api_key or os.getenv(API_KEY_ENV_VAR)
+            collections = None
+            if args.collections_dir is not None:
+                collections = cli.CollectionManager(
+                    args.collections_dir,
+                    vdb.model,
+                    idle_timeout=args.collection_idle_timeout,
+                    max_loaded=args.max_loaded_collections,
+                )
+            app = cli.create_app(
+                vdb,
+                api_key=api_key,
+                ingest_queue_size=args.ingest_queue_size,
+                ingest_batch_size=args.ingest_batch_size,
+                collections=collections,
+                warmup=args.warmup,
+                max_searches=args.max_searches,
+                max_writes=args.max_writes,
+                max_waiting=args.max_waiting,
+            )
+            # A socket path replaces host and port; co-located clients then skip
+            # the TCP stack.
+            bind = (
+                {"uds": args.uds}
+                if args.uds
+                else {"host": args.host, "port": args.port}
+            )
+            uvicorn.run(
+                app,
+                **bind,
+                log_level=args.log_level.lower(),
+                workers=args.workers,
+            )
+        elif args.command == "add":
+            vdb.add_text(args.text)
+        elif args.command == "add-document":
+            print(vdb.add_documents([args.text], args.chunk_size, args.overlap)[0])
+        elif args.command == "query":
+            print(
+                vdb.search(args.text, k=args.k, mode=args.mode, collapse=args.collapse)
+            )
+        elif args.command == "stats":
+            if args.verbose:
+                import json
+
+                print(json.dumps(vdb.stats(), indent=2))
+            else:
+                print(vdb.count())
+
+
+@contextmanager
+def _embedder(args: argparse.Namespace) -> Iterator[Any | None]:
+    """Yield the encoder selected on the command line.
+
+    ``None`` lets :class:`VectorDB` load the default model on first use.
+    Worker processes are only started for commands that encode, and are shut
+    down when the command finishes.
+    """
+
+    workers = args.encode_workers if args.command in _ENCODING_COMMANDS else 0
+    if args.embedder == "model2vec" and not workers:
+        yield None
+        return
+    from ..db import embedders
+
+    if args.embedder == "hashing":
+        factory = embedders.HashingEmbedder
+    else:
+        factory = embedders.model2vec_factory(args.model_name)
+    if workers:
+        with embedders.ProcessPoolEmbedder(factory, workers) as pool:
+            yield pool
+    else:
+        yield factory()
+
+
+def _loadtest(args: argparse.Namespace) -> None:
+    import asyncio
+    import json
+
+    from . import loadtest
+
+    try:
+        report = asyncio.run(
+            loadtest.run(
+                args.url,
+                requests=args.requests,
+                concurrency=args.concurrency,
+                rate=args.rate,
+                add_ratio=args.add_ratio,
+                queries=loadtest.load_queries(args.queries),
+                k=args.k,
+                api_key=args.api_key or os.getenv(API_KEY_ENV_VAR),
+                seed=args.seed,
+                uds=args.uds,
+            )
         )
-    elif args.command == "add":
-        vdb.add_text(args.text)
-    elif args.command == "query":
-        print(vdb.search(args.text, k=args.k))
-    elif args.command == "stats":
-        print(vdb.count())
+    except (OSError, ValueError) as exc:
+        sys.exit(f"loadtest: {exc}")
+    print(json.dumps(report, indent=2) if args.json else loadtest.format_report(report))
@@ -0,0 +1,223 @@
+"""Load generator for a running ``vectordb serve`` instance.
+
+Requests are sent through one pooled :class:`httpx.AsyncClient`. In the
+closed-loop mode ``concurrency`` workers each send a request as soon as the
+previous one has finished, which measures the maximum throughput. In the
+open-loop mode requests arrive at a fixed ``rate`` regardless of how fast the
+server answers; latencies are measured from the scheduled arrival time so a
+slow server is not hidden by the generator backing off.
+"""
+
+import asyncio
+import math
+import random
+import time
+from typing import Any, Iterable, List
+
+#: Queries used when no corpus file is given.
+DEFAULT_QUERIES = [
+    "vector databases store embeddings",
+    "approximate nearest neighbour search",
+    "hierarchical navigable small world graphs",
+    "static embedding models are fast",
+    "hybrid lexical and semantic retrieval",
+]
+
+
+def load_queries(path: str | None) -> List[str]:
+    """Read one query per non-empty line of ``path`` or return the defaults."""
+    if path is None:
+        return list(DEFAULT_QUERIES)
+    with open(path, encoding="utf-8") as fh:
+        queries = [line.strip() for line in fh if line.strip()]
+    if not queries:
+        raise ValueError(f"{path} contains no queries")
+    return queries
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Return the ``q``-th percentile of sorted ``values`` (nearest rank)."""
+    if not values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(values)))
+    return values[min(rank, len(values)) - 1]
+
+
+async def run(
+    url: str,
+    *,
+    requests: int = 1000,
+    concurrency: int = 10,
+    rate: float | None = None,
+    add_ratio: float = 0.1,
+    queries: Iterable[str] = DEFAULT_QUERIES,
+    k: int = 5,
+    api_key: str | None = None,
+    timeout: float = 30.0,
+    seed: int | None = None,
+    transport: Any | None = None,
+    uds: str | None = None,
+) -> dict[str, Any]:
+    """Send ``requests`` mixed ``/add`` and ``/search`` calls to ``url``.
+
+    Parameters
+    ----------
+    url:
+        Base URL of the server, e.g. ``http://127.0.0.1:8000``.
+    requests:
+        Total number of requests to send.
+    concurrency:
+        Number of pooled connections and, in closed-loop mode, workers.
+    rate:
+        Arrival rate in requests per second for the open-loop mode. ``None``
+        runs closed-loop.
+    add_ratio:
+        Fraction of requests that are ``POST /add``; the rest are
+        ``GET /search``.
+    queries:
+        Texts to search for and add, picked at random.
+    k:
+        Number of results requested per search.
+    api_key:
+        Value of the ``X-API-Key`` header.
+    timeout:
+        Per-request timeout in seconds.
+    seed:
+        Seed for the request mix, making runs reproducible.
+    transport:
+        Optional ``httpx`` transport, e.g. to drive an in-process app.
+    uds:
+        Connect through this Unix domain socket instead of TCP; ``url`` then
+        only sets the ``Host`` header.
+
+    Returns the report produced by :func:`summarize`.
+    """
+
+    import httpx
+
+    if requests < 1:
+        raise ValueError("requests must be >= 1")
+    if concurrency < 1:
+        raise ValueError("concurrency must be >= 1")
+    if rate is not None and rate <= 0:
+        raise ValueError("rate must be > 0")
+    if not 0 <= add_ratio <= 1:
+        raise ValueError("add_ratio must be between 0 and 1")
+    queries = list(queries)
+    if not queries:
+        raise ValueError("queries must not be empty")
+
+    rng = random.Random(seed)
+    plan = [
+        ("add" if rng.random() < add_ratio else "search", rng.choice(queries))
+        for _ in range(requests)
+    ]
+    samples: List[tuple[str, float, str | None]] = []
+    headers = {"X-API-Key": api_key} if api_key else {}
+    limits = httpx.Limits(
+        max_connections=concurrency, max_keepalive_connections=concurrency
+    )
+    if transport is None and uds is not None:
+        # A custom transport ignores the client's limits, so pass them on.
+        transport = httpx.AsyncHTTPTransport(uds=uds, limits=limits)
+
+    async with httpx.AsyncClient(
+        base_url=url,
+        headers=headers,
+        limits=limits,
+        timeout=timeout,
+        transport=transport,
+    ) as client:
+
+        async def send(op: str, text: str, started: float) -> None:
+            error = None
+            try:
+                if op == "add":
+                    resp = await client.post("/add", json={"text": text})
+                else:
+                    resp = await client.get("/search", params={"q": text, "k": k})
+                if resp.status_code >= 400:
+                    error = str(resp.status_code)
+            except httpx.HTTPError as exc:
+                error = type(exc).__name__
+            samples.append((op, time.perf_counter() - started, error))
+
+        start = time.perf_counter()
+        if rate is None:
+            pending = iter(plan)
+
+            async def worker() -> None:
+                for op, text in pending:
+                    await send(op, text, time.perf_counter())
+
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+        else:
+            tasks = []
+            for i, (op, text) in enumerate(plan):
+                due = start + i / rate
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                tasks.append(asyncio.create_task(send(op, text, due)))
+            await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+
+    return summarize(samples, elapsed)
+
+
+def summarize(
+    samples: List[tuple[str, float, str | None]], elapsed: float
+) -> dict[str, Any]:
+    """Aggregate ``(operation, latency, error)`` samples into a report."""
+
+    def stats(group: List[tuple[str, float, str | None]]) -> dict[str, Any]:
+        latencies = sorted(latency for _, latency, _ in group)
+        errors: dict[str, int] = {}
+        for _, _, error in group:
+            if error is not None:
+                errors[error] = errors.get(error, 0) + 1
+        failed = sum(errors.values())
+        return {
+            "requests": len(group),
+            "errors": failed,
+            "error_rate": failed / len(group) if group else 0.0,
+            "error_kinds": errors,
+            "latency_ms": {
+                name: percentile(latencies, q) * 1000
+                for name, q in (("p50", 50), ("p90", 90), ("p99", 99), ("max", 100))
+            },
+        }
+
+    report = {
+        "duration": elapsed,
+        "throughput": len(samples) / elapsed if elapsed > 0 else 0.0,
+        **stats(samples),
+        "operations": {
+            op: stats([s for s in samples if s[0] == op])
+            for op in sorted({s[0] for s in samples})
+        },
+    }
+    return report
+
+
+def format_report(report: dict[str, Any]) -> str:
+    """Render ``report`` as a small text table."""
+    lines = [
+        f"duration    {report['duration']:.2f}s",
+        f"throughput  {report['throughput']:.1f} req/s",
+        "",
+        f"{'operation':<10}{'requests':>10}{'errors':>9}"
+        f"{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}",
+    ]
+    rows = [*report["operations"].items(), ("total", report)]
+    for name, stats in rows:
+        latency = stats["latency_ms"]
+        lines.append(
+            f"{name:<10}{stats['requests']:>10}{stats['error_rate']:>8.1%} "
+            f"{latency['p50']:>9.1f}{latency['p90']:>10.1f}"
+            f"{latency['p99']:>10.1f}{latency['max']:>10.1f}"
+        )
+    if report["error_kinds"]:
+        kinds = ", ".join(f"{kind}: {n}" for kind, n in report["error_kinds"].items())
+        lines.append(f"\nerrors: {kinds}")
+    return "\n".join(lines)
@@ -0,0 +1,399 @@
+"""Clients for the REST API served by ``vectordb serve``.
+
+:class:`AsyncClient` keeps one pooled ``httpx.AsyncClient`` with keep-alive
+connections, retries failed requests with exponential backoff and full
+jitter, and transparently coalesces concurrent :meth:`~AsyncClient.add` and
+:meth:`~AsyncClient.search` calls into ``POST /add/batch`` and
+``POST /search/batch`` requests. :class:`Client` offers the same methods to
+synchronous code by running an :class:`AsyncClient` on a private event loop,
+so calls from several threads are batched together as well.
+
+Example::
+
+    with Client("http://127.0.0.1:8000") as client:
+        client.add("hello world")
+        print(client.search("hello", k=1))
+"""
+
+import asyncio
+import logging
+import os
+import random
+import threading
+from typing import Any, Awaitable, Callable, Hashable, List, Sequence, TypeVar
+
+import httpx
+
+from . import API_KEY_ENV_VAR
+
+logger = logging.getLogger(__name__)
+
+#: Header checked by ``check_key`` in :func:`vectordb.api.create_app`.
+API_KEY_HEADER = "X-API-Key"
+#: Statuses returned before a request was processed, safe to retry for writes.
+RETRY_STATUSES = (429, 503)
+#: Statuses only retried for reads, as the write may have happened.
+RETRY_READ_STATUSES = (502, 504)
+
+T = TypeVar("T")
+
+
+class _Batcher:
+    """Group items submitted close together and send them in one call."""
+
+    def __init__(
+        self,
+        send: Callable[[Hashable, List[Any]], Awaitable[List[Any]]],
+        max_size: int,
+        delay: float,
+    ) -> None:
+        self._send = send
+        self.max_size = max_size
+        self.delay = delay
+        self._pending: dict[Hashable, List[tuple[Any, asyncio.Future]]] = {}
+        self._timers: dict[Hashable, asyncio.TimerHandle] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    async def submit(self, key: Hashable, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        group = self._pending.setdefault(key, [])
+        group.append((item, future))
+        if len(group) >= self.max_size:
+            self._flush(key)
+        elif len(group) == 1:
+            self._timers[key] = loop.call_later(self.delay, self._flush, key)
+        return await future
+
+    async def drain(self) -> None:
+        """Send every pending group and wait for all requests in flight."""
+        for key in list(self._pending):
+            self._flush(key)
+        while self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _flush(self, key: Hashable) -> None:
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        group = self._pending.pop(key, None)
+        if not group:
+            return
+        task = asyncio.get_running_loop().create_task(self._run(key, group))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(
+        self, key: Hashable, group: List[tuple[Any, asyncio.Future]]
+    ) -> None:
+        try:
+            results = await self._send(key, [item for item, _ in group])
+        except Exception as exc:
+            if len(group) > 1 and _rejected(exc):
+                # One invalid item rejects the whole request; resend every
+                # item on its own so each caller only gets its own error.
+                for entry in group:
+                    await self._run(key, [entry])
+                return
+            for _, future in group:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for (_, future), result in zip(group, results):
+            if not future.done():
+                future.set_result(result)
+
+
+class AsyncClient:
+    """Asynchronous client for a ``vectordb serve`` instance.
+
+    Parameters
+    ----------
+    url:
+        Base URL of the server, e.g. ``http://127.0.0.1:8000``.
+    api_key:
+        Value of the ``X-API-Key`` header. Defaults to the
+        ``VECTORDB_API_KEY`` environment variable read by the server.
+    timeout:
+        Per-request timeout in seconds.
+    max_connections:
+        Size of the keep-alive connection pool.
+    retries:
+        Number of retries after connection errors and ``429``/``503``
+        responses; reads are also retried after timeouts, ``502`` and ``504``.
+    backoff:
+        Base delay in seconds. Retry ``n`` waits a random time between ``0``
+        and ``backoff * 2 ** n`` (capped at ``max_backoff``) unless the server
+        sends ``Retry-After``.
+    max_backoff:
+        Upper bound of a single retry delay in seconds.
+    batch_size:
+        Maximum number of :meth:`add` or :meth:`search` calls sent in one
+        batch request.
+    batch_delay:
+        Seconds a call waits for others to join its batch.
+    transport:
+        Optional ``httpx`` transport, e.g. ``httpx.ASGITransport`` for tests.
+    uds:
+        Connect through this Unix domain socket, as served by ``vectordb
+        serve --uds``, instead of TCP. ``url`` then only sets the ``Host``
+        header, e.g. ``http://localhost``.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        *,
+        api_key: str | None = None,
+        timeout: float = 30.0,
+        max_connections: int = 10,
+        retries: int = 3,
+        backoff: float = 0.1,
+        max_backoff: float = 5.0,
+        batch_size: int = 64,
+        batch_delay: float = 0.002,
+        transport: Any | None = None,
+        uds: str | None = None,
+    ) -> None:
+        if retries < 0:
+            raise ValueError("retries must be >= 0")
+        if batch_size < 1:
+            raise ValueError("batch_size must be >= 1")
+        api_key = api_key if api_key is not None else os.getenv(API_KEY_ENV_VAR)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        )
+        if transport is None and uds is not None:
+            transport = httpx.AsyncHTTPTransport(uds=uds, limits=limits)
+        self._http = httpx.AsyncClient(
+            base_url=url,
+            headers={API_KEY_HEADER: api_key} if api_key else {},
+            timeout=timeout,
+            limits=limits,
+            transport=transport,
+        )
+        self._adds = _Batcher(self._send_adds, batch_size, batch_delay)
+        self._searches = _Batcher(self._send_searches, batch_size, batch_delay)
+
+    async def add(self, text: str) -> dict[str, Any]:
+        """Add ``text``, batched with concurrent calls into ``POST /add/batch``.
+
+        Returns ``{"status": "ok"}``, or ``{"status": "queued", "job": id}``
+        when the server queues writes. If the batch is rejected with a ``4xx``
+        status, its calls are resent one by one so each gets only its own
+        error; other errors fail every call of the batch.
+        """
+        return await self._adds.submit(None, text)
+
+    async def add_many(
+        self, texts: Sequence[str], *, dedupe_threshold: float | None = None
+    ) -> dict[str, Any]:
+        """Add ``texts`` with one ``POST /add/batch`` request."""
+        body: dict[str, Any] = {"texts": list(texts)}
+        if dedupe_threshold is not None:
+            body["dedupe_threshold"] = dedupe_threshold
+        return await self._request("POST", "/add/batch", json=body, read=False)
+
+    async def search(
+        self, query: str, k: int = 5, *, mode: str = "vector", collapse: bool = False
+    ) -> List[dict[str, Any]]:
+        """Search for ``query``, batched with concurrent calls into ``POST /search/batch``."""
+        return await self._searches.submit((k, mode, collapse), query)
+
+    async def search_many(
+        self,
+        queries: Sequence[str],
+        k: int = 5,
+        *,
+        mode: str = "vector",
+        collapse: bool = False,
+    ) -> List[List[dict[str, Any]]]:
+        """Search for all ``queries`` with one ``POST /search/batch`` request."""
+        body = {"queries": list(queries), "k": k, "mode": mode, "collapse": collapse}
+        return await self._request("POST", "/search/batch", json=body)
+
+    async def search_vector(
+        self, vector: Sequence[float], k: int = 5, *, collapse: bool = False
+    ) -> List[dict[str, Any]]:
+        """Search with a precomputed embedding via ``POST /search/vector``."""
+        body = {"vector": [float(x) for x in vector], "k": k, "collapse": collapse}
+        return await self._request("POST", "/search/vector", json=body)
+
+    async def similar(self, item_id: int, k: int = 5) -> List[dict[str, Any]]:
+        """Return the ``k`` items most similar to the stored item ``item_id``."""
+        return await self._request("GET", f"/items/{item_id}/similar", params={"k": k})
+
+    async def stats(self, *, verbose: bool = False) -> dict[str, Any]:
+        """Return ``GET /stats``."""
+        params = {"verbose": "true"} if verbose else {}
+        return await self._request("GET", "/stats", params=params)
+
+    async def flush(self) -> None:
+        """Send batched calls now instead of after ``batch_delay``."""
+        await self._adds.drain()
+        await self._searches.drain()
+
+    async def aclose(self) -> None:
+        """Send pending batches and close the connection pool."""
+        await self.flush()
+        await self._http.aclose()
+
+    async def __aenter__(self) -> "AsyncClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    async def _send_adds(self, _: None, texts: List[str]) -> List[dict[str, Any]]:
+        response = await self._request(
+            "POST", "/add/batch", json={"texts": texts}, read=False
+        )
+        if "jobs" in response:
+            return [
+                {"status": response["status"], "job": job} for job in response["jobs"]
+            ]
+        return [response] * len(texts)
+
+    async def _send_searches(
+        self, key: tuple[int, str, bool], queries: List[str]
+    ) -> List[List[dict[str, Any]]]:
+        k, mode, collapse = key
+        return await self.search_many(queries, k, mode=mode, collapse=collapse)
+
+    async def _request(
+        self, method: str, path: str, *, read: bool = True, **kwargs: Any
+    ) -> Any:
+        """Send a request, retrying as described in the class docstring.
+
+        ``read`` marks requests that are safe to repeat after the server may
+        already have processed them.
+        """
+
+        attempt = 0
+        while True:
+            retry_after = None
+            try:
+                response = await self._http.request(method, path, **kwargs)
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout):
+                if attempt >= self.retries:
+                    raise
+            except httpx.TransportError:
+                if not read or attempt >= self.retries:
+                    raise
+            else:
+                retryable = response.status_code in RETRY_STATUSES or (
+                    read and response.status_code in RETRY_READ_STATUSES
+                )
+                if not retryable or attempt >= self.retries:
+                    response.raise_for_status()
+                    return response.json()
+                retry_after = _retry_after(response)
+            delay = retry_after if retry_after is not None else self._backoff(attempt)
+            attempt += 1
+            logger.debug(
+                "retrying %s %s in %.3fs (attempt %d)", method, path, delay, attempt
+            )
+            await asyncio.sleep(delay)
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+
+
+def _rejected(exc: Exception) -> bool:
+    """Return whether ``exc`` is a client error response the server did not act on."""
+    if not isinstance(exc, httpx.HTTPStatusError):
+        return False
+    status = exc.response.status_code
+    return 400 <= status < 500 and status not in RETRY_STATUSES
+
+
+def _retry_after(response: Any) -> float | None:
+    try:
+        return max(0.0, float(response.headers["Retry-After"]))
+    except (KeyError, ValueError):
+        return None
+
+
+class Client:
+    """Synchronous client with the methods of :class:`AsyncClient`.
+
+    An :class:`AsyncClient` runs on an event loop in a daemon thread, so one
+    ``Client`` can be shared by many threads and their concurrent calls are
+    batched and share the connection pool. Accepts the same arguments as
+    :class:`AsyncClient`.
+    """
+
+    def __init__(self, url: str, **kwargs: Any) -> None:
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="vectordb-client", daemon=True
+        )
+        self._thread.start()
+
+        async def create() -> AsyncClient:
+            return AsyncClient(url, **kwargs)
+
+        self._client = self._call(create())
+
+    def add(self, text: str) -> dict[str, Any]:
+        return self._call(self._client.add(text))
+
+    def add_many(
+        self, texts: Sequence[str], *, dedupe_threshold: float | None = None
+    ) -> dict[str, Any]:
+        return self._call(
+            self._client.add_many(texts, dedupe_threshold=dedupe_threshold)
+        )
+
+    def search(
+        self, query: str, k: int = 5, *, mode: str = "vector", collapse: bool = False
+    ) -> List[dict[str, Any]]:
+        return self._call(self._client.search(query, k, mode=mode, collapse=collapse))
+
+    def search_many(
+        self,
+        queries: Sequence[str],
+        k: int = 5,
+        *,
+        mode: str = "vector",
+        collapse: bool = False,
+    ) -> List[List[dict[str, Any]]]:
+        return self._call(
+            self._client.search_many(queries, k, mode=mode, collapse=collapse)
+        )
+
+    def search_vector(
+        self, vector: Sequence[float], k: int = 5, *, collapse: bool = False
+    ) -> List[dict[str, Any]]:
+        return self._call(self._client.search_vector(vector, k, collapse=collapse))
+
+    def similar(self, item_id: int, k: int = 5) -> List[dict[str, Any]]:
+        return self._call(self._client.similar(item_id, k))
+
+    def stats(self, *, verbose: bool = False) -> dict[str, Any]:
+        return self._call(self._client.stats(verbose=verbose))
+
+    def flush(self) -> None:
+        self._call(self._client.flush())
+
+    def close(self) -> None:
+        """Send pending batches, close the connections and stop the loop."""
+        if self._loop.is_closed():
+            return
+        self._call(self._client.aclose())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def __enter__(self) -> "Client":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _call(self, coro: Awaitable[T]) -> T:
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
@@ -1,18 +1,191 @@
+from contextlib import contextmanager
 import json
 import logging
+import math
+import os
 from pathlib import Path
-from typing import List
+import sys
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Iterator, List
 
 import hnswlib
-from model2vec import StaticModel
+
+from . import manifest
+from .chunking import chunk_text
+from .rwlock import ReadWriteLock
+from .textstore import BLOCKS_SUFFIX, CODECS as TEXT_CODECS, BlockTextStore, is_header
+
+if TYPE_CHECKING:
+    from .lexical import BM25Index
 
 INDEX_PATH = Path("index.bin")
 DATA_PATH = Path("data.json")
 MODEL_NAME = "cnmoro/Linq-Embed-Mistral-Distilled"
+LEXICAL_SUFFIX = ".bm25"
+DOCS_SUFFIX = ".docs"
+#: Suffix of the file holding full-precision vectors of a quantized index.
+VECTORS_SUFFIX = ".f32"
+#: Suffix of the directory holding the sealed segments of a segmented index.
+SEGMENTS_SUFFIX = ".segments"
+QUANTIZATIONS = ("float16", "int8")
+SEARCH_MODES = ("vector", "hybrid")
+#: Minimum number of candidates taken from each retriever in hybrid search.
+HYBRID_CANDIDATES = 50
+#: Number of texts encoded and inserted per batch.
+ENCODE_BATCH_SIZE = 1024
+#: Number of neighbours fetched by the first query of a range search.
+RANGE_INITIAL_K = 16
+#: Candidates fetched per requested result when diversifying with MMR.
+MMR_OVERSAMPLE = 4
 
 logger = logging.getLogger(__name__)
 
 
+def __getattr__(name: str) -> Any:
+    # ``model2vec`` pulls in heavy dependencies, so it is only imported once
+    # a model is actually needed (or ``vectordb.db.StaticModel`` is accessed).
+    if name == "StaticModel":
+        from model2vec import StaticModel
+
+        globals()["StaticModel"] = StaticModel
+        return StaticModel
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _distances(space: str, vec, matrix):
+    """Return ``hnswlib``'s distances from ``vec`` to the rows of ``matrix``."""
+    import numpy as np
+
+    if space == "l2":
+        return ((matrix - vec) ** 2).sum(axis=1)
+    dots = matrix @ vec
+    if space == "ip":
+        return 1.0 - dots
+    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(vec)
+    return 1.0 - dots / np.maximum(norms, np.finfo(np.float32).tiny)
+
+
+def mmr(query, candidates, k: int, diversity: float) -> List[int]:
+    """Order ``candidates`` by maximal marginal relevance to ``query``.
+
+    Every step picks the candidate maximising
+    ``(1 - diversity) * sim(query, c) - diversity * max(sim(c, s))`` over the
+    already selected ``s``, with cosine similarities taken from one
+    candidate-by-candidate matrix. Returns the row indices of at most ``k``
+    selected candidates.
+    """
+    import numpy as np
+
+    tiny = np.finfo(np.float32).tiny
+    matrix = np.asarray(candidates, dtype=np.float32)
+    matrix = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), tiny)
+    vec = np.asarray(query, dtype=np.float32)
+    relevance = (1.0 - diversity) * (matrix @ (vec / max(np.linalg.norm(vec), tiny)))
+    similarity = matrix @ matrix.T
+    # Highest similarity of every candidate to the selected ones; nothing is
+    # selected before the first pick, so it starts out as pure relevance.
+    redundancy = np.full(len(matrix), -np.inf, dtype=np.float32)
+    available = np.ones(len(matrix), dtype=bool)
+    order: List[int] = []
+    for _ in range(min(k, len(matrix))):
+        penalty = diversity * redundancy if order else 0.0
+        scores = np.where(available, relevance - penalty, -np.inf)
+        best = int(np.argmax(scores))
+        order.append(best)
+        available[best] = False
+        np.maximum(redundancy, similarity[best], out=redundancy)
+    return order
+
+
+def available_cpus() -> int:
+    """Return the number of CPUs this process may use.
+
+    Honours the CPU affinity mask and cgroup (v2 or v1) CPU quotas, so the
+    result is correct inside containers that limit CPU time.
+    """
+
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # pragma: no cover - not available on macOS/Windows
+        cpus = os.cpu_count() or 1
+    quota = _cgroup_cpu_quota()
+    if quota is not None:
+        cpus = min(cpus, max(1, math.ceil(quota)))
+    return cpus
+
+
+def _cgroup_cpu_quota() -> float | None:
+    try:
+        quota, period = Path("/sys/fs/cgroup/cpu.max").read_text().split()[:2]
+        return None if quota == "max" else int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        quota = int(Path("/sys/fs/cgroup/cpu/cpu.cfs_quota_us").read_text())
+        period = int(Path("/sys/fs/cgroup/cpu/cpu.cfs_period_us").read_text())
+    except (OSError, ValueError):
+        return None
+    return quota / period if quota > 0 and period > 0 else None
+
+
+def hnsw_graph_bytes(M: int) -> float:
+    """Return the expected graph overhead of one ``hnswlib`` element.
+
+    Layer 0 stores up to ``2 * M`` neighbour ids plus a count. An element
+    reaches layer ``l`` with probability ``M ** -l``, so it has
+    ``1 / (M - 1)`` upper layers of ``M`` ids plus a count on average. The
+    level number and the pointer to the upper layers add 12 bytes.
+    """
+
+    upper = (4 * M + 4) / (M - 1) if M > 1 else 0.0
+    return 8 * M + 4 + upper + 12
+
+
+def hnsw_memory_bytes(count: int, max_elements: int, dim: int, M: int) -> int:
+    """Estimate the memory of an ``hnswlib`` index holding ``count`` vectors.
+
+    ``hnswlib`` preallocates layer 0, the level table, one lock and a visited
+    marker per element of ``max_elements``; upper layers and the label map
+    grow with ``count``.
+    """
+
+    layer0 = 8 * M + 4 + 4 * dim + 8
+    # layer 0, upper-layer pointer, level, per-element mutex, visited marker
+    preallocated = max_elements * (layer0 + 8 + 4 + 40 + 2)
+    upper = (4 * M + 4) / (M - 1) if M > 1 else 0.0
+    # upper layers and a label map node
+    used = count * (upper + 40)
+    return int(preallocated + used)
+
+
+def process_rss() -> int | None:
+    """Return the resident set size of this process in bytes, if known."""
+
+    try:
+        pages = int(Path("/proc/self/statm").read_text().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:  # pragma: no cover - Windows
+        return None
+    # Peak rather than current RSS; kilobytes on Linux, bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _disk_bytes(*paths: Path) -> int:
+    total = 0
+    for path in paths:
+        if path.is_dir():
+            total += sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+        elif path.exists():
+            total += path.stat().st_size
+    return total
+
+
 class VectorDB:
     def __init__(
         self,
@@ -26,6 +199,13 @@ class VectorDB:
         ef: int = 50,
         space: str = "cosine",
         max_text_length: int = 1000,
+        lexical_index: bool = False,
+        quantization: str | None = None,
+        segmented: bool = False,
+        text_codec: str | None = None,
+        read_only: bool = False,
+        model: Any | None = None,
+        num_threads: int | None = None,
     ) -> None:
         """Create a new ``VectorDB`` instance.
 
@@ -51,6 +231,46 @@ class VectorDB:
         max_text_length:
             Maximum length of text entries to store. Texts exceeding this
             length will raise ``ValueError`` when added.
+        lexical_index:
+            Maintain the BM25 index used by hybrid search on every add and
+            persist it next to ``data_path``. When disabled the index is built
+            in memory on the first hybrid search.
+        quantization:
+            Store vectors in memory as ``"float16"`` or ``"int8"`` codes in a
+            :class:`~vectordb.db.quantized.QuantizedIndex` instead of the
+            ``hnswlib`` graph. Full-precision vectors are kept next to
+            ``index_path`` and memory-mapped to re-rank candidates exactly.
+        segmented:
+            Store vectors in a :class:`~vectordb.db.segments.SegmentedIndex`:
+            new vectors go to a small mutable segment and full segments are
+            sealed into immutable ``hnswlib`` files next to ``index_path``
+            that are merged in the background. Saving then only rewrites the
+            mutable segment instead of the whole graph. Cannot be combined
+            with ``quantization``.
+        text_codec:
+            Persist texts as ``"zlib"`` or ``"lzma"`` compressed blocks in a
+            :class:`~vectordb.db.textstore.BlockTextStore` instead of a JSON
+            list. Full blocks are appended to ``<data_path>.blocks`` once and
+            never rewritten; ``data_path`` only keeps their offsets and the
+            newest texts. Existing JSON data is converted on the next save.
+        read_only:
+            Serve a saved database without ever writing to it, e.g. from
+            query replicas sharing the files of one writer. Nothing is
+            recovered, truncated or merged on load, the ``hnswlib`` graph is
+            allocated for the stored vectors only instead of
+            ``max_elements``, and compressed text blocks and full-precision
+            quantized vectors are memory-mapped so replicas on one host
+            share them through the page cache. Adding texts or saving
+            raises ``PermissionError``. The files must exist.
+        model:
+            :class:`~vectordb.db.embedders.Embedder` to use instead of loading
+            ``model_name`` with ``model2vec``, e.g. to share one copy of the
+            model weights between databases or to encode in several processes
+            with :class:`~vectordb.db.embedders.ProcessPoolEmbedder`.
+        num_threads:
+            Threads used by ``hnswlib`` for bulk inserts and batched queries.
+            Defaults to :func:`available_cpus`. Single queries always run on
+            the calling thread.
         All numeric parameters must be greater than or equal to ``1``.
         """
 
@@ -64,6 +284,14 @@ class VectorDB:
             raise ValueError("M must be >= 1")
         if ef < 1:
             raise ValueError("ef must be >= 1")
+        if num_threads is not None and num_threads < 1:
+            raise ValueError("num_threads must be >= 1")
+        if quantization is not None and quantization not in QUANTIZATIONS:
+            raise ValueError(f"quantization must be one of {', '.join(QUANTIZATIONS)}")
+        if text_codec is not None and text_codec not in TEXT_CODECS:
+            raise ValueError(f"text_codec must be one of {', '.join(TEXT_CODECS)}")
+        if segmented and quantization is not None:
+            raise ValueError("segmented and quantization cannot be combined")
 
         self.index_path = Path(index_path)
         self.data_path = Path(data_path)
@@ -73,6 +301,19 @@ class VectorDB:
         self.ef = ef
         self.space = space
         self.max_text_length = max_text_length
+        self.quantization = quantization
+        self.segmented = segmented
+        self.text_codec = text_codec
+        self.read_only = read_only
+        self.num_threads = num_threads or available_cpus()
+        self.lexical_path = self.data_path.with_name(
+            self.data_path.name + LEXICAL_SUFFIX
+        )
+        self.docs_path = self.data_path.with_name(self.data_path.name + DOCS_SUFFIX)
+        self.blocks_path = self.data_path.with_name(self.data_path.name + BLOCKS_SUFFIX)
+        self.manifest_path = self.data_path.with_name(
+            self.data_path.name + manifest.MANIFEST_SUFFIX
+        )
 
         logger.debug(
             "Initializing VectorDB with index_path=%s data_path=%s",
@@ -80,32 +321,161 @@ class VectorDB:
             self.data_path,
         )
 
-        self.model = StaticModel.from_pretrained(model_name)
-        self.dim = self.model.dim
-        self.index = hnswlib.Index(space=space, dim=self.dim)
-        self.texts: List[str] = []
+        self.model_name = model_name
+        self._model = model
+        self._index: Any | None = None
+        # Serialises writers (inserts and saves) and lazy loading; encoding
+        # runs outside of it.
+        self._lock = threading.RLock()
+        # Searches share ``_rw``; writers hold it exclusively only while they
+        # change the index and texts, so saves do not stall searches. Load
+        # the index before taking it (see ``index``) to avoid a deadlock.
+        self._rw = ReadWriteLock()
+        self.texts: List[str] | BlockTextStore = self._new_texts()
+        # Document id of each stored text, ``None`` for texts added directly.
+        self.doc_ids: List[int | None] = []
+        # Wall-clock duration of the last :meth:`save` of this instance.
+        self.last_save_seconds: float | None = None
+
+        # Version of the files on disk; ``0`` when they predate the manifest.
+        if read_only:
+            # Recovery is left to the writer; checksumming every file would
+            # also slow down the start of each replica.
+            self.version = (manifest.read(self.manifest_path) or {}).get("version", 0)
+            for path in (self.index_path, self.data_path):
+                if not path.exists():
+                    raise FileNotFoundError(f"read-only database has no {path}")
+        else:
+            self.version = manifest.recover(
+                self.manifest_path,
+                {
+                    "index": self.index_path,
+                    "data": self.data_path,
+                    "docs": self.docs_path,
+                },
+            )
+
+        # The model and the index are loaded on first use so commands such as
+        # ``vectordb stats`` only pay for reading the stored texts.
+        if self.index_path.exists() != self.data_path.exists():
+            missing = self.data_path if self.index_path.exists() else self.index_path
+            raise RuntimeError(
+                f"{missing} is missing; restore it from a backup or clear the database"
+            )
+        if self.index_path.exists():
+            try:
+                self.texts = self._load_texts()
+            except Exception as exc:
+                raise RuntimeError(
+                    f"failed to load texts from {self.data_path}: {exc}; restore "
+                    "the files from a backup or clear the database"
+                ) from exc
+        self._load_doc_ids()
+
+        self._lexical: "BM25Index | None" = None
+        # A read-only database builds the BM25 index in memory on the first
+        # hybrid search instead of catching up the file on disk.
+        if lexical_index and not read_only:
+            from .lexical import BM25Index
+
+            self._lexical = BM25Index.open(self.lexical_path, self.texts)
+
+    @property
+    def model(self) -> Any:
+        """:class:`~vectordb.db.embedders.Embedder` in use, loaded on first access."""
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from .embedders import Model2VecEmbedder
+
+                    logger.debug("Loading model %s", self.model_name)
+                    self._model = Model2VecEmbedder(self.model_name)
+        return self._model
+
+    @property
+    def dim(self) -> int:
+        """Dimensionality of the embedding model."""
+        return self.model.dim
+
+    @property
+    def index(self) -> Any:
+        """Vector index, loaded (or created) on first access."""
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._index = self._open_index()
+        return self._index
+
+    def _open_index(self) -> Any:
+        if self.segmented:
+            from .segments import SegmentedIndex
+
+            index = SegmentedIndex(
+                space=self.space,
+                dim=self.dim,
+                directory=self.index_path.with_name(
+                    self.index_path.name + SEGMENTS_SUFFIX
+                ),
+                read_only=self.read_only,
+                num_threads=self.num_threads,
+            )
+        elif self.quantization is None:
+            index = hnswlib.Index(space=self.space, dim=self.dim)
+        else:
+            from .quantized import QuantizedIndex
+
+            index = QuantizedIndex(
+                space=self.space,
+                dim=self.dim,
+                quantization=self.quantization,
+                vectors_path=self.index_path.with_name(
+                    self.index_path.name + VECTORS_SUFFIX
+                ),
+                read_only=self.read_only,
+            )
 
         if self.index_path.exists() and self.data_path.exists():
             logger.debug("Loading existing index from %s", self.index_path)
             try:
-                self.index.load_index(str(self.index_path))
-                self.texts = json.loads(self.data_path.read_text())
-            except Exception as exc:  # pragma: no cover - defensive
-                logger.warning("Failed to load index: %s; recreating", exc)
-                self.index.init_index(
-                    max_elements=max_elements,
-                    ef_construction=ef_construction,
-                    M=M,
-                )
-                self.texts = []
+                if self.read_only and not (self.segmented or self.quantization):
+                    # Without room to grow, hnswlib allocates the saved vectors
+                    # only (it falls back to the saved capacity if there are
+                    # more vectors than texts).
+                    index.load_index(str(self.index_path), max_elements=len(self.texts))
+                else:
+                    index.load_index(str(self.index_path))
+            except Exception as exc:
+                # Starting over would silently drop (and, for quantized
+                # indexes, truncate) the stored vectors.
+                raise RuntimeError(
+                    f"failed to load index from {self.index_path}: {exc}; restore "
+                    "the files from a backup or clear the database"
+                ) from exc
         else:
             logger.debug("Creating new index at %s", self.index_path)
-            self.index.init_index(
-                max_elements=max_elements,
-                ef_construction=ef_construction,
-                M=M,
-            )
-        self.index.set_ef(ef)
+            self._init_index(index)
+        index.set_ef(self.ef)
+        return index
+
+    def _new_texts(self) -> List[str] | BlockTextStore:
+        if self.text_codec is None:
+            return []
+        return BlockTextStore(self.blocks_path, self.text_codec)
+
+    def _load_texts(self) -> List[str] | BlockTextStore:
+        data = json.loads(self.data_path.read_text())
+        if is_header(data):
+            return BlockTextStore.load(data, self.blocks_path, read_only=self.read_only)
+        texts = self._new_texts()
+        texts.extend(data)
+        return texts
+
+    def _init_index(self, index: Any) -> None:
+        index.init_index(
+            max_elements=self.max_elements,
+            ef_construction=self.ef_construction,
+            M=self.M,
+        )
 
     @staticmethod
     def clear(index_path: Path = INDEX_PATH, data_path: Path = DATA_PATH) -> None:
@@ -122,51 +492,345 @@ class VectorDB:
         if Path(index_path).exists():
             logger.info("Deleting index file %s", index_path)
             Path(index_path).unlink()
+        vectors_path = Path(index_path).with_name(
+            Path(index_path).name + VECTORS_SUFFIX
+        )
+        if vectors_path.exists():
+            logger.info("Deleting vector file %s", vectors_path)
+            vectors_path.unlink()
+        segments_dir = Path(index_path).with_name(
+            Path(index_path).name + SEGMENTS_SUFFIX
+        )
+        if segments_dir.is_dir():
+            import shutil
+
+            logger.info("Deleting segment directory %s", segments_dir)
+            shutil.rmtree(segments_dir)
         if Path(data_path).exists():
             logger.info("Deleting data file %s", data_path)
             Path(data_path).unlink()
+        data_name = Path(data_path).name
+        sidecars = [
+            Path(data_path).with_name(data_name + suffix)
+            for suffix in (
+                LEXICAL_SUFFIX,
+                DOCS_SUFFIX,
+                BLOCKS_SUFFIX,
+                manifest.MANIFEST_SUFFIX,
+            )
+        ]
+        # Files of the previous version kept by the manifest.
+        sidecars += [
+            manifest.previous_path(path)
+            for path in (
+                Path(index_path),
+                Path(data_path),
+                Path(data_path).with_name(data_name + DOCS_SUFFIX),
+            )
+        ]
+        for sidecar in sidecars:
+            if sidecar.exists():
+                logger.info("Deleting %s", sidecar)
+                sidecar.unlink()
 
     def save(self) -> None:
-        """Persist the current index and texts to disk atomically."""
-        logger.debug("Saving index to %s and data to %s", self.index_path, self.data_path)
-        self.index_path.parent.mkdir(parents=True, exist_ok=True)
-        self.data_path.parent.mkdir(parents=True, exist_ok=True)
+        """Persist the current index and texts to disk atomically.
 
-        import os
-        import tempfile
+        All files are committed together as a new version of the manifest
+        (see :mod:`vectordb.db.manifest`), so an interrupted save never leaves
+        an index and texts that do not belong together.
+        """
 
-        with tempfile.NamedTemporaryFile(dir=self.index_path.parent, delete=False) as tmp:
-            tmp_path = Path(tmp.name)
-        self.index.save_index(str(tmp_path))
-        os.replace(tmp_path, self.index_path)
+        self._check_writable()
+        # Searches keep running; only other writers wait.
+        with self._lock:
+            logger.debug(
+                "Saving index to %s and data to %s", self.index_path, self.data_path
+            )
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            self.data_path.parent.mkdir(parents=True, exist_ok=True)
 
-        with tempfile.NamedTemporaryFile("w", dir=self.data_path.parent, delete=False) as tmp:
-            json.dump(self.texts, tmp)
-            tmp_path = Path(tmp.name)
-        os.replace(tmp_path, self.data_path)
+            import tempfile
+
+            started = time.perf_counter()
+            staged: dict[str, tuple[Path, Path]] = {}
+            try:
+                with tempfile.NamedTemporaryFile(
+                    dir=self.index_path.parent, delete=False
+                ) as tmp:
+                    staged["index"] = (Path(tmp.name), self.index_path)
+                self.index.save_index(tmp.name)
+
+                with tempfile.NamedTemporaryFile(
+                    "w", dir=self.data_path.parent, delete=False
+                ) as tmp:
+                    staged["data"] = (Path(tmp.name), self.data_path)
+                    if not isinstance(self.texts, BlockTextStore):
+                        json.dump(self.texts, tmp)
+                if isinstance(self.texts, BlockTextStore):
+                    # Writing moves texts from the tail into blocks.
+                    with self._rw.write():
+                        self.texts.write(Path(tmp.name))
+
+                if any(doc_id is not None for doc_id in self.doc_ids):
+                    with tempfile.NamedTemporaryFile(
+                        "w", dir=self.docs_path.parent, delete=False
+                    ) as tmp:
+                        staged["docs"] = (Path(tmp.name), self.docs_path)
+                        json.dump(self.doc_ids, tmp)
+
+                count = len(self.texts)
+                self.version = manifest.commit(
+                    self.manifest_path,
+                    staged,
+                    {name: count for name in staged},
+                )
+                self.last_save_seconds = time.perf_counter() - started
+            finally:
+                for tmp_path, _ in staged.values():
+                    tmp_path.unlink(missing_ok=True)
+
+    def _load_doc_ids(self) -> None:
+        doc_ids: List[int | None] = []
+        if self.texts and self.docs_path.exists():
+            try:
+                doc_ids = json.loads(self.docs_path.read_text())
+            except ValueError as exc:
+                logger.warning("Failed to load document mapping: %s", exc)
+        # Texts saved without a mapping entry are standalone.
+        doc_ids = doc_ids[: len(self.texts)]
+        self.doc_ids = doc_ids + [None] * (len(self.texts) - len(doc_ids))
+        self._next_doc_id = max((d for d in doc_ids if d is not None), default=-1) + 1
 
     def add_text(self, text: str) -> None:
         self.add_texts([text])
 
-    def add_texts(self, texts: List[str]) -> None:
+    def add_texts(
+        self, texts: List[str], *, dedupe_threshold: float | None = None
+    ) -> List[dict[str, float | int]]:
+        """Store ``texts`` and return the near-duplicates that were skipped.
+
+        Parameters
+        ----------
+        texts:
+            Texts to encode and store.
+        dedupe_threshold:
+            Skip texts whose vector lies within this distance of a stored
+            text or of an earlier text in the same call. Each skipped text is
+            reported as ``{"index": <position in texts>, "id": <id of the
+            matching item>, "distance": <distance>}``. ``None`` stores every
+            text.
+        """
+
         logger.info("Adding %d texts", len(texts))
-        if len(self.texts) + len(texts) > self.max_elements:
+        return self._insert(
+            texts, [None] * len(texts), dedupe_threshold=dedupe_threshold
+        )[0]
+
+    def add_vectors(
+        self, vecs, texts: List[str], *, dedupe_threshold: float | None = None
+    ) -> List[dict[str, float | int]]:
+        """Store ``texts`` under precomputed embeddings ``vecs``.
+
+        ``vecs`` must be a ``(len(texts), dim)`` array-like produced by the
+        same model as :attr:`model`; the texts are not encoded again.
+        ``dedupe_threshold`` behaves as in :meth:`add_texts`.
+        """
+
+        logger.info("Adding %d texts with vectors", len(texts))
+        matrix = self._as_vectors(vecs)
+        if len(matrix) != len(texts):
+            raise ValueError(f"got {len(matrix)} vectors for {len(texts)} texts")
+        return self._insert(
+            texts, [None] * len(texts), matrix, dedupe_threshold=dedupe_threshold
+        )[0]
+
+    def add_documents(
+        self, docs: List[str], chunk_size: int | None = None, overlap: int = 0
+    ) -> List[int]:
+        """Split ``docs`` into chunks, store them and return the document ids.
+
+        Parameters
+        ----------
+        docs:
+            Documents of any length.
+        chunk_size:
+            Maximum chunk length in characters. Defaults to and may not
+            exceed ``max_text_length``.
+        overlap:
+            Number of characters shared by consecutive chunks.
+        """
+
+        self._check_writable()
+        chunk_size = self.max_text_length if chunk_size is None else chunk_size
+        if chunk_size > self.max_text_length:
             raise ValueError(
-                f"adding {len(texts)} texts exceeds max_elements={self.max_elements}"
+                f"chunk_size {chunk_size} exceeds max_text_length={self.max_text_length}"
             )
+        chunks: List[str] = []
+        owners: List[int | None] = []
+        for offset, doc in enumerate(docs):
+            pieces = chunk_text(doc, chunk_size, overlap)
+            if not pieces:
+                raise ValueError("documents must contain non-whitespace text")
+            chunks.extend(pieces)
+            owners.extend([offset] * len(pieces))
+        logger.info("Adding %d documents as %d chunks", len(docs), len(chunks))
+        _, first = self._insert(chunks, owners, documents=len(docs))
+        return list(range(first, first + len(docs)))
+
+    def _insert(
+        self,
+        texts: List[str],
+        doc_ids: List[int | None],
+        vecs: Any | None = None,
+        *,
+        dedupe_threshold: float | None = None,
+        documents: int = 0,
+    ) -> tuple[List[dict[str, float | int]], int]:
+        """Store ``texts`` and return the skipped duplicates and first document id.
+
+        With ``documents`` the entries of ``doc_ids`` are offsets of the
+        document each text belongs to. Ids for the documents are assigned
+        only once every check has passed, so failed calls leave no gaps.
+        """
+        self._check_writable()
         for t in texts:
             if len(t) > self.max_text_length:
                 raise ValueError(
                     f"text length {len(t)} exceeds max_text_length={self.max_text_length}"
                 )
-        vecs = self.model.encode(texts)
-        start = len(self.texts)
-        ids = list(range(start, start + len(texts)))
-        self.index.add_items(vecs, ids)
-        self.texts.extend(texts)
-        self.save()
-
-    def search(self, query: str, k: int = 5) -> List[dict[str, float | str]]:
+        if dedupe_threshold is not None and dedupe_threshold < 0:
+            raise ValueError("dedupe_threshold must be >= 0")
+        if dedupe_threshold is None:
+            self._check_capacity(len(texts))
+        batches = [
+            (
+                self.model.encode(texts[start : start + ENCODE_BATCH_SIZE])
+                if vecs is None
+                else vecs[start : start + ENCODE_BATCH_SIZE]
+            )
+            for start in range(0, len(texts), ENCODE_BATCH_SIZE)
+        ]
+        duplicates: List[dict[str, float | int]] = []
+        with self._lock:
+            if dedupe_threshold is not None and texts:
+                import numpy as np
+
+                matrix = np.concatenate(
+                    [np.asarray(batch, dtype=np.float32) for batch in batches]
+                )
+                duplicates = self._duplicates(matrix, dedupe_threshold)
+                if duplicates:
+                    logger.info("Skipping %d near-duplicate texts", len(duplicates))
+                    skipped = {dup["index"] for dup in duplicates}
+                    keep = [i for i in range(len(texts)) if i not in skipped]
+                    texts = [texts[i] for i in keep]
+                    doc_ids = [doc_ids[i] for i in keep]
+                    matrix = matrix[keep]
+                batches = [
+                    matrix[start : start + ENCODE_BATCH_SIZE]
+                    for start in range(0, len(texts), ENCODE_BATCH_SIZE)
+                ]
+            first_doc = self._next_doc_id
+            if not texts:
+                return duplicates, first_doc
+            self._check_capacity(len(texts))
+            if documents:
+                self._next_doc_id += documents
+                doc_ids = [first_doc + offset for offset in doc_ids]
+            index = self.index
+            with self._rw.write():
+                for start, vecs in zip(
+                    range(0, len(texts), ENCODE_BATCH_SIZE), batches
+                ):
+                    batch = texts[start : start + ENCODE_BATCH_SIZE]
+                    first = len(self.texts)
+                    index.add_items(
+                        vecs,
+                        list(range(first, first + len(batch))),
+                        num_threads=self.num_threads,
+                    )
+                    self.texts.extend(batch)
+                    self.doc_ids.extend(doc_ids[start : start + ENCODE_BATCH_SIZE])
+                # Together with the texts, so a hybrid search building the
+                # lexical index lazily never sees (and then re-adds) them.
+                if self._lexical is not None:
+                    self._lexical.add(texts)
+            self.save()
+        return duplicates, first_doc
+
+    def _duplicates(self, matrix, threshold: float) -> List[dict[str, float | int]]:
+        """Find rows of ``matrix`` within ``threshold`` of an earlier item.
+
+        Rows are compared with the stored items through one batched
+        ``knn_query(k=1)`` and with the preceding rows that will be kept.
+        Matches against kept rows use the id those rows are about to get.
+        """
+
+        import numpy as np
+
+        duplicates: List[dict[str, float | int]] = []
+        matches: dict[int, tuple[int, float]] = {}
+        first = len(self.texts)
+        if first:
+            labels, distances = self.index.knn_query(
+                matrix, k=1, num_threads=self.num_threads
+            )
+            for row, (label, dist) in enumerate(zip(labels, distances)):
+                if float(dist[0]) <= threshold:
+                    matches[row] = (int(label[0]), float(dist[0]))
+        kept: List[int] = []
+        for row in range(len(matrix)):
+            if row not in matches and kept:
+                dists = _distances(self.space, matrix[row], matrix[kept])
+                best = int(np.argmin(dists))
+                if dists[best] <= threshold:
+                    matches[row] = (first + best, float(dists[best]))
+            if row in matches:
+                label, dist = matches[row]
+                duplicates.append({"index": row, "id": label, "distance": dist})
+            else:
+                kept.append(row)
+        return duplicates
+
+    def _as_vectors(self, vecs) -> Any:
+        """Return ``vecs`` as a float32 matrix after checking its dimension."""
+        import numpy as np
+
+        matrix = np.asarray(vecs, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix[None, :]
+        if matrix.ndim != 2 or matrix.shape[1] != self.dim:
+            raise ValueError(
+                f"vectors must have dimension {self.dim}, got shape {matrix.shape}"
+            )
+        if not np.isfinite(matrix).all():
+            raise ValueError("vectors must only contain finite values")
+        return matrix
+
+    def _check_writable(self) -> None:
+        if self.read_only:
+            raise PermissionError("database was opened read-only")
+
+    def _check_capacity(self, n: int) -> None:
+        if len(self.texts) + n > self.max_elements:
+            raise ValueError(
+                f"adding {n} texts exceeds max_elements={self.max_elements}"
+            )
+
+    def search(
+        self,
+        query: str,
+        k: int = 5,
+        *,
+        mode: str = "vector",
+        collapse: bool = False,
+        vector: Any | None = None,
+        diversity: float | None = None,
+        rerank: bool = False,
+        oversample: int = 4,
+    ) -> List[dict[str, float | int | str]]:
         """Return the ``k`` nearest texts to ``query``.
 
         Parameters
@@ -176,21 +840,394 @@ class VectorDB:
         k:
             Number of results to return. Must be between 1 and the number of
             stored texts.
+        mode:
+            ``"vector"`` returns the nearest neighbours with their distance.
+            ``"hybrid"`` fuses the vector and BM25 rankings with
+            reciprocal-rank fusion and returns each text with its fused score.
+        collapse:
+            Return only the best chunk of each document added with
+            :meth:`add_documents`. Fewer than ``k`` results are returned when
+            there are not enough distinct documents.
+        vector:
+            Embedding of ``query`` from :meth:`encode_query`. Passing it skips
+            encoding, e.g. when fetching further pages of the same query.
+        diversity:
+            Re-rank with maximal marginal relevance (see :func:`mmr`) using
+            ``λ = diversity`` between ``0`` (pure relevance) and ``1``.
+            :data:`MMR_OVERSAMPLE` times ``k`` candidates are fetched and
+            their vectors read back with ``get_items``; results keep their
+            original distance or score.
+        rerank:
+            Fetch ``k * oversample`` candidates from the index and return the
+            best ``k``. The index already returns exact distances, so this
+            only widens the candidate list: it raises recall for this query
+            like a higher ``ef`` would, without changing ``ef`` for every
+            other search. Only for ``mode="vector"``.
+        oversample:
+            Candidates fetched per result when ``rerank`` is set.
+        """
+
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"mode must be one of {', '.join(SEARCH_MODES)}")
+        if k < 1:
+            raise ValueError("k must be >= 1")
+        if k > len(self.texts):
+            raise ValueError("k exceeds number of stored texts")
+        if diversity is not None and not 0 <= diversity <= 1:
+            raise ValueError("diversity must be between 0 and 1")
+        if rerank and mode != "vector":
+            raise ValueError("rerank requires mode='vector'")
+        if oversample < 1:
+            raise ValueError("oversample must be >= 1")
+
+        logger.debug("Searching for '%s' with k=%d mode=%s", query, k, mode)
+        vec = self.encode_query(query) if vector is None else vector
+        with self._searching():
+            return self._search_vector(
+                query,
+                vec,
+                k,
+                mode,
+                collapse,
+                diversity,
+                oversample if rerank else None,
+            )
+
+    @contextmanager
+    def _searching(self) -> Iterator[Any]:
+        """Hold ``_rw`` shared and yield the index, loaded beforehand."""
+        index = self.index
+        with self._rw.read():
+            yield index
+
+    def encode_query(self, query: str) -> Any:
+        """Return the embedding of ``query``."""
+        return self.model.encode([query])[0]
+
+    def search_range(
+        self, query: str, max_distance: float, limit: int | None = None
+    ) -> List[dict[str, float | int | str]]:
+        """Return the stored texts within ``max_distance`` of ``query``.
+
+        The number of neighbours fetched from the index starts at
+        :data:`RANGE_INITIAL_K` (or ``limit``) and grows four-fold until a
+        neighbour lies beyond ``max_distance``, so the cost follows the size
+        of the result rather than of the database. Results are ordered by
+        distance; at most ``limit`` are returned when it is given.
+        """
+
+        if max_distance < 0:
+            raise ValueError("max_distance must be >= 0")
+        if limit is not None and limit < 1:
+            raise ValueError("limit must be >= 1")
+
+        logger.debug("Range search for '%s' within %s", query, max_distance)
+        vec = self.encode_query(query)
+        with self._searching():
+            n = len(self.texts)
+            depth = min(n, limit or RANGE_INITIAL_K)
+            hits: List[tuple[int, float]] = []
+            while depth:
+                labels, distances = self.index.knn_query([vec], k=depth)
+                hits = [
+                    (int(label), float(dist))
+                    for label, dist in zip(labels[0], distances[0])
+                    if dist <= max_distance
+                ]
+                complete = len(hits) < depth or depth == n
+                if complete or (limit is not None and len(hits) >= limit):
+                    break
+                depth = min(n, depth * 4)
+            return [
+                self._result(label, "distance", dist) for label, dist in hits[:limit]
+            ]
+
+    def search_vector(
+        self, vec, k: int = 5, *, collapse: bool = False
+    ) -> List[dict[str, float | int | str]]:
+        """Return the ``k`` nearest texts to the embedding ``vec``.
+
+        Behaves like :meth:`search` in ``"vector"`` mode but skips encoding.
+        ``vec`` must have :attr:`dim` entries.
         """
 
         if k < 1:
             raise ValueError("k must be >= 1")
         if k > len(self.texts):
             raise ValueError("k exceeds number of stored texts")
+        query = self._as_vectors(vec)
+        if len(query) != 1:
+            raise ValueError("expected a single query vector")
+        with self._searching():
+            return self._search_vector("", query[0], k, "vector", collapse)
 
-        logger.debug("Searching for '%s' with k=%d", query, k)
-        vec = self.model.encode([query])[0]
-        labels, distances = self.index.knn_query([vec], k=k)
-        results = []
-        for label, dist in zip(labels[0], distances[0]):
-            results.append({"text": self.texts[label], "distance": float(dist)})
-        return results
+    def similar(self, item_id: int, k: int = 5) -> List[dict[str, float | int | str]]:
+        """Return the ``k`` stored texts nearest to stored item ``item_id``.
+
+        The item's vector is read back from the index, so nothing is encoded.
+        The item itself is excluded from the results. Raises ``KeyError`` for
+        unknown ids.
+        """
+
+        if k < 1:
+            raise ValueError("k must be >= 1")
+        with self._searching():
+            if not 0 <= item_id < len(self.texts):
+                raise KeyError(item_id)
+            if k >= len(self.texts):
+                raise ValueError("k exceeds number of other stored texts")
+            vec = self.index.get_items([item_id])[0]
+            labels, distances = self.index.knn_query([vec], k=k + 1)
+            hits = [
+                (int(label), float(dist))
+                for label, dist in zip(labels[0], distances[0])
+                if int(label) != item_id
+            ]
+            return [self._result(label, "distance", dist) for label, dist in hits[:k]]
+
+    def search_batch(
+        self,
+        queries: List[str],
+        k: int = 5,
+        *,
+        mode: str = "vector",
+        collapse: bool = False,
+    ) -> List[List[dict[str, float | int | str]]]:
+        """Run :meth:`search` for every query, encoding them in one batch.
+
+        Plain vector searches are answered with a single ``knn_query`` call.
+        """
+
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"mode must be one of {', '.join(SEARCH_MODES)}")
+        if k < 1:
+            raise ValueError("k must be >= 1")
+        if k > len(self.texts):
+            raise ValueError("k exceeds number of stored texts")
+        if not queries:
+            return []
+
+        logger.debug(
+            "Searching for %d queries with k=%d mode=%s", len(queries), k, mode
+        )
+        vecs = self.model.encode(queries)
+        with self._searching():
+            if mode == "vector" and not collapse:
+                labels, distances = self.index.knn_query(
+                    vecs, k=k, num_threads=self.num_threads
+                )
+                return [
+                    [
+                        self._result(int(label), "distance", float(dist))
+                        for label, dist in zip(row_labels, row_distances)
+                    ]
+                    for row_labels, row_distances in zip(labels, distances)
+                ]
+            return [
+                self._search_vector(query, vec, k, mode, collapse)
+                for query, vec in zip(queries, vecs)
+            ]
+
+    def _result(
+        self, label: int, key: str, value: float
+    ) -> dict[str, float | int | str]:
+        result: dict[str, float | int | str] = {
+            "id": label,
+            "text": self.texts[label],
+            key: value,
+        }
+        if self.doc_ids[label] is not None:
+            result["document"] = self.doc_ids[label]
+        return result
+
+    def _search_vector(
+        self,
+        query: str,
+        vec,
+        k: int,
+        mode: str,
+        collapse: bool,
+        diversity: float | None = None,
+        rerank: int | None = None,
+    ) -> List[dict[str, float | int | str]]:
+        key = "score" if mode == "hybrid" else "distance"
+        wanted = k if diversity is None else k * MMR_OVERSAMPLE
+        if rerank is not None:
+            wanted = max(wanted, k * rerank)
+        wanted = min(len(self.texts), wanted)
+        depth = wanted
+        while True:
+            if mode == "hybrid":
+                hits = self._hybrid_hits(query, vec, depth)
+            else:
+                labels, distances = self.index.knn_query([vec], k=depth)
+                hits = [(int(i), float(d)) for i, d in zip(labels[0], distances[0])]
+            if not collapse:
+                break
+            hits = self._collapse(hits)
+            if len(hits) >= wanted or depth == len(self.texts):
+                break
+            depth = min(len(self.texts), depth * 4)
+
+        if diversity is not None and hits:
+            vectors = self.index.get_items([label for label, _ in hits])
+            hits = [hits[i] for i in mmr(vec, vectors, k, diversity)]
+        return [self._result(label, key, value) for label, value in hits[:k]]
+
+    def _hybrid_hits(self, query: str, vec, k: int) -> List[tuple[int, float]]:
+        from .lexical import BM25Index, reciprocal_rank_fusion
+
+        if self._lexical is None:
+            logger.info(
+                "Building in-memory lexical index for %d texts", len(self.texts)
+            )
+            self._lexical = BM25Index.open(None, self.texts)
+        depth = min(len(self.texts), max(k, HYBRID_CANDIDATES))
+        labels, _ = self.index.knn_query([vec], k=depth)
+        lexical = [doc_id for doc_id, _ in self._lexical.search(query, depth)]
+        return reciprocal_rank_fusion([[int(i) for i in labels[0]], lexical])[:k]
+
+    def _collapse(self, hits: List[tuple[int, float]]) -> List[tuple[int, float]]:
+        """Keep the first (best ranked) hit of every document."""
+        seen: set[int] = set()
+        kept = []
+        for label, value in hits:
+            doc_id = self.doc_ids[label]
+            if doc_id is not None:
+                if doc_id in seen:
+                    continue
+                seen.add(doc_id)
+            kept.append((label, value))
+        return kept
+
+    def warmup(self, rounds: int = 3) -> dict[str, float]:
+        """Load and exercise the model and index before serving traffic.
+
+        Loads the model and the index, prefetches memory-mapped index data,
+        then runs ``rounds`` synthetic encodes and nearest neighbour queries
+        so the first real requests do not hit cold pages and code paths.
+        Returns the duration of every phase in seconds.
+        """
+
+        timings: dict[str, float] = {}
+
+        def timed(phase: str, fn) -> Any:
+            start = time.perf_counter()
+            result = fn()
+            timings[phase] = time.perf_counter() - start
+            return result
+
+        timed("model", lambda: self.model)
+        index = timed("index", lambda: self.index)
+        timed("prefetch", getattr(index, "prefetch", lambda: None))
+        probes = [f"warmup query {i}" for i in range(max(rounds, 1))]
+        vecs = timed("encode", lambda: [self.model.encode([p])[0] for p in probes])
+
+        def search() -> None:
+            with self._rw.read():
+                k = min(10, len(self.texts))
+                if k:
+                    for vec in vecs:
+                        index.knn_query([vec], k=k)
+
+        timed("search", search)
+        logger.info(
+            "Warmup finished: %s",
+            ", ".join(
+                f"{phase}={secs * 1000:.1f}ms" for phase, secs in timings.items()
+            ),
+        )
+        return timings
+
+    def close(self) -> None:
+        """Stop background work of the index, such as segment merges.
+
+        Call this before dropping a database that is no longer used so
+        its index can be freed. The instance must not be used afterwards.
+        """
+        with self._lock:
+            index = self._index
+        close = getattr(index, "close", None)
+        if close is not None:
+            close()
 
     def count(self) -> int:
         """Return the number of stored texts."""
         return len(self.texts)
+
+    def stats(self) -> dict[str, Any]:
+        """Return memory, disk and capacity figures for sizing and planning.
+
+        Loads the index (and therefore the model) if it is not loaded yet.
+        Index memory is estimated from the ``hnswlib`` layout (see
+        :func:`hnsw_memory_bytes`) or, for quantized and segmented indexes,
+        taken from the arrays they hold. ``tombstones`` counts vectors in
+        the index that no stored text refers to.
+        """
+
+        index = self.index
+        with self._rw.read():
+            count = len(self.texts)
+            used = index.get_current_count()
+            # A read-only index is loaded with the capacity it was saved with
+            # (just the stored vectors for ``hnswlib``), not ``max_elements``.
+            max_elements = self.max_elements
+            if self.read_only:
+                max_elements = index.get_max_elements()
+            memory = getattr(index, "memory_bytes", None)
+            if memory is not None:
+                index_memory = memory()
+            else:
+                index_memory = hnsw_memory_bytes(used, max_elements, self.dim, self.M)
+            if isinstance(self.texts, BlockTextStore):
+                text_memory = self.texts.memory_bytes()
+            else:
+                text_memory = sys.getsizeof(self.texts) + sum(
+                    sys.getsizeof(text) for text in self.texts
+                )
+        if self.segmented:
+            kind = "segmented"
+        elif self.quantization is not None:
+            kind = f"quantized-{self.quantization}"
+        else:
+            kind = "hnsw"
+        return {
+            "count": count,
+            "capacity": {
+                "max_elements": max_elements,
+                "used": used,
+                "free": max(0, max_elements - used),
+                "fill_ratio": used / max_elements if max_elements else 1.0,
+            },
+            "index": {
+                "type": kind,
+                "M": self.M,
+                "dim": self.dim,
+                "memory_bytes": index_memory,
+                "disk_bytes": _disk_bytes(
+                    self.index_path,
+                    self.index_path.with_name(self.index_path.name + VECTORS_SUFFIX),
+                    self.index_path.with_name(self.index_path.name + SEGMENTS_SUFFIX),
+                ),
+                "graph_bytes_per_element": (
+                    0.0 if self.quantization is not None else hnsw_graph_bytes(self.M)
+                ),
+                "tombstones": max(0, used - count),
+            },
+            "texts": {
+                "memory_bytes": text_memory,
+                "disk_bytes": _disk_bytes(
+                    self.data_path, self.blocks_path, self.docs_path, self.lexical_path
+                ),
+            },
+            "model": {
+                "name": getattr(self.model, "name", self.model_name),
+                "memory_bytes": getattr(self.model, "nbytes", None),
+            },
+            "process": {"rss_bytes": process_rss()},
+            "save": {
+                "version": self.version,
+                "last_duration_seconds": self.last_save_seconds,
+                "read_only": self.read_only,
+            },
+        }
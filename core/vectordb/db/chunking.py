@@ -0,0 +1,42 @@
+"""Split long documents into overlapping chunks."""
+
+from typing import List
+
+
+def chunk_text(text: str, chunk_size: int, overlap: int = 0) -> List[str]:
+    """Split ``text`` into chunks of at most ``chunk_size`` characters.
+
+    Consecutive chunks share up to ``overlap`` characters. Chunks end at the
+    last whitespace inside the window when there is one past the overlap, so
+    words are not cut in half unless a single word exceeds ``chunk_size``;
+    likewise the overlap starts at a word boundary when one is available.
+    Leading and trailing whitespace is stripped and empty chunks are dropped.
+    """
+
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be >= 1")
+    if not 0 <= overlap < chunk_size:
+        raise ValueError("overlap must be >= 0 and smaller than chunk_size")
+
+    chunks: List[str] = []
+    start = 0
+    while start < len(text):
+        end = min(start + chunk_size, len(text))
+        if end < len(text):
+            for cut in range(end, start + overlap, -1):
+                if text[cut].isspace():
+                    end = cut
+                    break
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end >= len(text):
+            break
+        nxt = end - overlap
+        if overlap and not text[nxt - 1].isspace():
+            for boundary in range(nxt, end + 1):
+                if text[boundary].isspace():
+                    nxt = boundary + 1
+                    break
+        start = max(nxt, start + 1)
+    return chunks
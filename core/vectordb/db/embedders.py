@@ -0,0 +1,181 @@
+"""Text encoders used by :class:`~vectordb.db.VectorDB`.
+
+Any object implementing :class:`Embedder` can be passed as ``model`` to
+:class:`~vectordb.db.VectorDB`. :class:`Model2VecEmbedder` is the default,
+:class:`HashingEmbedder` needs no model download and :class:`ProcessPoolEmbedder`
+spreads large batches of another embedder over several processes.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import functools
+import hashlib
+import multiprocessing
+from typing import Callable, Protocol, Sequence, runtime_checkable
+
+import numpy as np
+
+from .lexical import tokenize
+
+
+@runtime_checkable
+class Embedder(Protocol):
+    """Encoder turning texts into vectors of a fixed dimension."""
+
+    #: Name identifying the model, e.g. in logs.
+    name: str
+    #: Number of components of every vector.
+    dim: int
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """Return a ``(len(texts), dim)`` float32 array."""
+        ...
+
+
+class Model2VecEmbedder:
+    """Embedder backed by a ``model2vec`` static model.
+
+    Parameters
+    ----------
+    model_name:
+        Name or path passed to ``StaticModel.from_pretrained``.
+    """
+
+    def __init__(self, model_name: str) -> None:
+        # ``model2vec`` is slow to import and only needed by this embedder.
+        from model2vec import StaticModel
+
+        self.name = model_name
+        self.model = StaticModel.from_pretrained(model_name)
+        self.dim = self.model.dim
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        return np.asarray(self.model.encode(list(texts)), dtype=np.float32)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the arrays of the model, mostly the embedding table."""
+        return sum(
+            value.nbytes
+            for value in vars(self.model).values()
+            if isinstance(value, np.ndarray)
+        )
+
+
+class HashingEmbedder:
+    """Deterministic bag-of-words embedder based on feature hashing.
+
+    Every token is hashed to a component and a sign, and the resulting
+    vectors are L2-normalised. Texts sharing words are therefore close, which
+    is enough for benchmarks and tests that must not download a model.
+
+    Parameters
+    ----------
+    dim:
+        Number of components of every vector.
+    """
+
+    def __init__(self, dim: int = 256) -> None:
+        if dim < 1:
+            raise ValueError("dim must be >= 1")
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+        self.nbytes = 0
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        vecs = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in tokenize(text):
+                digest = hashlib.blake2b(token.encode(), digest_size=8).digest()
+                value = int.from_bytes(digest, "little")
+                vecs[row, (value >> 1) % self.dim] += 1.0 if value & 1 else -1.0
+        norms = np.linalg.norm(vecs, axis=1, keepdims=True)
+        return vecs / np.maximum(norms, np.finfo(np.float32).tiny)
+
+
+# State of the embedder hosted by a pool worker process.
+_worker_embedder: Embedder | None = None
+
+
+def _init_worker(factory: Callable[[], Embedder]) -> None:
+    global _worker_embedder
+    _worker_embedder = factory()
+
+
+def _worker_info() -> tuple[str, int]:
+    assert _worker_embedder is not None
+    return _worker_embedder.name, _worker_embedder.dim
+
+
+def _worker_encode(texts: Sequence[str]) -> np.ndarray:
+    assert _worker_embedder is not None
+    return np.asarray(_worker_embedder.encode(texts), dtype=np.float32)
+
+
+class ProcessPoolEmbedder:
+    """Encode large batches in parallel worker processes.
+
+    Each worker builds its own embedder by calling ``factory``, so ``factory``
+    must be picklable, e.g. ``functools.partial(Model2VecEmbedder, name)``.
+    Batches of at most ``min_chunk`` texts go to a single worker; larger ones
+    are split evenly across all workers.
+
+    Parameters
+    ----------
+    factory:
+        Callable returning the embedder hosted by every worker.
+    workers:
+        Number of worker processes. Defaults to the number of usable CPUs.
+    min_chunk:
+        Smallest number of texts sent to one worker.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], Embedder],
+        workers: int | None = None,
+        *,
+        min_chunk: int = 64,
+    ) -> None:
+        if workers is None:
+            from . import available_cpus
+
+            workers = available_cpus()
+        if workers < 1:
+            raise ValueError("workers must be >= 1")
+        if min_chunk < 1:
+            raise ValueError("min_chunk must be >= 1")
+        self.workers = workers
+        self.min_chunk = min_chunk
+        # Workers are spawned rather than forked so they do not inherit the
+        # threads and locks of a running server.
+        self._pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(factory,),
+        )
+        name, self.dim = self._pool.submit(_worker_info).result()
+        self.name = f"{name} x{workers}"
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        size = max(self.min_chunk, -(-len(texts) // self.workers))
+        chunks = [texts[start : start + size] for start in range(0, len(texts), size)]
+        return np.concatenate(list(self._pool.map(_worker_encode, chunks)))
+
+    def close(self) -> None:
+        """Stop the worker processes."""
+        self._pool.shutdown(wait=True)
+
+    def __enter__(self) -> "ProcessPoolEmbedder":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def model2vec_factory(model_name: str) -> Callable[[], Embedder]:
+    """Return a picklable factory for :class:`Model2VecEmbedder`."""
+    return functools.partial(Model2VecEmbedder, model_name)
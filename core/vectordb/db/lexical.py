@@ -0,0 +1,147 @@
+"""Incremental BM25 inverted index used for hybrid search."""
+
+from array import array
+from collections import Counter
+import json
+import logging
+from pathlib import Path
+import re
+from typing import Iterable, List, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r"\w+")
+
+#: Constant used by reciprocal-rank fusion to dampen the weight of top ranks.
+RRF_K = 60
+
+
+def tokenize(text: str) -> List[str]:
+    """Split ``text`` into lowercase word tokens."""
+    return TOKEN_RE.findall(text.lower())
+
+
+def reciprocal_rank_fusion(
+    rankings: Iterable[Sequence[int]], k: int = RRF_K
+) -> List[tuple[int, float]]:
+    """Fuse several ranked id lists into one list of ``(id, score)`` pairs.
+
+    Each id receives ``1 / (k + rank)`` for every list it appears in, with
+    ranks starting at ``1``. The result is sorted by descending score.
+    """
+
+    scores: dict[int, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class BM25Index:
+    """Append-only BM25 index with compact posting arrays.
+
+    Every term maps to two ``array('I')`` postings holding document ids and
+    term frequencies. Documents are identified by their position in
+    :attr:`VectorDB.texts`, so ids are dense and only ever appended.
+
+    When ``path`` is given each added document is appended to that file as a
+    single JSON line of term frequencies. Existing lines are never rewritten,
+    and loading replays them without re-tokenising the stored texts.
+    """
+
+    def __init__(
+        self, path: Path | None = None, *, k1: float = 1.2, b: float = 0.75
+    ) -> None:
+        self.path = Path(path) if path is not None else None
+        self.k1 = k1
+        self.b = b
+        self._postings: dict[str, tuple[array, array]] = {}
+        self._doc_len = array("I")
+        self._total_len = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_len)
+
+    @classmethod
+    def open(cls, path: Path | None, texts: Sequence[str]) -> "BM25Index":
+        """Load the index for ``texts`` from ``path`` and catch up if needed.
+
+        Lines beyond ``len(texts)`` (left behind by an interrupted save) are
+        dropped and texts without a line are tokenised and appended.
+        """
+
+        index = cls(path)
+        records: list[dict[str, int]] = []
+        rewrite = False
+        if index.path is not None and index.path.exists():
+            try:
+                with index.path.open() as fh:
+                    for line in fh:
+                        if len(records) == len(texts):
+                            rewrite = True
+                            break
+                        records.append(json.loads(line))
+            except (OSError, ValueError) as exc:
+                logger.warning("Failed to load lexical index: %s; rebuilding", exc)
+                records = []
+                rewrite = True
+        for freqs in records:
+            index._index(freqs)
+        if rewrite:
+            index._rewrite(records)
+        if len(records) < len(texts):
+            index.add(texts[len(records) :])
+        return index
+
+    def add(self, texts: Sequence[str]) -> None:
+        """Index ``texts`` as the next documents and persist them if enabled."""
+        records = [dict(Counter(tokenize(t))) for t in texts]
+        for freqs in records:
+            self._index(freqs)
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a") as fh:
+                fh.writelines(json.dumps(freqs) + "\n" for freqs in records)
+
+    def search(self, query: str, k: int) -> List[tuple[int, float]]:
+        """Return up to ``k`` ``(id, score)`` pairs matching ``query``."""
+
+        n = len(self._doc_len)
+        terms = [t for t in set(tokenize(query)) if t in self._postings]
+        if not n or not terms:
+            return []
+        doc_len = np.frombuffer(self._doc_len, dtype=np.uintc).astype(np.float32)
+        avg_len = max(self._total_len / n, 1.0)
+        norm = self.k1 * (1 - self.b + self.b * doc_len / avg_len)
+        scores = np.zeros(n, dtype=np.float32)
+        for term in terms:
+            ids_arr, tfs_arr = self._postings[term]
+            ids = np.frombuffer(ids_arr, dtype=np.uintc)
+            tfs = np.frombuffer(tfs_arr, dtype=np.uintc).astype(np.float32)
+            idf = np.log(1 + (n - len(ids) + 0.5) / (len(ids) + 0.5))
+            scores[ids] += idf * tfs * (self.k1 + 1) / (tfs + norm[ids])
+        hits = np.flatnonzero(scores)
+        if len(hits) > k:
+            hits = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        hits = hits[np.argsort(-scores[hits], kind="stable")]
+        return [(int(i), float(scores[i])) for i in hits]
+
+    def _index(self, freqs: dict[str, int]) -> None:
+        doc_id = len(self._doc_len)
+        length = sum(freqs.values())
+        for term, tf in freqs.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = (array("I"), array("I"))
+            postings[0].append(doc_id)
+            postings[1].append(tf)
+        self._doc_len.append(length)
+        self._total_len += length
+
+    def _rewrite(self, records: list[dict[str, int]]) -> None:
+        assert self.path is not None
+        logger.info("Truncating lexical index %s to %d docs", self.path, len(records))
+        with self.path.open("w") as fh:
+            fh.writelines(json.dumps(freqs) + "\n" for freqs in records)
@@ -0,0 +1,227 @@
+"""Many named :class:`VectorDB` collections sharing one encoder."""
+
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import json
+import logging
+from pathlib import Path
+import re
+import shutil
+import threading
+import time
+from typing import Any, Iterable, Iterator, List
+
+from . import VectorDB
+
+logger = logging.getLogger(__name__)
+
+NAME_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+CONFIG_FILE = "config.json"
+#: Parameters of :class:`VectorDB` that may differ between collections.
+COLLECTION_PARAMS = (
+    "max_elements",
+    "ef_construction",
+    "M",
+    "ef",
+    "space",
+    "max_text_length",
+    "lexical_index",
+    "quantization",
+    "segmented",
+    "text_codec",
+)
+
+
+class CollectionManager:
+    """Create, lazily load and evict collections stored below ``root``.
+
+    Every collection lives in ``root/<name>/`` with its own index, texts and a
+    ``config.json`` holding the :data:`COLLECTION_PARAMS` it was created with.
+    All loaded collections share ``model`` and the thread pool in
+    :attr:`executor`, which callers should use for blocking database work.
+
+    Parameters
+    ----------
+    root:
+        Directory containing the collections.
+    model:
+        Loaded encoder shared by all collections.
+    idle_timeout:
+        Seconds after which an unused collection is unloaded. ``None`` keeps
+        collections loaded.
+    max_loaded:
+        Maximum number of collections kept in memory; the least recently used
+        idle ones are unloaded first.
+    max_workers:
+        Size of the shared executor.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        model: Any,
+        *,
+        idle_timeout: float | None = 600.0,
+        max_loaded: int = 16,
+        max_workers: int = 4,
+    ) -> None:
+        if max_loaded < 1:
+            raise ValueError("max_loaded must be >= 1")
+        self.root = Path(root)
+        self.model = model
+        self.idle_timeout = idle_timeout
+        self.max_loaded = max_loaded
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="vectordb"
+        )
+        self._loaded: dict[str, VectorDB] = {}
+        self._last_used: dict[str, float] = {}
+        self._in_use: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def names(self) -> List[str]:
+        """Return the names of all stored collections."""
+        if not self.root.exists():
+            return []
+        return sorted(p.name for p in self.root.iterdir() if (p / CONFIG_FILE).exists())
+
+    def loaded(self) -> List[str]:
+        """Return the names of the collections currently in memory."""
+        with self._lock:
+            return sorted(self._loaded)
+
+    def create(self, name: str, **params: Any) -> None:
+        """Create collection ``name`` with the given :class:`VectorDB` params.
+
+        Raises ``ValueError`` for invalid names or parameters and
+        ``FileExistsError`` if the collection already exists.
+        """
+
+        self._check_name(name)
+        unknown = set(params) - set(COLLECTION_PARAMS)
+        if unknown:
+            raise ValueError(
+                f"unknown collection parameters: {', '.join(sorted(unknown))}"
+            )
+        path = self.root / name
+        if (path / CONFIG_FILE).exists():
+            raise FileExistsError(f"collection {name!r} already exists")
+        with self._lock:
+            # Validate the parameters by opening the collection once.
+            vdb = self._open(path, params)
+            path.mkdir(parents=True, exist_ok=True)
+            (path / CONFIG_FILE).write_text(json.dumps(params))
+            self._loaded[name] = vdb
+            self._last_used[name] = time.monotonic()
+            evicted = self._evict()
+        self._close(evicted.values())
+        logger.info("Created collection %s", name)
+
+    def delete(self, name: str) -> None:
+        """Unload collection ``name`` and remove its files."""
+        path = self._path(name)
+        with self._lock:
+            if self._in_use.get(name):
+                raise RuntimeError(f"collection {name!r} is in use")
+            vdb = self._loaded.pop(name, None)
+            self._last_used.pop(name, None)
+            # Stop background merges before their files disappear.
+            self._close([vdb] if vdb is not None else [])
+            shutil.rmtree(path)
+        logger.info("Deleted collection %s", name)
+
+    @contextmanager
+    def use(self, name: str) -> Iterator[VectorDB]:
+        """Yield collection ``name``, loading it if needed.
+
+        Collections are never evicted while they are in use. Raises
+        ``KeyError`` if the collection does not exist.
+        """
+
+        path = self._path(name)
+        with self._lock:
+            vdb = self._loaded.get(name)
+            if vdb is not None:
+                self._acquire(name)
+        if vdb is None:
+            # Load outside the lock so other collections stay available.
+            params = json.loads((path / CONFIG_FILE).read_text())
+            logger.info("Loading collection %s", name)
+            opened = self._open(path, params)
+            with self._lock:
+                vdb = self._loaded.setdefault(name, opened)
+                self._acquire(name)
+                evicted = self._evict()
+            if vdb is not opened:
+                # Another thread loaded the collection first.
+                evicted[name] = opened
+            self._close(evicted.values())
+        try:
+            yield vdb
+        finally:
+            with self._lock:
+                self._in_use[name] -= 1
+                self._last_used[name] = time.monotonic()
+
+    def _acquire(self, name: str) -> None:
+        self._in_use[name] = self._in_use.get(name, 0) + 1
+        self._last_used[name] = time.monotonic()
+
+    def evict_idle(self) -> List[str]:
+        """Unload idle collections and return their names."""
+        with self._lock:
+            evicted = self._evict()
+        self._close(evicted.values())
+        return list(evicted)
+
+    def close(self) -> None:
+        """Unload all collections and stop the shared executor."""
+        self.executor.shutdown(wait=True)
+        with self._lock:
+            loaded = list(self._loaded.values())
+            self._loaded.clear()
+            self._last_used.clear()
+        self._close(loaded)
+
+    def _evict(self) -> dict[str, VectorDB]:
+        """Drop idle collections; the caller closes them outside the lock."""
+        now = time.monotonic()
+        idle = sorted(
+            (self._last_used[n], n) for n in self._loaded if not self._in_use.get(n)
+        )
+        evicted: dict[str, VectorDB] = {}
+        for last_used, name in idle:
+            timeout = self.idle_timeout
+            expired = timeout is not None and now - last_used >= timeout
+            if expired or len(self._loaded) > self.max_loaded:
+                logger.info("Unloading idle collection %s", name)
+                evicted[name] = self._loaded.pop(name)
+                del self._last_used[name]
+        return evicted
+
+    @staticmethod
+    def _close(dbs: Iterable[VectorDB]) -> None:
+        for vdb in dbs:
+            vdb.close()
+
+    def _open(self, path: Path, params: dict[str, Any]) -> VectorDB:
+        return VectorDB(
+            index_path=path / "index.bin",
+            data_path=path / "data.json",
+            model=self.model,
+            **params,
+        )
+
+    def _path(self, name: str) -> Path:
+        self._check_name(name)
+        path = self.root / name
+        if not (path / CONFIG_FILE).exists():
+            raise KeyError(name)
+        return path
+
+    @staticmethod
+    def _check_name(name: str) -> None:
+        if not NAME_RE.match(name):
+            raise ValueError(
+                "collection names must be 1-64 letters, digits, '-' or '_'"
+            )
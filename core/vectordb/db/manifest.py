@@ -0,0 +1,187 @@
+"""Crash-consistent commits of the files that make up a database.
+
+:func:`commit` records the checksum, size and item count of every file in a
+JSON manifest before moving the new files into place, and keeps the files of
+the previous version next to them with a ``.prev`` suffix. After a crash
+:func:`recover` picks the newest version whose files are all intact, so a torn
+save falls back to the last consistent state instead of an empty database.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+import shutil
+import tempfile
+from typing import Any, Mapping
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_SUFFIX = ".manifest"
+PREVIOUS_SUFFIX = ".prev"
+
+
+def previous_path(path: Path) -> Path:
+    """Return where the previous version of ``path`` is kept."""
+    return path.with_name(path.name + PREVIOUS_SUFFIX)
+
+
+def digest(path: Path) -> str:
+    """Return the hex SHA-256 digest of the file at ``path``."""
+    sha = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def read(manifest_path: Path) -> dict[str, Any] | None:
+    """Return the manifest at ``manifest_path`` or ``None`` if there is none."""
+    try:
+        return json.loads(Path(manifest_path).read_text())
+    except FileNotFoundError:
+        return None
+
+
+def commit(
+    manifest_path: Path,
+    staged: Mapping[str, tuple[Path, Path]],
+    counts: Mapping[str, int],
+) -> int:
+    """Atomically publish staged files as a new version and return its number.
+
+    Parameters
+    ----------
+    manifest_path:
+        Location of the manifest.
+    staged:
+        Maps artifact names to ``(temporary file, live path)`` pairs. The
+        temporary files are moved to the live paths.
+    counts:
+        Number of items stored in each artifact, recorded for diagnostics.
+    """
+
+    manifest_path = Path(manifest_path)
+    entry = {}
+    for name, (tmp, live) in staged.items():
+        _fsync(tmp)
+        entry[name] = {
+            "file": Path(live).name,
+            "sha256": digest(tmp),
+            "size": Path(tmp).stat().st_size,
+            "count": counts.get(name, 0),
+        }
+    old = read(manifest_path) or {"version": 0, "current": None}
+    # Keep the files of the committed version; until the new manifest is in
+    # place they are what ``recover`` falls back to.
+    for _, live in staged.values():
+        if Path(live).exists():
+            os.replace(live, previous_path(Path(live)))
+    version = old["version"] + 1
+    _write(
+        manifest_path,
+        {"version": version, "current": entry, "previous": old["current"]},
+    )
+    for tmp, live in staged.values():
+        os.replace(tmp, live)
+    _fsync_dir(manifest_path.parent)
+    return version
+
+
+def recover(manifest_path: Path, live: Mapping[str, Path]) -> int:
+    """Make the live files match the newest intact version in the manifest.
+
+    Every file is looked up at its live path and its ``.prev`` path, so any
+    interruption of :func:`commit` leaves one complete version. Files taken
+    from ``.prev`` are copied back to the live paths. When the previous
+    version is recovered the manifest is rewritten with it as the current
+    one, so the next commit keeps it as its fallback. Returns the recovered
+    version, or ``0`` if there is no manifest. Raises ``RuntimeError`` if no
+    recorded version is intact.
+    """
+
+    manifest = read(manifest_path)
+    if manifest is None:
+        return 0
+    for key, version in (
+        ("current", manifest["version"]),
+        ("previous", manifest["version"] - 1),
+    ):
+        entry = manifest.get(key)
+        if not entry:
+            continue
+        found = {name: _find(Path(live[name]), meta) for name, meta in entry.items()}
+        if None in found.values():
+            logger.warning("Version %d of %s is incomplete", version, manifest_path)
+            continue
+        for name, path in found.items():
+            if path != Path(live[name]):
+                logger.warning("Restoring %s from %s", live[name], path)
+                _copy(path, Path(live[name]))
+        # Artifacts not part of the version would not match its contents.
+        for name, path in live.items():
+            if name not in entry and Path(path).exists():
+                Path(path).unlink()
+        if key == "previous":
+            logger.warning(
+                "Recovered version %d of %s after an interrupted save",
+                version,
+                manifest_path,
+            )
+            # The current entry never landed; keeping it would make the next
+            # commit record it as the fallback instead of these files.
+            _write(
+                Path(manifest_path),
+                {"version": version, "current": entry, "previous": None},
+            )
+        return version
+    raise RuntimeError(
+        f"no intact version recorded in {manifest_path}; restore the files "
+        "from a backup or clear the database"
+    )
+
+
+def _write(manifest_path: Path, manifest: Mapping[str, Any]) -> None:
+    with tempfile.NamedTemporaryFile(
+        "w", dir=manifest_path.parent, delete=False
+    ) as tmp_manifest:
+        json.dump(manifest, tmp_manifest)
+        tmp_manifest.flush()
+        os.fsync(tmp_manifest.fileno())
+    os.replace(tmp_manifest.name, manifest_path)
+    _fsync_dir(manifest_path.parent)
+
+
+def _find(path: Path, meta: Mapping[str, Any]) -> Path | None:
+    for candidate in (path, previous_path(path)):
+        if (
+            candidate.exists()
+            and candidate.stat().st_size == meta["size"]
+            and digest(candidate) == meta["sha256"]
+        ):
+            return candidate
+    return None
+
+
+def _copy(src: Path, dst: Path) -> None:
+    with tempfile.NamedTemporaryFile(dir=dst.parent, delete=False) as tmp:
+        tmp_path = Path(tmp.name)
+    shutil.copyfile(src, tmp_path)
+    os.replace(tmp_path, dst)
+
+
+def _fsync(path: Path) -> None:
+    with open(path, "rb") as fh:
+        os.fsync(fh.fileno())
+
+
+def _fsync_dir(path: Path) -> None:
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:  # pragma: no cover - directories cannot be opened on Windows
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
@@ -0,0 +1,293 @@
+"""Compressed flat vector index with exact re-ranking.
+
+:class:`QuantizedIndex` mirrors the subset of the ``hnswlib.Index`` interface
+used by :class:`~vectordb.db.VectorDB`, so it can be swapped in when vectors
+should be kept in RAM as ``float16`` or per-dimension scalar ``int8`` codes
+instead of ``float32``. Queries scan the codes with vectorised NumPy, take an
+oversampled candidate set and re-rank it exactly against the full-precision
+vectors, which live in an append-only file that is memory-mapped on demand.
+"""
+
+import logging
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+
+from . import QUANTIZATIONS
+
+logger = logging.getLogger(__name__)
+
+#: Number of codes decoded at a time while scanning.
+SCAN_CHUNK = 65536
+
+
+class QuantizedIndex:
+    """Flat index storing compressed vector codes in memory.
+
+    Parameters
+    ----------
+    space:
+        ``"cosine"``, ``"ip"`` or ``"l2"``. Distances follow ``hnswlib``:
+        ``1 - similarity`` for cosine and inner product, squared euclidean
+        distance for ``l2``.
+    dim:
+        Dimensionality of the vectors.
+    quantization:
+        ``"float16"`` or ``"int8"``.
+    vectors_path:
+        File receiving the full-precision vectors used for re-ranking.
+    oversample:
+        Multiple of ``k`` scanned from the codes before exact re-ranking.
+    read_only:
+        Never modify ``vectors_path``: :meth:`load_index` ignores vectors
+        appended after the last save instead of truncating them.
+    """
+
+    def __init__(
+        self,
+        space: str = "cosine",
+        dim: int = 3,
+        *,
+        quantization: str = "int8",
+        vectors_path: Path,
+        oversample: int = 4,
+        read_only: bool = False,
+    ) -> None:
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"quantization must be one of {', '.join(QUANTIZATIONS)}")
+        if oversample < 1:
+            raise ValueError("oversample must be >= 1")
+        self.space = space
+        self.dim = dim
+        self.quantization = quantization
+        self.vectors_path = Path(vectors_path)
+        self.oversample = oversample
+        self.read_only = read_only
+        self.ef = 10
+        self.max_elements = 0
+        self._code_dtype = np.float16 if quantization == "float16" else np.uint8
+        self._codes = np.empty((0, dim), dtype=self._code_dtype)
+        self._labels = np.empty(0, dtype=np.int64)
+        self._rows: dict[int, int] = {}
+        self._lo = np.zeros(dim, dtype=np.float32)
+        self._scale = np.zeros(dim, dtype=np.float32)
+        self._sq_norms = np.empty(0, dtype=np.float32)
+        self._mmap: np.memmap | None = None
+
+    # ``hnswlib`` compatible API -------------------------------------------------
+
+    def init_index(
+        self, max_elements: int = 10000, ef_construction: int = 200, M: int = 16
+    ) -> None:
+        """Start an empty index, discarding any stale full-precision vectors."""
+        self.max_elements = max_elements
+        self._release()
+        self.vectors_path.parent.mkdir(parents=True, exist_ok=True)
+        self.vectors_path.write_bytes(b"")
+
+    def set_ef(self, ef: int) -> None:
+        """Set the minimum number of candidates re-ranked per query."""
+        self.ef = ef
+
+    def get_current_count(self) -> int:
+        return len(self._labels)
+
+    def get_max_elements(self) -> int:
+        return self.max_elements
+
+    def add_items(self, vecs, ids: Sequence[int], num_threads: int = -1) -> None:
+        """Append ``vecs`` under ``ids`` to the codes and the vector file.
+
+        ``num_threads`` is accepted for compatibility with ``hnswlib`` and
+        ignored.
+        """
+        data = self._prepare(vecs)
+        labels = np.asarray(ids, dtype=np.int64)
+        if len(labels) != len(data):
+            raise ValueError("number of ids does not match number of vectors")
+        if self.max_elements and len(self._labels) + len(data) > self.max_elements:
+            raise RuntimeError("The number of elements exceeds the specified limit")
+        with self.vectors_path.open("ab") as fh:
+            fh.write(data.tobytes())
+        self._release()
+        start = len(self._labels)
+        self._labels = np.concatenate([self._labels, labels])
+        self._rows.update((int(label), start + i) for i, label in enumerate(labels))
+        self._sq_norms = np.concatenate(
+            [self._sq_norms, np.einsum("ij,ij->i", data, data)]
+        )
+        if self.quantization == "int8" and self._extends_range(data):
+            # The per-dimension range grew: re-encode everything from disk.
+            self._fit(self._vectors())
+            self._codes = self._encode(self._vectors())
+        else:
+            self._codes = np.concatenate([self._codes, self._encode(data)])
+
+    def get_items(self, ids: Sequence[int]) -> np.ndarray:
+        """Return the full-precision vectors stored for ``ids``."""
+        rows = [self._rows[int(i)] for i in ids]
+        return np.array(self._vectors()[rows])
+
+    def knn_query(
+        self, vecs, k: int = 1, num_threads: int = -1
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Return ``(labels, distances)`` of the ``k`` nearest stored vectors.
+
+        ``num_threads`` is accepted for compatibility with ``hnswlib`` and
+        ignored.
+        """
+        n = len(self._labels)
+        if k > n:
+            raise RuntimeError(
+                "Cannot return the results in a contiguous 2D array. "
+                "Probably ef or M is too small"
+            )
+        queries = self._prepare(vecs)
+        depth = min(n, max(self.ef, k * self.oversample))
+        labels = np.empty((len(queries), k), dtype=np.int64)
+        distances = np.empty((len(queries), k), dtype=np.float32)
+        full = self._vectors()
+        for qi, query in enumerate(queries):
+            approx = self._scan(query)
+            if depth < n:
+                candidates = np.argpartition(approx, depth - 1)[:depth]
+            else:
+                candidates = np.arange(n)
+            candidates.sort()
+            exact = self._distances(query, full[candidates], self._sq_norms[candidates])
+            order = np.argsort(exact, kind="stable")[:k]
+            labels[qi] = self._labels[candidates[order]]
+            distances[qi] = exact[order]
+        return labels, distances
+
+    def save_index(self, path: str) -> None:
+        """Write the codes and quantiser parameters to ``path``."""
+        with open(path, "wb") as fh:
+            np.savez(
+                fh,
+                codes=self._codes,
+                labels=self._labels,
+                lo=self._lo,
+                scale=self._scale,
+                sq_norms=self._sq_norms,
+                max_elements=np.int64(self.max_elements),
+            )
+
+    def load_index(self, path: str, max_elements: int = 0) -> None:
+        """Load codes from ``path`` and attach the full-precision vector file.
+
+        Rows appended to the vector file after the last save are dropped.
+        """
+        with np.load(path) as data:
+            codes = data["codes"]
+            labels = data["labels"]
+            if codes.dtype != self._code_dtype or codes.shape[1:] != (self.dim,):
+                raise ValueError("index was saved with different quantization")
+            self._codes = codes
+            self._labels = labels
+            self._lo = data["lo"]
+            self._scale = data["scale"]
+            self._sq_norms = data["sq_norms"]
+            self.max_elements = max(int(data["max_elements"]), max_elements)
+        row_bytes = self.dim * np.dtype(np.float32).itemsize
+        expected = len(labels) * row_bytes
+        size = self.vectors_path.stat().st_size if self.vectors_path.exists() else 0
+        if size < expected:
+            raise ValueError(
+                f"{self.vectors_path} holds {size // row_bytes} vectors, "
+                f"expected {len(labels)}"
+            )
+        if size > expected and not self.read_only:
+            logger.info("Dropping unsaved vectors from %s", self.vectors_path)
+            with self.vectors_path.open("r+b") as fh:
+                fh.truncate(expected)
+        self._rows = {int(label): i for i, label in enumerate(labels)}
+        self._release()
+
+    def prefetch(self) -> None:
+        """Read the full-precision vector file to pull it into the page cache."""
+        if not self.vectors_path.exists():
+            return
+        buf = bytearray(1 << 20)
+        with self.vectors_path.open("rb", buffering=0) as fh:
+            while fh.readinto(buf):
+                pass
+
+    def memory_bytes(self) -> int:
+        """Return the bytes held in memory, excluding the memory-mapped vectors."""
+        arrays = (self._codes, self._labels, self._sq_norms, self._lo, self._scale)
+        # The label to row map costs roughly 100 bytes per entry.
+        return sum(a.nbytes for a in arrays) + 100 * len(self._rows)
+
+    # internals -------------------------------------------------------------
+
+    def _prepare(self, vecs) -> np.ndarray:
+        data = np.ascontiguousarray(np.asarray(vecs, dtype=np.float32))
+        if data.ndim == 1:
+            data = data[None, :]
+        if data.shape[1] != self.dim:
+            raise ValueError(f"expected vectors of dimension {self.dim}")
+        if self.space == "cosine":
+            norms = np.linalg.norm(data, axis=1, keepdims=True)
+            data = data / np.where(norms == 0, 1, norms)
+        return data
+
+    def _vectors(self) -> np.ndarray:
+        if self._mmap is None:
+            if not len(self._labels):
+                return np.empty((0, self.dim), dtype=np.float32)
+            self._mmap = np.memmap(
+                self.vectors_path,
+                dtype=np.float32,
+                mode="r",
+                shape=(len(self._labels), self.dim),
+            )
+        return self._mmap
+
+    def _release(self) -> None:
+        self._mmap = None
+
+    def _extends_range(self, data: np.ndarray) -> bool:
+        if len(self._labels) == len(data):
+            return True
+        hi = self._lo + self._scale * 255
+        return bool(
+            (data.min(axis=0) < self._lo).any() or (data.max(axis=0) > hi).any()
+        )
+
+    def _fit(self, data: np.ndarray) -> None:
+        lo = data.min(axis=0)
+        hi = data.max(axis=0)
+        self._lo = lo.astype(np.float32)
+        self._scale = np.where(hi > lo, (hi - lo) / 255, 1).astype(np.float32)
+
+    def _encode(self, data: np.ndarray) -> np.ndarray:
+        if self.quantization == "float16":
+            return data.astype(np.float16)
+        codes = np.rint((data - self._lo) / self._scale)
+        return np.clip(codes, 0, 255).astype(np.uint8)
+
+    def _scan(self, query: np.ndarray) -> np.ndarray:
+        """Approximate distances between ``query`` and every stored code."""
+        n = len(self._codes)
+        dots = np.empty(n, dtype=np.float32)
+        if self.quantization == "float16":
+            weights, offset = query, 0.0
+        else:
+            # x ~ lo + scale * code, so q.x ~ q.lo + (q * scale).code
+            weights, offset = query * self._scale, float(query @ self._lo)
+        for start in range(0, n, SCAN_CHUNK):
+            chunk = self._codes[start : start + SCAN_CHUNK].astype(np.float32)
+            dots[start : start + SCAN_CHUNK] = chunk @ weights + offset
+        if self.space == "l2":
+            return self._sq_norms - 2 * dots
+        return -dots
+
+    def _distances(
+        self, query: np.ndarray, rows: np.ndarray, sq_norms: np.ndarray
+    ) -> np.ndarray:
+        dots = rows @ query
+        if self.space == "l2":
+            return np.maximum(sq_norms - 2 * dots + query @ query, 0)
+        return 1 - dots
@@ -0,0 +1,410 @@
+"""Log-structured vector index made of immutable HNSW segments.
+
+:class:`SegmentedIndex` mirrors the subset of the ``hnswlib.Index`` interface
+used by :class:`~vectordb.db.VectorDB`. New vectors go to a small mutable
+segment that is rewritten on every save. Once it holds ``memtable_size``
+vectors it is sealed into an immutable ``hnswlib`` file that is never
+rewritten. A background thread merges ``merge_factor`` segments of similar
+size into one larger segment, so every vector is rewritten only a logarithmic
+number of times instead of on every save. Queries fan out over all segments
+and merge their top ``k``.
+"""
+
+import json
+import logging
+import math
+from pathlib import Path
+import threading
+from typing import Any, List, Sequence
+
+import hnswlib
+import numpy as np
+
+from .manifest import _fsync, _fsync_dir, previous_path
+
+logger = logging.getLogger(__name__)
+
+#: Vectors held by the mutable segment before it is sealed.
+MEMTABLE_SIZE = 1024
+#: Number of segments of the same size tier merged into one.
+MERGE_FACTOR = 4
+
+
+class Segment:
+    """Immutable ``hnswlib`` graph stored in ``path``."""
+
+    def __init__(self, path: Path, index: Any, labels: np.ndarray) -> None:
+        self.path = path
+        self.index = index
+        self.labels = labels
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+
+class SegmentedIndex:
+    """Vector index split into a mutable segment and immutable segments.
+
+    Parameters
+    ----------
+    space:
+        Distance metric passed to ``hnswlib``.
+    dim:
+        Dimensionality of the vectors.
+    directory:
+        Directory holding the sealed segment files.
+    memtable_size:
+        Number of vectors after which the mutable segment is sealed.
+    merge_factor:
+        Number of segments of a size tier merged in the background.
+    background_merge:
+        Merge in a background thread. When disabled call :meth:`merge`.
+    read_only:
+        Never modify :attr:`directory`: :meth:`load_index` neither deletes
+        orphaned segments nor starts merges.
+    num_threads:
+        Threads used to build merged segments and the mutable segment
+        replayed by :meth:`load_index`; ``-1`` uses every core.
+    """
+
+    def __init__(
+        self,
+        space: str = "cosine",
+        dim: int = 3,
+        *,
+        directory: Path,
+        memtable_size: int = MEMTABLE_SIZE,
+        merge_factor: int = MERGE_FACTOR,
+        background_merge: bool = True,
+        read_only: bool = False,
+        num_threads: int = -1,
+    ) -> None:
+        if memtable_size < 1:
+            raise ValueError("memtable_size must be >= 1")
+        if merge_factor < 2:
+            raise ValueError("merge_factor must be >= 2")
+        self.space = space
+        self.dim = dim
+        self.directory = Path(directory)
+        self.memtable_size = memtable_size
+        self.merge_factor = merge_factor
+        self.background_merge = background_merge
+        self.read_only = read_only
+        self.num_threads = num_threads
+        self.ef = 10
+        self.ef_construction = 200
+        self.M = 16
+        self.max_elements = 0
+        self.segments: List[Segment] = []
+        self._mem_vectors = np.empty((0, dim), dtype=np.float32)
+        self._mem_labels = np.empty(0, dtype=np.int64)
+        self._memtable: Any | None = None
+        self._where: dict[int, Segment | None] = {}
+        self._next_seq = 0
+        # Segment files replaced by merges, deleted once no saved version
+        # refers to them any more.
+        self._retired: List[Path] = []
+        self._last_saved: set[str] = set()
+        # Guards ``segments`` and the mutable segment against the merger.
+        self._lock = threading.RLock()
+        self._merge_wanted = threading.Event()
+        self._merger: threading.Thread | None = None
+
+    # ``hnswlib`` compatible API -------------------------------------------------
+
+    def init_index(
+        self, max_elements: int = 10000, ef_construction: int = 200, M: int = 16
+    ) -> None:
+        """Start an empty index."""
+        self.max_elements = max_elements
+        self.ef_construction = ef_construction
+        self.M = M
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def set_ef(self, ef: int) -> None:
+        self.ef = ef
+        with self._lock:
+            for index in self._indexes():
+                index.set_ef(ef)
+
+    def get_current_count(self) -> int:
+        return len(self._where)
+
+    def get_max_elements(self) -> int:
+        return self.max_elements
+
+    def add_items(self, vecs, ids: Sequence[int], num_threads: int = -1) -> None:
+        """Add ``vecs`` under ``ids`` to the mutable segment, sealing it when full."""
+        data = np.asarray(vecs, dtype=np.float32).reshape(-1, self.dim)
+        labels = np.asarray(ids, dtype=np.int64)
+        if len(labels) != len(data):
+            raise ValueError("number of ids does not match number of vectors")
+        with self._lock:
+            if self.max_elements and len(self._where) + len(data) > self.max_elements:
+                raise RuntimeError("The number of elements exceeds the specified limit")
+            while len(data):
+                room = self.memtable_size - len(self._mem_labels)
+                head, data = data[:room], data[room:]
+                head_labels, labels = labels[:room], labels[room:]
+                memtable = self._memtable_index()
+                memtable.add_items(head, head_labels, num_threads=num_threads)
+                self._mem_vectors = np.concatenate([self._mem_vectors, head])
+                self._mem_labels = np.concatenate([self._mem_labels, head_labels])
+                self._where.update((int(label), None) for label in head_labels)
+                if len(self._mem_labels) >= self.memtable_size:
+                    self._seal(num_threads)
+
+    def get_items(self, ids: Sequence[int]) -> np.ndarray:
+        """Return the vectors stored for ``ids``."""
+        with self._lock:
+            rows = []
+            for label in ids:
+                segment = self._where[int(label)]
+                index = self._memtable if segment is None else segment.index
+                rows.append(np.asarray(index.get_items([int(label)]))[0])
+        return np.asarray(rows, dtype=np.float32)
+
+    def knn_query(
+        self, vecs, k: int = 1, num_threads: int = -1
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Query every segment and merge the ``k`` nearest results."""
+        queries = np.asarray(vecs, dtype=np.float32).reshape(-1, self.dim)
+        with self._lock:
+            sources = [(self._memtable, len(self._mem_labels))] + [
+                (segment.index, len(segment)) for segment in self.segments
+            ]
+            if k > len(self._where):
+                raise RuntimeError(
+                    "Cannot return the results in a contiguous 2D array. "
+                    "Probably ef or M is too small"
+                )
+        # Merges replace segments instead of changing them, so the queries
+        # run unlocked and concurrent searches overlap.
+        all_labels, all_distances = [], []
+        for index, count in sources:
+            if not count:
+                continue
+            labels, distances = index.knn_query(
+                queries, k=min(k, count), num_threads=num_threads
+            )
+            all_labels.append(np.asarray(labels, dtype=np.int64))
+            all_distances.append(np.asarray(distances, dtype=np.float32))
+        labels = np.concatenate(all_labels, axis=1)
+        distances = np.concatenate(all_distances, axis=1)
+        order = np.argsort(distances, axis=1, kind="stable")[:, :k]
+        return (
+            np.take_along_axis(labels, order, axis=1),
+            np.take_along_axis(distances, order, axis=1),
+        )
+
+    def save_index(self, path: str) -> None:
+        """Write the mutable segment and the list of sealed segments to ``path``.
+
+        Sealed segments already live in :attr:`directory` and are not
+        rewritten. Files of merged-away segments are deleted once neither
+        this nor the previously saved version refers to them.
+        """
+        with self._lock:
+            names = [segment.path.name for segment in self.segments]
+            meta = {
+                "segments": names,
+                "next_seq": self._next_seq,
+                "max_elements": self.max_elements,
+            }
+            with open(path, "wb") as fh:
+                np.savez(
+                    fh,
+                    vectors=self._mem_vectors,
+                    labels=self._mem_labels,
+                    meta=np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8),
+                )
+            keep = set(names) | self._last_saved
+            self._last_saved = set(names)
+            retired = [p for p in self._retired if p.name not in keep]
+            self._retired = [p for p in self._retired if p.name in keep]
+        for stale in retired:
+            logger.debug("Deleting merged segment %s", stale)
+            stale.unlink(missing_ok=True)
+
+    def load_index(self, path: str, max_elements: int = 0) -> None:
+        """Load the segments listed in ``path`` and drop orphaned files.
+
+        A read-only index leaves orphaned files alone and never merges.
+        """
+        with np.load(path) as data:
+            vectors = data["vectors"]
+            labels = data["labels"]
+            meta = json.loads(data["meta"].tobytes().decode())
+        with self._lock:
+            self.max_elements = max(int(meta["max_elements"]), max_elements)
+            self._next_seq = int(meta["next_seq"])
+            self.segments = [
+                self._open_segment(self.directory / n) for n in meta["segments"]
+            ]
+            self._where = {}
+            for segment in self.segments:
+                self._where.update((int(label), segment) for label in segment.labels)
+            self._mem_vectors = np.empty((0, self.dim), dtype=np.float32)
+            self._mem_labels = np.empty(0, dtype=np.int64)
+            self._memtable = None
+            if len(labels):
+                self.add_items(vectors, labels, num_threads=self.num_threads)
+            self._last_saved = set(meta["segments"])
+        if self.read_only:
+            return
+        self._remove_orphans(Path(path), set(meta["segments"]))
+        self._schedule_merge()
+
+    def memory_bytes(self) -> int:
+        """Estimate the memory of all segments (see :func:`hnsw_memory_bytes`)."""
+        from . import hnsw_memory_bytes
+
+        with self._lock:
+            sizes = [(len(s), len(s)) for s in self.segments]
+            if self._memtable is not None:
+                sizes.append((len(self._mem_labels), self.memtable_size))
+            label_map = 100 * len(self._where) + self._mem_vectors.nbytes
+        return label_map + sum(
+            hnsw_memory_bytes(count, capacity, self.dim, self.M)
+            for count, capacity in sizes
+        )
+
+    # segments ----------------------------------------------------------------
+
+    def merge(self) -> bool:
+        """Merge one group of same-tier segments. Returns whether it did."""
+        with self._lock:
+            group = self._merge_candidates()
+            if not group:
+                return False
+            seq = self._take_seq()
+        # Segments are immutable, so the expensive rebuild runs unlocked.
+        labels = np.concatenate([segment.labels for segment in group])
+        vectors = np.concatenate(
+            [np.asarray(s.index.get_items(s.labels), dtype=np.float32) for s in group]
+        )
+        merged = self._write_segment(seq, vectors, labels, self.num_threads)
+        with self._lock:
+            first = self.segments.index(group[0])
+            self.segments = [s for s in self.segments if s not in group]
+            self.segments.insert(first, merged)
+            self._where.update((int(label), merged) for label in labels)
+            self._retired.extend(segment.path for segment in group)
+        logger.info(
+            "Merged %d segments into %s (%d vectors)",
+            len(group),
+            merged.path,
+            len(labels),
+        )
+        return True
+
+    def close(self) -> None:
+        """Stop the background merger after its current merge."""
+        merger, self._merger = self._merger, None
+        if merger is not None:
+            self._merge_wanted.set()
+            merger.join()
+
+    def _seal(self, num_threads: int) -> None:
+        segment = self._write_segment(
+            self._take_seq(), self._mem_vectors, self._mem_labels, num_threads
+        )
+        self.segments.append(segment)
+        self._where.update((int(label), segment) for label in segment.labels)
+        self._mem_vectors = np.empty((0, self.dim), dtype=np.float32)
+        self._mem_labels = np.empty(0, dtype=np.int64)
+        self._memtable = None
+        logger.debug("Sealed %s (%d vectors)", segment.path, len(segment))
+        self._schedule_merge()
+
+    def _write_segment(
+        self, seq: int, vectors: np.ndarray, labels: np.ndarray, num_threads: int
+    ) -> Segment:
+        index = self._new_index(len(labels))
+        index.add_items(vectors, labels, num_threads=num_threads)
+        path = self.directory / f"seg-{seq:08d}.hnsw"
+        self.directory.mkdir(parents=True, exist_ok=True)
+        index.save_index(str(path))
+        # Saved versions refer to the file by name, so it must be durable
+        # before the next manifest commit.
+        _fsync(path)
+        _fsync_dir(self.directory)
+        return Segment(path, index, labels.copy())
+
+    def _open_segment(self, path: Path) -> Segment:
+        index = hnswlib.Index(space=self.space, dim=self.dim)
+        index.load_index(str(path))
+        index.set_ef(self.ef)
+        labels = np.asarray(index.get_ids_list(), dtype=np.int64)
+        return Segment(path, index, labels)
+
+    def _new_index(self, max_elements: int) -> Any:
+        index = hnswlib.Index(space=self.space, dim=self.dim)
+        index.init_index(
+            max_elements=max_elements, ef_construction=self.ef_construction, M=self.M
+        )
+        index.set_ef(self.ef)
+        return index
+
+    def _memtable_index(self) -> Any:
+        if self._memtable is None:
+            self._memtable = self._new_index(self.memtable_size)
+        return self._memtable
+
+    def _indexes(self) -> List[Any]:
+        indexes = [segment.index for segment in self.segments]
+        return indexes + ([self._memtable] if self._memtable is not None else [])
+
+    def _take_seq(self) -> int:
+        seq = self._next_seq
+        self._next_seq += 1
+        return seq
+
+    def _tier(self, segment: Segment) -> int:
+        ratio = max(len(segment) / self.memtable_size, 1)
+        return int(math.log(ratio, self.merge_factor) + 1e-9)
+
+    def _merge_candidates(self) -> List[Segment]:
+        tiers: dict[int, List[Segment]] = {}
+        for segment in self.segments:
+            tiers.setdefault(self._tier(segment), []).append(segment)
+        for tier in sorted(tiers):
+            if len(tiers[tier]) >= self.merge_factor:
+                return tiers[tier][: self.merge_factor]
+        return []
+
+    def _schedule_merge(self) -> None:
+        if not self.background_merge or not self._merge_candidates():
+            return
+        if self._merger is None:
+            self._merger = threading.Thread(
+                target=self._merge_loop, name="vectordb-merge", daemon=True
+            )
+            self._merger.start()
+        self._merge_wanted.set()
+
+    def _merge_loop(self) -> None:
+        while self._merger is threading.current_thread():
+            self._merge_wanted.wait()
+            self._merge_wanted.clear()
+            try:
+                while self._merger is threading.current_thread() and self.merge():
+                    pass
+            except Exception:  # pragma: no cover - defensive
+                logger.exception("Segment merge failed")
+
+    def _remove_orphans(self, path: Path, referenced: set[str]) -> None:
+        # Segments referenced by the previous version are kept so the save
+        # manifest can still fall back to it.
+        prev = previous_path(path)
+        if prev.exists():
+            try:
+                with np.load(prev) as data:
+                    meta = json.loads(data["meta"].tobytes().decode())
+                referenced = referenced | set(meta["segments"])
+            except (OSError, ValueError, KeyError):
+                pass
+        for file in self.directory.glob("seg-*.hnsw"):
+            if file.name not in referenced:
+                logger.info("Deleting orphaned segment %s", file)
+                file.unlink()
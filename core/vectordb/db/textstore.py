@@ -0,0 +1,201 @@
+"""Compressed, append-only storage for the texts of a :class:`~vectordb.db.VectorDB`.
+
+Texts are grouped into blocks of ``block_size`` entries. Full blocks are
+compressed with ``zlib`` or ``lzma`` and appended to ``<data-path>.blocks``,
+which is never rewritten. The data file itself only holds a small JSON header
+with the codec, the byte offset of every block and the texts of the last,
+incomplete block, so it stays small and is committed through the save
+manifest like before. Looking up a text decompresses only its block; recently
+used blocks are cached.
+
+Blocks appended by a save that never committed are beyond the last offset
+of the header on disk and are truncated on load, so the previous version
+kept by the manifest stays readable. A store loaded read-only leaves the file
+alone and memory-maps its committed part instead, so processes serving the
+same files share one copy in the page cache.
+"""
+
+from collections import OrderedDict
+import json
+import logging
+import lzma
+import mmap
+import os
+from pathlib import Path
+import sys
+import threading
+from typing import Any, Iterable, Iterator, List, Sequence
+import zlib
+
+logger = logging.getLogger(__name__)
+
+#: Suffix of the file holding the compressed blocks next to the data file.
+BLOCKS_SUFFIX = ".blocks"
+#: Texts per compressed block.
+BLOCK_SIZE = 256
+#: Value of the ``format`` key identifying a block store header.
+FORMAT = "vectordb-blocks"
+CODECS = {
+    "zlib": (lambda data: zlib.compress(data, 6), zlib.decompress),
+    "lzma": (lzma.compress, lzma.decompress),
+}
+
+
+def is_header(data: Any) -> bool:
+    """Return whether decoded JSON ``data`` is a block store header."""
+    return isinstance(data, dict) and data.get("format") == FORMAT
+
+
+class BlockTextStore(Sequence[str]):
+    """Sequence of texts persisted as compressed blocks.
+
+    Parameters
+    ----------
+    blocks_path:
+        File the compressed blocks are appended to.
+    codec:
+        ``"zlib"`` or ``"lzma"``.
+    block_size:
+        Number of texts per block.
+    cache_blocks:
+        Number of decompressed blocks kept in memory.
+    """
+
+    def __init__(
+        self,
+        blocks_path: Path,
+        codec: str = "zlib",
+        *,
+        block_size: int = BLOCK_SIZE,
+        cache_blocks: int = 8,
+    ) -> None:
+        if codec not in CODECS:
+            raise ValueError(f"codec must be one of {', '.join(CODECS)}")
+        if block_size < 1:
+            raise ValueError("block_size must be >= 1")
+        self.blocks_path = Path(blocks_path)
+        self.codec = codec
+        self.block_size = block_size
+        self.cache_blocks = cache_blocks
+        # Byte offsets of the blocks in ``blocks_path``; one more than blocks.
+        self._offsets: List[int] = [0]
+        # Texts not yet compressed into a block.
+        self._tail: List[str] = []
+        self._cache: OrderedDict[int, List[str]] = OrderedDict()
+        self._lock = threading.Lock()
+        # Committed blocks mapped into memory by a read-only load.
+        self._map: mmap.mmap | None = None
+
+    @classmethod
+    def load(
+        cls, header: dict[str, Any], blocks_path: Path, *, read_only: bool = False
+    ) -> "BlockTextStore":
+        """Open the store described by a decoded ``header``.
+
+        With ``read_only`` uncommitted blocks are ignored instead of
+        truncated and the committed blocks are memory-mapped.
+        """
+        store = cls(blocks_path, header["codec"], block_size=header["block_size"])
+        store._offsets = [int(offset) for offset in header["offsets"]]
+        store._tail = list(header["tail"])
+        size = store.blocks_path.stat().st_size if store.blocks_path.exists() else 0
+        if size < store._offsets[-1]:
+            raise ValueError(f"{store.blocks_path} is shorter than its header")
+        if read_only:
+            if store._offsets[-1]:
+                with store.blocks_path.open("rb") as fh:
+                    store._map = mmap.mmap(
+                        fh.fileno(), store._offsets[-1], access=mmap.ACCESS_READ
+                    )
+        elif size > store._offsets[-1]:
+            logger.info("Dropping uncommitted blocks from %s", store.blocks_path)
+            with store.blocks_path.open("r+b") as fh:
+                fh.truncate(store._offsets[-1])
+        return store
+
+    def __len__(self) -> int:
+        return (len(self._offsets) - 1) * self.block_size + len(self._tail)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self[i] for i in range(*item.indices(len(self)))]
+        n = len(self)
+        if item < 0:
+            item += n
+        if not 0 <= item < n:
+            raise IndexError("text index out of range")
+        block, row = divmod(item, self.block_size)
+        if block == len(self._offsets) - 1:
+            return self._tail[row]
+        return self._block(block)[row]
+
+    def __iter__(self) -> Iterator[str]:
+        for block in range(len(self._offsets) - 1):
+            yield from self._block(block)
+        yield from list(self._tail)
+
+    def append(self, text: str) -> None:
+        self._tail.append(text)
+
+    def extend(self, texts: Iterable[str]) -> None:
+        self._tail.extend(texts)
+
+    def write(self, path: Path) -> None:
+        """Append full blocks to :attr:`blocks_path` and write the header to ``path``.
+
+        Only texts added since the last write are compressed; blocks written
+        before are left untouched.
+        """
+
+        compress = CODECS[self.codec][0]
+        full = len(self._tail) // self.block_size * self.block_size
+        if full:
+            offsets = []
+            mode = "r+b" if self.blocks_path.exists() else "wb"
+            with self.blocks_path.open(mode) as fh:
+                # Drop blocks of a write that failed or never committed.
+                fh.truncate(self._offsets[-1])
+                fh.seek(self._offsets[-1])
+                for start in range(0, full, self.block_size):
+                    block = self._tail[start : start + self.block_size]
+                    fh.write(compress(json.dumps(block).encode()))
+                    offsets.append(fh.tell())
+                fh.flush()
+                os.fsync(fh.fileno())
+            # Only a complete write moves texts from the tail into blocks.
+            self._offsets.extend(offsets)
+            del self._tail[:full]
+        header = {
+            "format": FORMAT,
+            "codec": self.codec,
+            "block_size": self.block_size,
+            "offsets": self._offsets,
+            "tail": self._tail,
+        }
+        Path(path).write_text(json.dumps(header))
+
+    def memory_bytes(self) -> int:
+        """Bytes of the uncompressed tail and the cached blocks."""
+        with self._lock:
+            cached = [text for block in self._cache.values() for text in block]
+        return sum(sys.getsizeof(text) for text in self._tail + cached)
+
+    def _block(self, block: int) -> List[str]:
+        with self._lock:
+            texts = self._cache.get(block)
+            if texts is not None:
+                self._cache.move_to_end(block)
+                return texts
+        start, end = self._offsets[block], self._offsets[block + 1]
+        if self._map is not None:
+            data = self._map[start:end]
+        else:
+            with self.blocks_path.open("rb") as fh:
+                fh.seek(start)
+                data = fh.read(end - start)
+        texts = json.loads(CODECS[self.codec][1](data))
+        with self._lock:
+            self._cache[block] = texts
+            while len(self._cache) > self.cache_blocks:
+                self._cache.popitem(last=False)
+        return texts
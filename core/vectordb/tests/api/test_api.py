@@ -6,6 +6,7 @@ import sys
 ROOT = Path(__file__).resolve().parents[3]
 sys.path.insert(0, str(ROOT))
 
+import pytest  # noqa: E402
 from fastapi.testclient import TestClient  # noqa: E402
 
 
@@ -135,3 +136,450 @@ def test_stats_endpoint(tmp_path):
 
     assert resp.status_code == 200
     assert resp.json() == {"count": 1}
+
+    vdb.save()
+    stats = client.get("/stats", params={"verbose": True}).json()
+    assert stats["count"] == 1
+    assert stats["capacity"] == {
+        "max_elements": 10000, "used": 1, "free": 9999, "fill_ratio": 0.0001
+    }
+    assert stats["index"]["tombstones"] == 0
+    assert stats["index"]["memory_bytes"] > 10000 * stats["index"]["graph_bytes_per_element"]
+    assert stats["texts"]["disk_bytes"] > 0
+
+
+def test_search_hybrid_mode(tmp_path):
+    from vectordb import VectorDB, create_app
+
+    vdb = VectorDB(index_path=tmp_path / "index.bin", data_path=tmp_path / "data.json")
+    app = create_app(vdb)
+    client = TestClient(app)
+
+    client.post("/add", json={"text": "foo"})
+    client.post("/add", json={"text": "bar"})
+
+    resp = client.get("/search", params={"q": "bar", "k": 1, "mode": "hybrid"})
+    assert resp.status_code == 200
+    assert resp.json()[0]["text"] == "bar"
+
+    resp = client.get("/search", params={"q": "bar", "k": 1, "mode": "other"})
+    assert resp.status_code == 422
+
+
+def test_add_documents_endpoint(tmp_path):
+    from vectordb import VectorDB, create_app
+
+    vdb = VectorDB(
+        index_path=tmp_path / "index.bin",
+        data_path=tmp_path / "data.json",
+        max_text_length=10,
+    )
+    app = create_app(vdb)
+    client = TestClient(app)
+
+    resp = client.post(
+        "/documents", json={"documents": ["one two three four five six"], "overlap": 2}
+    )
+    assert resp.status_code == 200
+    assert resp.json() == {"status": "ok", "ids": [0]}
+
+    resp = client.get("/search", params={"q": "one two", "k": 2, "collapse": True})
+    assert resp.status_code == 200
+    assert [r["document"] for r in resp.json()] == [0]
+
+    resp = client.post("/documents", json={"documents": ["x"], "chunk_size": 11})
+    assert resp.status_code == 422
+
+
+def _wait_for_job(client, job_id, status="done"):
+    import time
+
+    for _ in range(200):
+        body = client.get(f"/jobs/{job_id}").json()
+        if body["status"] == status:
+            return body
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not reach {status}: {body}")
+
+
+def test_async_ingest(tmp_path):
+    from vectordb import VectorDB, create_app
+
+    vdb = VectorDB(index_path=tmp_path / "index.bin", data_path=tmp_path / "data.json")
+    app = create_app(vdb, ingest_queue_size=10)
+
+    with TestClient(app) as client:
+        resp = client.post("/add", json={"text": "foo"})
+        assert resp.status_code == 202
+        assert resp.json()["status"] == "queued"
+        _wait_for_job(client, resp.json()["job"])
+
+        resp = client.get("/search", params={"q": "foo", "k": 1})
+        assert resp.json()[0]["text"] == "foo"
+
+        assert client.get("/jobs/unknown").status_code == 404
+
+
+def test_async_ingest_backpressure_and_failures(tmp_path, monkeypatch):
+    import threading
+    from vectordb import VectorDB, create_app
+
+    vdb = VectorDB(
+        index_path=tmp_path / "index.bin",
+        data_path=tmp_path / "data.json",
+        max_elements=1,
+    )
+    release = threading.Event()
+    add_texts = vdb.add_texts
+
+    def slow_add_texts(texts):
+        release.wait(5)
+        add_texts(texts)
+
+    monkeypatch.setattr(vdb, "add_texts", slow_add_texts)
+    app = create_app(vdb, ingest_queue_size=1)
+
+    with TestClient(app) as client:
+        first = client.post("/add", json={"text": "one"}).json()["job"]
+        _wait_for_job(client, first, "running")
+        second = client.post("/add", json={"text": "two"}).json()["job"]
+
+        resp = client.post("/add", json={"text": "three"})
+        assert resp.status_code == 429
+
+        # A batch larger than the queue is refused for good.
+        resp = client.post("/add/batch", json={"texts": ["a", "b"]})
+        assert resp.status_code == 413
+        assert "ingest queue size of 1" in resp.json()["detail"]
+        assert "Retry-After" not in resp.headers
+
+        release.set()
+        _wait_for_job(client, first)
+        body = _wait_for_job(client, second, "failed")
+        assert "max_elements" in body["error"]
+
+
+def test_ingest_does_not_retry_failed_saves(tmp_path, monkeypatch):
+    from vectordb import VectorDB
+    from vectordb.api.ingest import IngestQueue
+
+    vdb = VectorDB(index_path=tmp_path / "index.bin", data_path=tmp_path / "data.json")
+    save = vdb.save
+    calls = []
+
+    def failing_save():
+        calls.append(1)
+        if len(calls) == 1:
+            raise OSError("disk full")
+        save()
+
+    monkeypatch.setattr(vdb, "save", failing_save)
+    queue = IngestQueue(vdb)
+    queue._write([("a", "x"), ("b", "y"), ("c", "z")])
+
+    assert vdb.texts == ["x", "y", "z"]
+    assert [queue.status(job)["status"] for job in "abc"] == ["failed"] * 3
+
+    queue._write([("d", "u"), ("e", "w" * 2000), ("f", "v")])
+    assert [queue.status(job)["status"] for job in "def"] == ["done", "failed", "done"]
+
+
+def test_collection_endpoints(tmp_path):
+    from vectordb import CollectionManager, VectorDB, create_app
+
+    vdb = VectorDB(index_path=tmp_path / "index.bin", data_path=tmp_path / "data.json")
+    manager = CollectionManager(tmp_path / "collections", vdb.model)
+    app = create_app(vdb, api_key="secret", collections=manager)
+    headers = {"X-API-Key": "secret"}
+
+    with TestClient(app) as client:
+        resp = client.put("/collections/docs", json={"M": 8}, headers=headers)
+        assert resp.status_code == 200
+        resp = client.put("/collections/docs", json={}, headers=headers)
+        assert resp.status_code == 409
+
+        resp = client.post(
+            "/collections/docs/add", json={"text": "foo"}, headers=headers
+        )
+        assert resp.status_code == 200
+
+        resp = client.get(
+            "/collections/docs/search", params={"q": "foo", "k": 1}, headers=headers
+        )
+        assert resp.json()[0]["text"] == "foo"
+
+        resp = client.get(
+            "/collections/docs/search", params={"q": "foo", "k": 2}, headers=headers
+        )
+        assert resp.status_code == 400
+
+        resp = client.get("/collections/docs/stats", headers=headers)
+        assert resp.json() == {"count": 1}
+        assert client.get("/stats", headers=headers).json() == {"count": 0}
+
+        resp = client.get("/collections/other/stats", headers=headers)
+        assert resp.status_code == 404
+        assert client.get("/collections", headers=headers).json()["collections"] == [
+            "docs"
+        ]
+        assert client.get("/collections/docs/stats").status_code == 401
+
+
+def test_ready_endpoint(tmp_path):
+    from vectordb import VectorDB, create_app
+
+    vdb = VectorDB(index_path=tmp_path / "index.bin", data_path=tmp_path / "data.json")
+    client = TestClient(create_app(vdb, api_key="secret"))
+    assert client.get("/ready").json() == {"status": "ready"}
+
+
+def test_ready_after_warmup(tmp_path, monkeypatch):
+    import threading
+    import time
+    from vectordb import VectorDB, create_app
+
+    vdb = VectorDB(index_path=tmp_path / "index.bin", data_path=tmp_path / "data.json")
+    vdb.add_text("foo")
+    release = threading.Event()
+    warmup = vdb.warmup
+
+    def slow_warmup():
+        release.wait(5)
+        return warmup()
+
+    monkeypatch.setattr(vdb, "warmup", slow_warmup)
+    app = create_app(vdb, warmup=True)
+
+    with TestClient(app) as client:
+        resp = client.get("/ready")
+        assert resp.status_code == 503
+        assert resp.json()["status"] == "warming up"
+        assert client.get("/health").status_code == 200
+
+        release.set()
+        for _ in range(200):
+            resp = client.get("/ready")
+            if resp.status_code == 200:
+                break
+            time.sleep(0.01)
+        assert resp.status_code == 200
+        assert set(resp.json()["timings"]) == {
+            "model",
+            "index",
+            "prefetch",
+            "encode",
+            "search",
+        }
+
+
+def test_batch_endpoints(tmp_path):
+    from vectordb import VectorDB, create_app
+
+    vdb = VectorDB(index_path=tmp_path / "index.bin", data_path=tmp_path / "data.json")
+    client = TestClient(create_app(vdb))
+
+    resp = client.post("/add/batch", json={"texts": ["foo", "bar"]})
+    assert resp.status_code == 200
+    assert vdb.count() == 2
+
+    resp = client.post("/search/batch", json={"queries": ["foo", "bar"], "k": 1})
+    assert resp.status_code == 200
+    assert [r[0]["text"] for r in resp.json()] == ["foo", "bar"]
+
+    assert client.post("/add/batch", json={"texts": []}).status_code == 422
+    assert client.post("/search/batch", content=b"{not json").status_code == 422
+    resp = client.post("/search/batch", json={"queries": ["foo"], "k": 3})
+    assert resp.status_code == 400
+
+
+def test_msgpack_negotiation(tmp_path):
+    msgpack = pytest.importorskip("msgpack")
+    from vectordb import VectorDB, create_app
+
+    vdb = VectorDB(index_path=tmp_path / "index.bin", data_path=tmp_path / "data.json")
+    client = TestClient(create_app(vdb))
+    headers = {
+        "Accept": "application/msgpack",
+        "Content-Type": "application/msgpack",
+    }
+
+    resp = client.post(
+        "/add/batch", content=msgpack.packb({"texts": ["foo", "bar"]}), headers=headers
+    )
+    assert resp.status_code == 200
+    assert msgpack.unpackb(resp.content) == {"status": "ok"}
+
+    resp = client.get("/search", params={"q": "foo", "k": 1}, headers=headers)
+    assert resp.headers["content-type"] == "application/msgpack"
+    assert msgpack.unpackb(resp.content)[0]["text"] == "foo"
+
+    resp = client.post(
+        "/search/batch",
+        content=msgpack.packb({"queries": ["bar"], "k": 1}),
+        headers=headers,
+    )
+    assert msgpack.unpackb(resp.content)[0][0]["text"] == "bar"
+
+    resp = client.get("/search", params={"q": "foo", "k": 1})
+    assert resp.headers["content-type"] == "application/json"
+
+
+def test_vector_endpoints(tmp_path):
+    from vectordb import VectorDB, create_app
+
+    vdb = VectorDB(index_path=tmp_path / "index.bin", data_path=tmp_path / "data.json")
+    client = TestClient(create_app(vdb))
+
+    resp = client.post(
+        "/add/vectors", json={"vectors": [[1, 0, 0], [0, 1, 0]], "texts": ["x", "y"]}
+    )
+    assert resp.status_code == 200
+
+    resp = client.post("/search/vector", json={"vector": [0.1, 1, 0], "k": 1})
+    assert resp.status_code == 200
+    assert resp.json()[0]["text"] == "y"
+
+    resp = client.post("/search/vector", json={"vector": [1, 0], "k": 1})
+    assert resp.status_code == 400
+    resp = client.post("/add/vectors", json={"vectors": [[1, 0, 0]], "texts": []})
+    assert resp.status_code == 422
+
+
+def test_similar_endpoint(tmp_path):
+    from vectordb import VectorDB, create_app
+
+    vdb = VectorDB(index_path=tmp_path / "index.bin", data_path=tmp_path / "data.json")
+    vdb.add_vectors([[1, 0, 0], [0.9, 0.1, 0], [0, 0, 1]], ["x", "x2", "z"])
+    client = TestClient(create_app(vdb))
+
+    resp = client.get("/items/0/similar", params={"k": 1})
+    assert resp.status_code == 200
+    assert resp.json() == [{"id": 1, "text": "x2", "distance": pytest.approx(0.1414, abs=1e-3)}]
+
+    assert client.get("/items/7/similar").status_code == 404
+    assert client.get("/items/0/similar", params={"k": 3}).status_code == 400
+
+
+def test_add_batch_dedupe(tmp_path):
+    from vectordb import VectorDB, create_app
+
+    vdb = VectorDB(index_path=tmp_path / "index.bin", data_path=tmp_path / "data.json")
+    client = TestClient(create_app(vdb))
+
+    resp = client.post("/add/batch", json={"texts": ["foo", "bar"], "dedupe_threshold": 0})
+    assert resp.json() == {"status": "ok", "duplicates": []}
+    resp = client.post("/add/batch", json={"texts": ["foo", "baz"], "dedupe_threshold": 0})
+    assert resp.json() == {
+        "status": "ok",
+        "duplicates": [{"index": 0, "id": 0, "distance": 0.0}],
+    }
+    assert vdb.texts == ["foo", "bar", "baz"]
+
+
+def test_search_pagination(tmp_path, monkeypatch):
+    from vectordb import VectorDB, create_app
+
+    vdb = VectorDB(index_path=tmp_path / "index.bin", data_path=tmp_path / "data.json")
+    vdb.add_vectors([[i, 0, 0] for i in range(7)], [f"t{i}" for i in range(7)])
+    encoded = []
+    monkeypatch.setattr(vdb, "encode_query", lambda q: encoded.append(q) or [0, 0, 0])
+    client = TestClient(create_app(vdb))
+
+    resp = client.get("/search", params={"q": "x", "k": 3, "paginate": True})
+    body = resp.json()
+    assert [r["text"] for r in body["results"]] == ["t0", "t1", "t2"]
+
+    texts = []
+    while body["cursor"]:
+        body = client.get("/search", params={"cursor": body["cursor"]}).json()
+        texts += [r["text"] for r in body["results"]]
+    assert texts == ["t3", "t4", "t5", "t6"]
+    assert encoded == ["x"]
+
+    assert client.get("/search", params={"cursor": "nope"}).status_code == 404
+    assert client.get("/search").status_code == 422
+
+    resp = client.get("/search/range", params={"q": "x", "max_distance": 2.5})
+    assert [r["text"] for r in resp.json()] == ["t0", "t1", "t2"]
+
+
+def test_admission_control(tmp_path):
+    import asyncio
+    import time
+
+    import httpx
+
+    from vectordb import VectorDB, create_app
+
+    vdb = VectorDB(index_path=tmp_path / "index.bin", data_path=tmp_path / "data.json")
+    vdb.add_texts(["alpha", "beta", "gamma"])
+    search = vdb.search
+
+    def slow_search(*args, **kwargs):
+        time.sleep(0.2)
+        return search(*args, **kwargs)
+
+    vdb.search = slow_search
+    app = create_app(vdb, max_searches=1, max_waiting=1)
+
+    async def main():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+            # One search runs, one waits and the rest are shed at once.
+            burst = await asyncio.gather(
+                *(c.get("/search", params={"q": "alpha", "k": 1}) for _ in range(4))
+            )
+            running = asyncio.create_task(c.get("/search", params={"q": "a", "k": 1}))
+            await asyncio.sleep(0.05)
+            expired = await c.get(
+                "/search",
+                params={"q": "beta", "k": 1},
+                headers={"X-Deadline-Ms": "20"},
+            )
+            await running
+            stats = (await c.get("/stats", params={"verbose": True})).json()
+            return burst, expired, stats
+
+    burst, expired, stats = asyncio.run(main())
+
+    assert sorted(r.status_code for r in burst) == [200, 200, 503, 503]
+    assert [r.headers["Retry-After"] for r in burst if r.status_code == 503] == ["1"] * 2
+    assert expired.status_code == 504
+    assert stats["admission"]["search"]["rejected"] == 2
+    assert stats["admission"]["search"]["expired"] == 1
+
+
+def test_search_diversity_endpoint(tmp_path):
+    from vectordb import VectorDB, create_app
+
+    vdb = VectorDB(index_path=tmp_path / "index.bin", data_path=tmp_path / "data.json")
+    vdb.add_texts(["alpha", "beta", "gamma", "delta"])
+    client = TestClient(create_app(vdb))
+
+    resp = client.get("/search", params={"q": "alpha", "k": 3, "diversity": 0.5})
+    assert resp.status_code == 200
+    assert len(resp.json()) == 3
+    params = {"q": "alpha", "k": 2, "diversity": 0.5, "paginate": True}
+    assert client.get("/search", params=params).status_code == 400
+    assert client.get("/search", params={"q": "a", "diversity": 2}).status_code == 422
+
+    params = {"q": "alpha", "k": 2, "rerank": True, "oversample": 2}
+    assert client.get("/search", params=params).json()[0]["text"] == "alpha"
+    resp = client.get("/search", params={**params, "paginate": True})
+    assert resp.status_code == 400
+    params["mode"] = "hybrid"
+    assert client.get("/search", params=params).status_code == 400
+
+
+def test_read_only_endpoints(tmp_path):
+    from vectordb import VectorDB, create_app
+
+    paths = {"index_path": tmp_path / "index.bin", "data_path": tmp_path / "data.json"}
+    VectorDB(**paths).add_texts(["alpha", "beta"])
+    client = TestClient(create_app(VectorDB(**paths, read_only=True)))
+
+    resp = client.get("/search", params={"q": "alpha", "k": 1})
+    assert resp.json()[0]["text"] == "alpha"
+    assert client.post("/add", json={"text": "gamma"}).status_code == 403
+    assert client.post("/add/batch", json={"texts": ["gamma"]}).status_code == 403
+    assert client.post("/documents", json={"documents": ["gamma"]}).status_code == 403
@@ -1,3 +1,4 @@
+import json
 from pathlib import Path
 import sys
 from io import StringIO  # noqa: F401 - imported for compatibility
@@ -65,10 +66,22 @@ def test_cli_serve(tmp_path, monkeypatch):
     assert called["workers"] == 2
 
 
+def test_cli_serve_uds(tmp_path, monkeypatch):
+    called = {}
+    monkeypatch.setattr("uvicorn.run", lambda app, **kwargs: called.update(kwargs))
+    from vectordb.cli import main
+
+    sock = str(tmp_path / "vectordb.sock")
+    main(["--index-path", str(tmp_path / "index.bin"), "serve", "--uds", sock])
+
+    assert called["uds"] == sock
+    assert "host" not in called and "port" not in called
+
+
 def test_cli_serve_api_key(tmp_path, monkeypatch):
     captured = {}
 
-    def fake_create_app(vdb, api_key=None):
+    def fake_create_app(vdb, api_key=None, **kwargs):
         captured["api_key"] = api_key
         return "app"
 
@@ -94,7 +107,7 @@ def test_cli_serve_api_key(tmp_path, monkeypatch):
 def test_cli_serve_api_key_env(tmp_path, monkeypatch):
     captured = {}
 
-    def fake_create_app(vdb, api_key=None):
+    def fake_create_app(vdb, api_key=None, **kwargs):
         captured["api_key"] = api_key
         return "app"
 
@@ -381,7 +394,7 @@ def test_cli_query_k_option(tmp_path, monkeypatch):
         def __init__(self, **kwargs):
             pass
 
-        def search(self, text, k=5):
+        def search(self, text, k=5, **kwargs):
             captured["k"] = k
             return [{"text": text}]
 
@@ -515,3 +528,188 @@ def test_cli_stats_command(tmp_path, capsys):
     main(args + ["stats"])
     captured = capsys.readouterr()
     assert captured.out.strip().endswith("1")
+
+    main(args + ["stats", "--verbose"])
+    stats = json.loads(capsys.readouterr().out)
+    assert stats["index"]["type"] == "hnsw"
+    assert stats["index"]["disk_bytes"] > 0
+    assert stats["process"]["rss_bytes"] > 0
+
+
+def test_cli_query_hybrid_mode(tmp_path, capsys):
+    from vectordb.cli import main
+
+    args = [
+        "--index-path",
+        str(tmp_path / "index.bin"),
+        "--data-path",
+        str(tmp_path / "data.json"),
+        "--lexical-index",
+    ]
+
+    main(args + ["add", "foo bar"])
+    main(args + ["query", "foo", "--k", "1", "--mode", "hybrid"])
+    captured = capsys.readouterr()
+    assert "foo bar" in captured.out
+    assert (tmp_path / "data.json.bm25").exists()
+
+
+def test_cli_add_document(tmp_path, capsys):
+    from vectordb.cli import main
+
+    args = [
+        "--index-path",
+        str(tmp_path / "index.bin"),
+        "--data-path",
+        str(tmp_path / "data.json"),
+        "--max-text-length",
+        "10",
+    ]
+
+    main(args + ["add-document", "one two three four five", "--overlap", "3"])
+    main(args + ["query", "one", "--k", "2", "--collapse"])
+    captured = capsys.readouterr()
+    assert captured.out.splitlines()[0] == "0"
+    assert "'document': 0" in captured.out
+
+
+@pytest.mark.parametrize("rate", [None, 500.0])
+def test_loadtest_against_app(tmp_path, rate):
+    import asyncio
+    import httpx
+    from vectordb import VectorDB, create_app
+    from vectordb.cli import loadtest
+
+    vdb = VectorDB(index_path=tmp_path / "index.bin", data_path=tmp_path / "data.json")
+    vdb.add_texts(loadtest.DEFAULT_QUERIES)
+    transport = httpx.ASGITransport(app=create_app(vdb))
+
+    report = asyncio.run(
+        loadtest.run(
+            "http://test",
+            requests=40,
+            concurrency=4,
+            rate=rate,
+            add_ratio=0.25,
+            k=10,
+            seed=1,
+            transport=transport,
+        )
+    )
+
+    ops = report["operations"]
+    assert report["requests"] == 40
+    assert ops["add"]["requests"] + ops["search"]["requests"] == 40
+    assert ops["add"]["errors"] == 0
+    # k=10 exceeds the stored texts until enough adds have happened.
+    assert set(ops["search"]["error_kinds"]) <= {"400"}
+    assert report["latency_ms"]["p50"] <= report["latency_ms"]["max"]
+    assert "throughput" in loadtest.format_report(report)
+
+
+def test_cli_loadtest_command(tmp_path, monkeypatch, capsys):
+    import json
+    from vectordb.cli import main, loadtest
+
+    queries = tmp_path / "queries.txt"
+    queries.write_text("first\n\nsecond\n")
+    captured = {}
+
+    async def fake_run(url, **kwargs):
+        captured.update(kwargs, url=url)
+        return loadtest.summarize([("search", 0.01, None)], 1.0)
+
+    monkeypatch.setattr(loadtest, "run", fake_run)
+    main(
+        [
+            "loadtest",
+            "--url",
+            "http://example:9000",
+            "--rate",
+            "50",
+            "--queries",
+            str(queries),
+            "--json",
+        ]
+    )
+
+    assert captured["url"] == "http://example:9000"
+    assert captured["rate"] == 50.0
+    assert captured["queries"] == ["first", "second"]
+    assert json.loads(capsys.readouterr().out)["requests"] == 1
+
+
+def test_cli_hashing_embedder(tmp_path, capsys):
+    from vectordb.cli import main
+
+    args = [
+        "--index-path",
+        str(tmp_path / "index.bin"),
+        "--data-path",
+        str(tmp_path / "data.json"),
+        "--embedder",
+        "hashing",
+    ]
+
+    main(args + ["add", "red apple"])
+    main(args + ["add", "blue car"])
+    main(args + ["query", "apple", "--k", "1"])
+    assert "red apple" in capsys.readouterr().out
+
+
+def test_cli_encode_workers(tmp_path, monkeypatch, capsys):
+    from vectordb.cli import main
+    from vectordb.db import embedders
+
+    pools = []
+
+    class FakePool(embedders.HashingEmbedder):
+        def __init__(self, factory, workers):
+            super().__init__()
+            self.closed = False
+            pools.append(self)
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            self.closed = True
+
+    monkeypatch.setattr(embedders, "ProcessPoolEmbedder", FakePool)
+    args = [
+        "--index-path",
+        str(tmp_path / "index.bin"),
+        "--data-path",
+        str(tmp_path / "data.json"),
+        "--embedder",
+        "hashing",
+        "--encode-workers",
+        "2",
+    ]
+
+    main(args + ["add", "red apple"])
+    assert len(pools) == 1 and pools[0].closed
+
+    # Commands that do not encode start no workers.
+    main(args + ["stats"])
+    assert len(pools) == 1
+    assert capsys.readouterr().out.strip() == "1"
+
+def test_cli_num_threads(tmp_path, monkeypatch):
+    captured = {}
+
+    class FakeVectorDB:
+        def __init__(self, **kwargs):
+            captured.update(kwargs)
+
+        def add_text(self, text):
+            pass
+
+    monkeypatch.setattr("vectordb.cli.VectorDB", FakeVectorDB)
+    from vectordb.cli import main
+
+    main(["--num-threads", "3", "add", "foo"])
+    assert captured["num_threads"] == 3
+
+    main(["add", "foo"])
+    assert captured["num_threads"] is None
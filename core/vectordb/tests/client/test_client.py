@@ -0,0 +1,139 @@
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+
+def make_app(tmp_path, **kwargs):
+    from vectordb import VectorDB, create_app
+
+    vdb = VectorDB(index_path=tmp_path / "index.bin", data_path=tmp_path / "data.json")
+    return vdb, create_app(vdb, **kwargs)
+
+
+class CountingTransport(httpx.AsyncBaseTransport):
+    """Record request paths and fail the first ``failures`` with ``status``."""
+
+    def __init__(self, app, failures=0, status=503):
+        self.inner = httpx.ASGITransport(app=app)
+        self.paths = []
+        self.failures = failures
+        self.status = status
+
+    async def handle_async_request(self, request):
+        self.paths.append(request.url.path)
+        if self.failures:
+            self.failures -= 1
+            return httpx.Response(self.status, headers={"Retry-After": "0"})
+        return await self.inner.handle_async_request(request)
+
+
+def test_async_client_batches_concurrent_calls(tmp_path):
+    from vectordb.client import AsyncClient
+
+    vdb, app = make_app(tmp_path, api_key="secret")
+    transport = CountingTransport(app)
+    texts = [f"sample sentence {i}" for i in range(10)]
+
+    async def main():
+        async with AsyncClient(
+            "http://test", api_key="secret", transport=transport
+        ) as client:
+            added = await asyncio.gather(*(client.add(t) for t in texts))
+            found = await asyncio.gather(*(client.search(t, k=1) for t in texts[:4]))
+            return added, found
+
+    added, found = asyncio.run(main())
+
+    assert added == [{"status": "ok"}] * 10
+    assert [r[0]["text"] for r in found] == texts[:4]
+    assert transport.paths == ["/add/batch", "/search/batch"]
+    assert vdb.count() == 10
+
+
+def test_async_client_isolates_rejected_items(tmp_path):
+    from vectordb.client import AsyncClient
+
+    vdb, app = make_app(tmp_path)
+    transport = CountingTransport(app)
+    texts = ["first", "x" * 2000, "third"]
+
+    async def main():
+        async with AsyncClient("http://test", transport=transport) as client:
+            return await asyncio.gather(
+                *(client.add(t) for t in texts), return_exceptions=True
+            )
+
+    first, bad, third = asyncio.run(main())
+
+    assert first == third == {"status": "ok"}
+    assert isinstance(bad, httpx.HTTPStatusError)
+    assert bad.response.status_code == 422
+    assert transport.paths == ["/add/batch"] * 4
+    assert vdb.texts == ["first", "third"]
+
+
+def test_async_client_retries_and_api_key(tmp_path):
+    from vectordb.client import AsyncClient
+
+    _, app = make_app(tmp_path, api_key="secret")
+
+    async def stats(**kwargs):
+        async with AsyncClient("http://test", backoff=0, **kwargs) as client:
+            return await client.stats()
+
+    transport = CountingTransport(app, failures=2)
+    assert asyncio.run(stats(api_key="secret", transport=transport)) == {"count": 0}
+    assert transport.paths == ["/stats"] * 3
+
+    transport = CountingTransport(app, failures=2)
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(stats(api_key="secret", retries=1, transport=transport))
+
+    with pytest.raises(httpx.HTTPStatusError) as exc:
+        asyncio.run(stats(api_key="wrong", transport=httpx.ASGITransport(app=app)))
+    assert exc.value.response.status_code == 401
+
+
+def test_sync_client_shared_between_threads(tmp_path):
+    from vectordb.client import Client
+
+    vdb, app = make_app(tmp_path)
+    transport = CountingTransport(app)
+    texts = [f"sample sentence {i}" for i in range(8)]
+
+    with Client("http://test", transport=transport, batch_delay=0.05) as client:
+        threads = [threading.Thread(target=client.add, args=(t,)) for t in texts]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert client.search(texts[3], k=1)[0]["text"] == texts[3]
+        assert client.similar(0, k=1)[0]["id"] != 0
+
+    assert vdb.count() == 8
+    assert transport.paths.count("/add/batch") < len(texts)
+
+
+def test_client_over_unix_socket(tmp_path):
+    import time
+
+    import uvicorn
+
+    from vectordb.client import Client
+
+    vdb, app = make_app(tmp_path)
+    vdb.add_texts(["alpha beta", "gamma delta"])
+    sock = str(tmp_path / "vectordb.sock")
+    server = uvicorn.Server(uvicorn.Config(app, uds=sock, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    try:
+        while not server.started:
+            time.sleep(0.01)
+        with Client("http://localhost", uds=sock) as client:
+            assert client.search("gamma delta", k=1)[0]["text"] == "gamma delta"
+    finally:
+        server.should_exit = True
+        thread.join()
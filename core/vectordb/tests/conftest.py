@@ -40,11 +40,23 @@ class DummyIndex:
     def set_ef(self, ef):
         self.ef = ef
 
-    def add_items(self, vecs, ids):
+    def add_items(self, vecs, ids, num_threads=-1):
         for vec, idx in zip(vecs, ids):
-            self.vectors[int(idx)] = vec
+            self.vectors[int(idx)] = [float(x) for x in vec]
 
-    def knn_query(self, vecs, k=5):
+    def get_items(self, ids):
+        return [self.vectors[int(idx)] for idx in ids]
+
+    def get_ids_list(self):
+        return list(self.vectors)
+
+    def get_current_count(self):
+        return len(self.vectors)
+
+    def get_max_elements(self):
+        return self.init_params.get("max_elements", len(self.vectors))
+
+    def knn_query(self, vecs, k=5, num_threads=-1):
         labels = []
         distances = []
         for vec in vecs:
@@ -61,9 +73,10 @@ class DummyIndex:
     def save_index(self, path):
         Path(path).write_text(json.dumps({str(k): v for k, v in self.vectors.items()}))
 
-    def load_index(self, path):
+    def load_index(self, path, max_elements=0):
         data = json.loads(Path(path).read_text())
         self.vectors = {int(k): v for k, v in data.items()}
+        self.init_params = {"max_elements": max(max_elements, len(self.vectors))}
 
 hnswlib_stub = types.ModuleType("hnswlib")
 hnswlib_stub.Index = DummyIndex
@@ -76,6 +89,6 @@ sys.modules.setdefault("model2vec", model2vec_stub)
 @pytest.fixture(autouse=True)
 def patch_dependencies(monkeypatch):
     import vectordb.db as db
-    monkeypatch.setattr(db, "StaticModel", DummyModel)
+    monkeypatch.setattr("model2vec.StaticModel", DummyModel)
     monkeypatch.setattr(db.hnswlib, "Index", DummyIndex)
     yield
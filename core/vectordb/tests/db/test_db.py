@@ -1,6 +1,9 @@
+import json
 from pathlib import Path
 import sys
 
+import pytest
+
 # ``vectordb`` lives two directories above ``tests`` so ensure it is importable.
 ROOT = Path(__file__).resolve().parents[3]
 sys.path.insert(0, str(ROOT))
@@ -71,7 +74,7 @@ def test_configurable_index(tmp_path):
     assert vdb.index.space == "l2"
 
 
-def test_load_fallback(tmp_path, monkeypatch):
+def test_load_failure_raises(tmp_path, monkeypatch):
     from vectordb import VectorDB
 
     def bad_load(self, path):
@@ -85,9 +88,34 @@ def test_load_fallback(tmp_path, monkeypatch):
     data.write_text("[]")
 
     vdb = VectorDB(index_path=idx, data_path=data)
+    with pytest.raises(RuntimeError, match="failed to load index"):
+        vdb.index
+
+    data.write_text("{not json")
+    with pytest.raises(RuntimeError, match="failed to load texts"):
+        VectorDB(index_path=idx, data_path=data)
+
+    data.unlink()
+    with pytest.raises(RuntimeError, match="missing"):
+        VectorDB(index_path=idx, data_path=data)
+
 
-    assert vdb.texts == []
-    assert vdb.index.init_params
+def test_corrupt_quantized_store_is_kept(tmp_path):
+    from vectordb import VectorDB
+
+    idx = tmp_path / "index.bin"
+    data = tmp_path / "data.json"
+    sentences = [f"This is sample sentence {i}" for i in range(50)]
+    VectorDB(index_path=idx, data_path=data, quantization="int8").add_texts(sentences)
+    vectors = tmp_path / "index.bin.f32"
+    with vectors.open("r+b") as fh:
+        fh.truncate(vectors.stat().st_size // 2)
+    size = vectors.stat().st_size
+
+    vdb = VectorDB(index_path=idx, data_path=data, quantization="int8")
+    with pytest.raises(RuntimeError, match="failed to load index"):
+        vdb.search(sentences[0], k=1)
+    assert vdb.count() == 50 and vectors.stat().st_size == size
 
 
 def test_search_invalid_k(tmp_path):
@@ -160,10 +188,8 @@ def test_atomic_save(tmp_path):
     vdb = VectorDB(index_path=idx, data_path=data)
     vdb.add_text("foo")
 
-    files = list(tmp_path.iterdir())
-    assert idx in files
-    assert data in files
-    assert len(files) == 2
+    files = set(tmp_path.iterdir())
+    assert files == {idx, data, tmp_path / "data.json.manifest"}
 
 
 def test_count_method(tmp_path):
@@ -174,3 +200,814 @@ def test_count_method(tmp_path):
     vdb.add_text("bar")
 
     assert vdb.count() == 2
+
+
+def test_hybrid_search_finds_exact_terms(tmp_path):
+    from vectordb import VectorDB
+
+    vdb = VectorDB(index_path=tmp_path / "index.bin", data_path=tmp_path / "data.json")
+    vdb.add_texts([f"filler sentence {i}" for i in range(10)] + ["error ERR4711 raised"])
+
+    results = vdb.search("err4711", k=3, mode="hybrid")
+
+    assert results[0]["text"] == "error ERR4711 raised"
+    assert all("score" in r for r in results)
+
+    with pytest.raises(ValueError):
+        vdb.search("err4711", k=1, mode="bogus")
+
+
+def test_lexical_index_persistence(tmp_path):
+    from vectordb import VectorDB
+
+    idx = tmp_path / "index.bin"
+    data = tmp_path / "data.json"
+    lexical = tmp_path / "data.json.bm25"
+    vdb = VectorDB(index_path=idx, data_path=data, lexical_index=True)
+    vdb.add_texts(["alpha beta", "gamma delta"])
+    vdb.add_text("epsilon")
+
+    assert len(lexical.read_text().splitlines()) == 3
+
+    # A line left behind by an interrupted save is dropped on load.
+    with lexical.open("a") as fh:
+        fh.write('{"zeta": 1}\n')
+    vdb2 = VectorDB(index_path=idx, data_path=data, lexical_index=True)
+    assert vdb2.search("gamma", k=1, mode="hybrid")[0]["text"] == "gamma delta"
+    assert len(lexical.read_text().splitlines()) == 3
+
+    VectorDB.clear(index_path=idx, data_path=data)
+    assert not lexical.exists()
+
+
+def test_reciprocal_rank_fusion():
+    from vectordb.db.lexical import reciprocal_rank_fusion
+
+    fused = reciprocal_rank_fusion([[1, 2, 3], [3, 1]])
+
+    assert [doc_id for doc_id, _ in fused] == [1, 3, 2]
+
+
+@pytest.mark.parametrize("quantization", ["float16", "int8"])
+def test_quantized_index(tmp_path, quantization):
+    from vectordb import VectorDB
+    import numpy as np
+
+    idx = tmp_path / "index.bin"
+    data = tmp_path / "data.json"
+    vdb = VectorDB(index_path=idx, data_path=data, quantization=quantization)
+    sentences = [f"This is sample sentence {i}" for i in range(20)]
+    vdb.add_texts(sentences[:10])
+    vdb.add_texts(sentences[10:])
+
+    assert vdb.search(sentences[15], k=3)[0]["text"] == sentences[15]
+    assert vdb.index.get_items([15]).dtype == np.float32
+
+    vdb2 = VectorDB(index_path=idx, data_path=data, quantization=quantization)
+    assert vdb2.search(sentences[3], k=1)[0]["text"] == sentences[3]
+
+    VectorDB.clear(index_path=idx, data_path=data)
+    assert not (tmp_path / "index.bin.f32").exists()
+
+
+def test_quantized_index_recall(tmp_path):
+    from vectordb.db.quantized import QuantizedIndex
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    vecs = rng.normal(size=(500, 16)).astype(np.float32)
+    index = QuantizedIndex(
+        space="l2", dim=16, quantization="int8", vectors_path=tmp_path / "v.f32"
+    )
+    index.init_index(max_elements=500)
+    index.add_items(vecs, range(500))
+    index.set_ef(10)
+
+    queries = vecs[:20] + 0.01
+    labels, distances = index.knn_query(queries, k=5)
+    exact = ((queries[:, None, :] - vecs[None, :, :]) ** 2).sum(-1)
+    truth = np.argsort(exact, axis=1)[:, :5]
+
+    assert (labels == truth).mean() >= 0.95
+    np.testing.assert_allclose(
+        distances, np.take_along_axis(exact, labels, 1), rtol=1e-4, atol=1e-3
+    )
+
+
+def test_segmented_index_merges_and_persists(tmp_path):
+    from vectordb.db.segments import SegmentedIndex
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    vecs = rng.normal(size=(100, 8)).astype(np.float32)
+    directory = tmp_path / "index.bin.segments"
+
+    index = SegmentedIndex(
+        space="l2", dim=8, directory=directory, memtable_size=10,
+        merge_factor=2, background_merge=False,
+    )
+    index.init_index(max_elements=1000)
+    index.add_items(vecs[:45], range(45))
+    index.save_index(str(tmp_path / "index.bin"))
+    sealed = sorted(p.name for p in directory.iterdir())
+    assert len(sealed) == 4 and index.get_current_count() == 45
+
+    while index.merge():
+        pass
+    assert [len(s) for s in index.segments] == [40]
+    index.add_items(vecs[45:], range(45, 100))
+    index.save_index(str(tmp_path / "index.bin"))
+    # Segments of the previous save are kept for the manifest fallback.
+    assert set(sealed) <= {p.name for p in directory.iterdir()}
+    index.save_index(str(tmp_path / "index.bin"))
+    assert not set(sealed) & {p.name for p in directory.iterdir()}
+
+    labels, distances = index.knn_query(vecs[:5] + 0.01, k=3)
+    assert list(labels[:, 0]) == [0, 1, 2, 3, 4]
+    assert (np.diff(distances, axis=1) >= 0).all()
+
+    (directory / "seg-99999999.hnsw").write_bytes(b"orphan")
+    loaded = SegmentedIndex(space="l2", dim=8, directory=directory)
+    loaded.load_index(str(tmp_path / "index.bin"))
+    assert not (directory / "seg-99999999.hnsw").exists()
+    assert loaded.get_current_count() == 100
+    np.testing.assert_allclose(loaded.get_items([7, 99]), vecs[[7, 99]])
+    assert loaded.knn_query(vecs[50:51], k=1)[0][0, 0] == 50
+    loaded.close()
+
+
+def test_segmented_index_concurrency(tmp_path):
+    import threading
+    from vectordb.db.segments import SegmentedIndex
+    import numpy as np
+
+    vecs = np.random.default_rng(0).normal(size=(20, 8)).astype(np.float32)
+    index = SegmentedIndex(
+        space="l2", dim=8, directory=tmp_path / "segments", memtable_size=10,
+        merge_factor=2, background_merge=False, num_threads=3,
+    )
+    index.init_index(max_elements=100)
+    calls = []
+    new_index = index._new_index
+
+    class Recording:
+        def __init__(self, wrapped):
+            self.wrapped = wrapped
+
+        def __getattr__(self, name):
+            return getattr(self.wrapped, name)
+
+        def add_items(self, *args, num_threads=-1):
+            calls.append(num_threads)
+            return self.wrapped.add_items(*args, num_threads=num_threads)
+
+    index._new_index = lambda n: Recording(new_index(n))
+    index.add_items(vecs, range(20), num_threads=3)
+    assert index.merge()
+    assert calls and set(calls) == {3}
+
+    # Queries of different threads overlap instead of waiting for each other.
+    both = threading.Barrier(2, timeout=5)
+    segment = index.segments[0]
+    knn_query = segment.index.knn_query
+
+    def waiting_query(*args, **kwargs):
+        both.wait()
+        return knn_query(*args, **kwargs)
+
+    segment.index = Recording(segment.index)
+    segment.index.knn_query = waiting_query
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(index.knn_query(vecs[:1])))
+        for _ in range(2)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(results) == 2
+
+
+def test_segmented_vectordb(tmp_path):
+    from vectordb import VectorDB
+
+    idx = tmp_path / "index.bin"
+    data = tmp_path / "data.json"
+    vdb = VectorDB(index_path=idx, data_path=data, segmented=True)
+    sentences = [f"This is sample sentence {i}" for i in range(30)]
+    vdb.add_texts(sentences)
+    vdb.save()
+
+    vdb2 = VectorDB(index_path=idx, data_path=data, segmented=True)
+    assert vdb2.search(sentences[3], k=1)[0]["text"] == sentences[3]
+    assert vdb2.count() == 30
+
+    with pytest.raises(ValueError):
+        VectorDB(index_path=idx, data_path=data, segmented=True, quantization="int8")
+
+    VectorDB.clear(index_path=idx, data_path=data)
+    assert not (tmp_path / "index.bin.segments").exists()
+
+
+@pytest.mark.parametrize("codec", ["zlib", "lzma"])
+def test_block_text_store(tmp_path, codec):
+    from vectordb.db.textstore import BlockTextStore
+
+    blocks = tmp_path / "data.json.blocks"
+    store = BlockTextStore(blocks, codec, block_size=4)
+    store.extend(f"text {i}" for i in range(10))
+    store.write(tmp_path / "data.json")
+    size = blocks.stat().st_size
+    store.extend(["text 10", "text 11"])
+    store.write(tmp_path / "data.json")
+    with blocks.open("rb") as fh:
+        first = fh.read(size)
+
+    # A save that never committed leaves blocks past the header's offsets.
+    store.extend(f"text {i}" for i in range(12, 16))
+    store.write(tmp_path / "uncommitted.json")
+    header = json.loads((tmp_path / "data.json").read_text())
+    loaded = BlockTextStore.load(header, blocks)
+
+    assert blocks.read_bytes()[:size] == first
+    assert len(loaded) == 12 and blocks.stat().st_size == header["offsets"][-1]
+    assert loaded[5] == "text 5" and loaded[-1] == "text 11"
+    assert loaded[3:6] == ["text 3", "text 4", "text 5"]
+    assert list(loaded) == [f"text {i}" for i in range(12)]
+
+
+def test_block_text_store_interrupted_write(tmp_path, monkeypatch):
+    from vectordb.db import textstore
+    from vectordb.db.textstore import BlockTextStore
+
+    blocks = tmp_path / "data.json.blocks"
+    store = BlockTextStore(blocks, block_size=2)
+    store.extend(["a", "b"])
+    store.write(tmp_path / "data.json")
+
+    store.extend(["c", "d", "e", "f"])
+    compress, decompress = textstore.CODECS["zlib"]
+    calls = []
+
+    def failing(data):
+        calls.append(data)
+        if len(calls) == 2:
+            raise OSError("disk full")
+        return compress(data)
+
+    monkeypatch.setitem(textstore.CODECS, "zlib", (failing, decompress))
+    with pytest.raises(OSError):
+        store.write(tmp_path / "data.json")
+    monkeypatch.setitem(textstore.CODECS, "zlib", (compress, decompress))
+    assert blocks.stat().st_size > store._offsets[-1]
+
+    store.write(tmp_path / "data.json")
+    header = json.loads((tmp_path / "data.json").read_text())
+    assert header["offsets"][-1] == blocks.stat().st_size
+    assert list(BlockTextStore.load(header, blocks)) == ["a", "b", "c", "d", "e", "f"]
+
+
+def test_text_codec_vectordb(tmp_path):
+    from vectordb import VectorDB
+
+    idx = tmp_path / "index.bin"
+    data = tmp_path / "data.json"
+    sentences = [f"This is sample sentence {i}" for i in range(300)]
+    VectorDB(index_path=idx, data_path=data).add_texts(sentences[:10])
+
+    # Existing JSON data is converted on the next save.
+    vdb = VectorDB(index_path=idx, data_path=data, text_codec="zlib")
+    vdb.add_texts(sentences[10:])
+    assert (tmp_path / "data.json.blocks").exists()
+    assert data.stat().st_size < len(json.dumps(sentences))
+
+    vdb2 = VectorDB(index_path=idx, data_path=data)
+    assert vdb2.count() == 300
+    assert vdb2.search(sentences[42], k=1)[0]["text"] == sentences[42]
+    assert vdb2.texts[299] == sentences[299]
+
+    VectorDB.clear(index_path=idx, data_path=data)
+    assert not (tmp_path / "data.json.blocks").exists()
+
+
+def test_read_only(tmp_path):
+    from vectordb import VectorDB
+
+    idx = tmp_path / "index.bin"
+    data = tmp_path / "data.json"
+    with pytest.raises(FileNotFoundError):
+        VectorDB(index_path=idx, data_path=data, read_only=True)
+
+    sentences = [f"This is sample sentence {i}" for i in range(300)]
+    VectorDB(index_path=idx, data_path=data, text_codec="zlib").add_texts(sentences)
+    blocks = tmp_path / "data.json.blocks"
+    # Blocks of a save the writer has not committed yet must stay intact.
+    with blocks.open("ab") as fh:
+        fh.write(b"uncommitted")
+    files = {p: p.read_bytes() for p in tmp_path.iterdir()}
+
+    vdb = VectorDB(index_path=idx, data_path=data, read_only=True)
+    assert vdb.texts._map is not None
+    assert vdb.texts[42] == sentences[42] and vdb.count() == 300
+    assert vdb.search(sentences[7], k=1)[0]["text"] == sentences[7]
+    assert vdb.search(sentences[7], k=2, mode="hybrid")[0]["text"] == sentences[7]
+    with pytest.raises(PermissionError):
+        vdb.add_texts(["new"])
+    with pytest.raises(PermissionError):
+        vdb.add_documents(["new"])
+    with pytest.raises(PermissionError):
+        vdb.save()
+    stats = vdb.stats()
+    assert stats["save"]["read_only"]
+    assert stats["capacity"]["max_elements"] == 300
+    assert stats["capacity"]["free"] == 0
+    assert {p: p.read_bytes() for p in tmp_path.iterdir()} == files
+
+
+def test_read_only_quantized(tmp_path):
+    from vectordb import VectorDB
+
+    idx = tmp_path / "index.bin"
+    data = tmp_path / "data.json"
+    sentences = [f"This is sample sentence {i}" for i in range(20)]
+    VectorDB(index_path=idx, data_path=data, quantization="int8").add_texts(sentences)
+    vectors = tmp_path / "index.bin.f32"
+    with vectors.open("ab") as fh:
+        fh.write(b"\0" * 12)
+    size = vectors.stat().st_size
+
+    vdb = VectorDB(
+        index_path=idx, data_path=data, quantization="int8", read_only=True
+    )
+    assert vdb.search(sentences[3], k=1)[0]["text"] == sentences[3]
+    assert vectors.stat().st_size == size
+
+
+def test_search_diversity(tmp_path):
+    from vectordb import VectorDB
+    from vectordb.db import mmr
+
+    query = [1.0, 0.0, 0.0]
+    candidates = [[1.0, 0.05, 0.0], [1.0, 0.06, 0.0], [0.8, 0.0, 0.6]]
+    assert mmr(query, candidates, 3, 0.0) == [0, 1, 2]
+    assert mmr(query, candidates, 2, 0.5) == [0, 2]
+
+    vdb = VectorDB(index_path=tmp_path / "index.bin", data_path=tmp_path / "data.json")
+    vdb.add_vectors(candidates + [[0.0, 0.0, 1.0]], ["a", "a again", "b", "far"])
+    plain = vdb.search("", k=2, vector=query)
+    diverse = vdb.search("", k=2, vector=query, diversity=0.5)
+
+    assert [r["text"] for r in plain] == ["a", "a again"]
+    assert [r["text"] for r in diverse] == ["a", "b"]
+    assert diverse[1]["distance"] == pytest.approx(
+        vdb.search("", k=3, vector=query)[2]["distance"]
+    )
+    with pytest.raises(ValueError):
+        vdb.search("", k=2, vector=query, diversity=1.5)
+
+
+def test_search_rerank(tmp_path):
+    from vectordb import VectorDB
+
+    vdb = VectorDB(index_path=tmp_path / "index.bin", data_path=tmp_path / "data.json")
+    vdb.add_vectors([[1.0, 0.0, 0.0], [1.0, 0.1, 0.0], [0.0, 1.0, 0.0]], ["a", "b", "c"])
+    query = [1.0, 0.0, 0.0]
+    depths = []
+    knn_query = vdb.index.knn_query
+
+    def recording_query(vecs, k=1, **kwargs):
+        depths.append(k)
+        return knn_query(vecs, k=k, **kwargs)
+
+    vdb.index.knn_query = recording_query
+    plain = vdb.search("", k=1, vector=query)
+    results = vdb.search("", k=1, vector=query, rerank=True, oversample=2)
+    # Only the candidate list is widened; the index distances are kept.
+    assert depths == [1, 2]
+    assert results == plain
+    with pytest.raises(ValueError):
+        vdb.search("a", k=1, mode="hybrid", rerank=True)
+
+
+def test_chunk_text():
+    from vectordb.db.chunking import chunk_text
+
+    text = "the quick brown fox jumps over the lazy dog"
+    chunks = chunk_text(text, 16, 6)
+
+    assert chunks == ["the quick brown", "brown fox jumps", "jumps over the", "the lazy dog"]
+    assert all(len(c) <= 16 for c in chunk_text("x" * 40, 16, 4))
+    with pytest.raises(ValueError):
+        chunk_text(text, 4, 4)
+
+
+def test_add_documents_and_collapse(tmp_path):
+    from vectordb import VectorDB
+
+    idx = tmp_path / "index.bin"
+    data = tmp_path / "data.json"
+    vdb = VectorDB(index_path=idx, data_path=data, max_text_length=20)
+    vdb.add_text("standalone")
+    doc = "alpha beta gamma delta epsilon zeta eta theta iota kappa"
+
+    assert vdb.add_documents([doc, "short doc"], chunk_size=20) == [0, 1]
+    assert vdb.count() > 3
+
+    results = vdb.search("alpha beta gamma", k=vdb.count(), collapse=True)
+    assert sorted(r.get("document", -1) for r in results) == [-1, 0, 1]
+
+    vdb2 = VectorDB(index_path=idx, data_path=data, max_text_length=20)
+    assert vdb2.doc_ids == vdb.doc_ids
+    assert vdb2.add_documents(["another"]) == [2]
+
+    with pytest.raises(ValueError):
+        vdb2.add_documents([doc], chunk_size=21)
+    # Failed calls do not use up document ids.
+    with pytest.raises(ValueError):
+        vdb2.add_documents(["fine", "   "])
+    with pytest.raises(ValueError):
+        vdb2.add_documents(["x" * 40] * vdb2.max_elements)
+    assert vdb2.add_documents(["last"]) == [3]
+
+
+def test_collection_manager(tmp_path):
+    from vectordb import CollectionManager
+    from conftest import DummyModel
+
+    model = DummyModel()
+    manager = CollectionManager(tmp_path, model, idle_timeout=None, max_loaded=1)
+    manager.create("a", max_text_length=10)
+    manager.create("b", space="l2")
+
+    with manager.use("a") as a:
+        assert a.model is model
+        a.add_text("hello")
+        with pytest.raises(ValueError):
+            a.add_text("x" * 11)
+    assert manager.loaded() == ["a"]
+
+    with manager.use("b") as b:
+        assert b.index.space == "l2"
+    assert manager.loaded() == ["b"]
+
+    with manager.use("a") as a:
+        assert a.search("hello", k=1)[0]["text"] == "hello"
+    assert manager.names() == ["a", "b"]
+
+    with pytest.raises(FileExistsError):
+        manager.create("a")
+    with pytest.raises(ValueError):
+        manager.create("bad name")
+    with pytest.raises(KeyError):
+        with manager.use("missing"):
+            pass
+
+    manager.delete("b")
+    assert manager.names() == ["a"]
+    manager.close()
+
+
+def test_collection_manager_idle_eviction(tmp_path):
+    from vectordb import CollectionManager
+    from conftest import DummyModel
+
+    manager = CollectionManager(tmp_path, DummyModel(), idle_timeout=0)
+    manager.create("a")
+    with manager.use("a"):
+        assert manager.evict_idle() == []
+    assert manager.evict_idle() == ["a"]
+    assert manager.loaded() == []
+
+
+def test_collection_manager_closes_unloaded(tmp_path):
+    from vectordb import CollectionManager
+    from conftest import DummyModel
+
+    manager = CollectionManager(tmp_path, DummyModel(), idle_timeout=0)
+    manager.create("a", segmented=True)
+    with manager.use("a") as vdb:
+        vdb.add_texts(["one", "two"])
+        index = vdb.index
+    closed = []
+    index.close = lambda: closed.append("a")
+    manager.evict_idle()
+    assert closed == ["a"]
+
+    with manager.use("a") as vdb:
+        vdb.index.close = lambda: closed.append("deleted")
+    manager.delete("a")
+    assert closed == ["a", "deleted"]
+
+
+def test_model_and_index_load_lazily(tmp_path, monkeypatch):
+    from vectordb import VectorDB
+    from conftest import DummyModel
+
+    idx = tmp_path / "index.bin"
+    data = tmp_path / "data.json"
+    VectorDB(index_path=idx, data_path=data).add_texts(["foo", "bar"])
+
+    loads = []
+
+    class CountingModel(DummyModel):
+        @classmethod
+        def from_pretrained(cls, name):
+            loads.append(name)
+            return cls()
+
+    monkeypatch.setattr("model2vec.StaticModel", CountingModel)
+    vdb = VectorDB(index_path=idx, data_path=data)
+
+    assert vdb.count() == 2
+    assert loads == [] and vdb._index is None
+
+    assert vdb.search("foo", k=1)[0]["text"] == "foo"
+    assert len(loads) == 1
+
+
+def test_warmup(tmp_path):
+    from vectordb import VectorDB
+
+    idx = tmp_path / "index.bin"
+    data = tmp_path / "data.json"
+    VectorDB(index_path=idx, data_path=data, quantization="int8").add_text("foo")
+
+    vdb = VectorDB(index_path=idx, data_path=data, quantization="int8")
+    timings = vdb.warmup(rounds=2)
+
+    assert set(timings) == {"model", "index", "prefetch", "encode", "search"}
+    assert vdb._index is not None
+
+
+def test_searches_run_in_parallel(tmp_path):
+    import threading
+    from vectordb import VectorDB
+
+    vdb = VectorDB(index_path=tmp_path / "index.bin", data_path=tmp_path / "data.json")
+    vdb.add_texts(["alpha", "beta", "gamma"])
+    index = vdb.index
+    knn_query = index.knn_query
+    # Each search waits for the other one, so serialised searches time out.
+    both = threading.Barrier(2, timeout=5)
+
+    def waiting_query(*args, **kwargs):
+        both.wait()
+        return knn_query(*args, **kwargs)
+
+    index.knn_query = waiting_query
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(vdb.search("alpha", k=1)))
+        for _ in range(2)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(results) == 2
+
+    # A save in progress does not hold up searches either.
+    index.knn_query = knn_query
+    saving, release = threading.Event(), threading.Event()
+    save_index = index.save_index
+
+    def slow_save(path):
+        saving.set()
+        release.wait(5)
+        save_index(path)
+
+    index.save_index = slow_save
+    writer = threading.Thread(target=vdb.save)
+    writer.start()
+    assert saving.wait(5)
+    assert vdb.search("beta", k=1)[0]["text"] == "beta"
+    release.set()
+    writer.join()
+
+
+def test_hybrid_search_during_insert(tmp_path):
+    import threading
+    from vectordb import VectorDB
+
+    vdb = VectorDB(index_path=tmp_path / "index.bin", data_path=tmp_path / "data.json")
+    vdb.add_texts(["alpha", "beta", "gamma"])
+    index = vdb.index
+    saving, release = threading.Event(), threading.Event()
+    save_index = index.save_index
+
+    def slow_save(path):
+        saving.set()
+        release.wait(5)
+        save_index(path)
+
+    index.save_index = slow_save
+    writer = threading.Thread(target=vdb.add_texts, args=(["delta", "epsilon"],))
+    writer.start()
+    assert saving.wait(5)
+    # The lexical index is built lazily while the insert is being saved.
+    vdb.search("delta", k=1, mode="hybrid")
+    release.set()
+    writer.join()
+
+    assert len(vdb._lexical) == len(vdb.texts) == 5
+    assert vdb.search("epsilon", k=5, mode="hybrid")[0]["text"] == "epsilon"
+
+
+def test_search_batch(tmp_path):
+    from vectordb import VectorDB
+
+    vdb = VectorDB(index_path=tmp_path / "index.bin", data_path=tmp_path / "data.json")
+    sentences = [f"This is sample sentence {i}" for i in range(10)]
+    vdb.add_texts(sentences)
+
+    batch = vdb.search_batch([sentences[1], sentences[7]], k=3)
+    assert batch == [vdb.search(sentences[1], k=3), vdb.search(sentences[7], k=3)]
+
+    hybrid = vdb.search_batch([sentences[2]], k=2, mode="hybrid")
+    assert hybrid == [vdb.search(sentences[2], k=2, mode="hybrid")]
+    assert vdb.search_batch([], k=1) == []
+
+
+def test_add_and_search_vectors(tmp_path):
+    from vectordb import VectorDB
+
+    vdb = VectorDB(index_path=tmp_path / "index.bin", data_path=tmp_path / "data.json")
+    vdb.add_vectors([[1, 0, 0], [0, 1, 0], [0, 0, 1]], ["x", "y", "z"])
+
+    assert vdb.search_vector([0, 0.9, 0.1], k=1)[0]["text"] == "y"
+    assert [r["text"] for r in vdb.search_vector([1, 0, 0], k=3)][0] == "x"
+
+    with pytest.raises(ValueError):
+        vdb.add_vectors([[1, 0]], ["bad dim"])
+    with pytest.raises(ValueError):
+        vdb.add_vectors([[1, 0, 0]], ["a", "b"])
+    with pytest.raises(ValueError):
+        vdb.search_vector([1, 0, 0, 0], k=1)
+    assert vdb.count() == 3
+
+
+def test_similar_excludes_item(tmp_path):
+    from vectordb import VectorDB
+
+    vdb = VectorDB(index_path=tmp_path / "index.bin", data_path=tmp_path / "data.json")
+    vdb.add_vectors([[1, 0, 0], [0.9, 0.1, 0], [0, 0, 1]], ["x", "x2", "z"])
+
+    results = vdb.similar(0, k=2)
+    assert [r["id"] for r in results] == [1, 2]
+    assert [r["text"] for r in results] == ["x2", "z"]
+
+    with pytest.raises(KeyError):
+        vdb.similar(3)
+    with pytest.raises(ValueError):
+        vdb.similar(0, k=3)
+
+
+def test_add_texts_dedupe(tmp_path):
+    from vectordb import VectorDB
+
+    vdb = VectorDB(index_path=tmp_path / "index.bin", data_path=tmp_path / "data.json")
+    assert vdb.add_vectors([[1, 0, 0], [0, 1, 0]], ["x", "y"]) == []
+
+    duplicates = vdb.add_vectors(
+        [[1, 0.01, 0], [0, 0, 1], [0, 0.01, 1]],
+        ["x again", "z", "z again"],
+        dedupe_threshold=0.02,
+    )
+    assert [(d["index"], d["id"]) for d in duplicates] == [(0, 0), (2, 2)]
+    assert vdb.texts == ["x", "y", "z"]
+
+    # Identical texts encode to identical vectors.
+    duplicates = vdb.add_texts(["w", "w"], dedupe_threshold=1e-6)
+    assert [(d["index"], d["id"]) for d in duplicates] == [(1, 3)]
+    assert vdb.count() == 4
+    with pytest.raises(ValueError):
+        vdb.add_texts(["v"], dedupe_threshold=-1)
+
+
+def test_manifest_recovers_last_consistent_version(tmp_path):
+    from vectordb import VectorDB
+
+    idx = tmp_path / "index.bin"
+    data = tmp_path / "data.json"
+    vdb = VectorDB(index_path=idx, data_path=data)
+    vdb.add_text("foo")
+    vdb.add_text("bar")
+    assert vdb.version == 2
+
+    # Simulate a crash after the new index but before the new texts were
+    # moved into place.
+    data.write_bytes((tmp_path / "data.json.prev").read_bytes())
+    (tmp_path / "data.json.prev").write_text("garbage")
+
+    vdb2 = VectorDB(index_path=idx, data_path=data)
+    assert vdb2.version == 1
+    assert vdb2.texts == ["foo"]
+    assert vdb2.search("foo", k=1)[0]["text"] == "foo"
+    vdb2.add_text("baz")
+    assert VectorDB(index_path=idx, data_path=data).texts == ["foo", "baz"]
+
+    idx.write_text("junk")
+    (tmp_path / "index.bin.prev").write_text("junk")
+    with pytest.raises(RuntimeError):
+        VectorDB(index_path=idx, data_path=data)
+
+    VectorDB.clear(index_path=idx, data_path=data)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_manifest_survives_repeated_interrupted_saves(tmp_path, monkeypatch):
+    import os
+    from vectordb import VectorDB
+    from vectordb.db import manifest
+
+    idx = tmp_path / "index.bin"
+    data = tmp_path / "data.json"
+    VectorDB(index_path=idx, data_path=data).add_text("foo")
+    replace = os.replace
+
+    def crash_after_manifest(src, dst):
+        # Crash right after the new manifest, before the files are moved.
+        replace(src, dst)
+        if Path(dst).suffix == manifest.MANIFEST_SUFFIX:
+            raise OSError("crash")
+
+    for text in ("bar", "baz"):
+        vdb = VectorDB(index_path=idx, data_path=data)
+        monkeypatch.setattr(manifest.os, "replace", crash_after_manifest)
+        with pytest.raises(OSError):
+            vdb.add_text(text)
+        monkeypatch.setattr(manifest.os, "replace", replace)
+
+    vdb = VectorDB(index_path=idx, data_path=data)
+    assert vdb.version == 1
+    assert vdb.texts == ["foo"]
+
+
+def test_embedders(tmp_path):
+    import numpy as np
+    from vectordb import VectorDB
+    from vectordb.db.embedders import Embedder, HashingEmbedder, ProcessPoolEmbedder
+
+    hashing = HashingEmbedder(dim=64)
+    assert isinstance(hashing, Embedder)
+    vecs = hashing.encode(["red apple", "red apple", "blue car"])
+    assert vecs.dtype == np.float32 and vecs.shape == (3, 64)
+    assert np.array_equal(vecs[0], vecs[1])
+
+    texts = [f"text number {i}" for i in range(200)]
+    with ProcessPoolEmbedder(HashingEmbedder, workers=2, min_chunk=16) as pool:
+        assert isinstance(pool, Embedder)
+        assert pool.dim == 256
+        assert np.allclose(pool.encode(texts), HashingEmbedder().encode(texts))
+
+        vdb = VectorDB(
+            index_path=tmp_path / "index.bin",
+            data_path=tmp_path / "data.json",
+            model=pool,
+        )
+        vdb.add_texts(texts)
+        assert vdb.search("text number 7", k=1)[0]["text"] == "text number 7"
+
+
+def test_num_threads(tmp_path, monkeypatch):
+    from vectordb import VectorDB
+    from vectordb.db import available_cpus
+
+    assert available_cpus() >= 1
+    vdb = VectorDB(index_path=tmp_path / "index.bin", data_path=tmp_path / "data.json")
+    assert vdb.num_threads == available_cpus()
+
+    calls = []
+    vdb = VectorDB(
+        index_path=tmp_path / "index.bin", data_path=tmp_path / "data.json", num_threads=3
+    )
+    add_items = vdb.index.add_items
+    monkeypatch.setattr(
+        vdb.index,
+        "add_items",
+        lambda vecs, ids, num_threads=-1: calls.append(num_threads) or add_items(vecs, ids),
+    )
+    vdb.add_texts(["foo", "bar"])
+    assert calls == [3]
+
+    with pytest.raises(ValueError):
+        VectorDB(num_threads=0)
+
+
+def test_search_range(tmp_path, monkeypatch):
+    from vectordb import VectorDB
+    import vectordb.db as db
+
+    monkeypatch.setattr(db, "RANGE_INITIAL_K", 2)
+    vdb = VectorDB(index_path=tmp_path / "index.bin", data_path=tmp_path / "data.json")
+    vecs = [[i, 0, 0] for i in range(10)]
+    vdb.add_vectors(vecs, [f"t{i}" for i in range(10)])
+    monkeypatch.setattr(vdb, "encode_query", lambda query: [0, 0, 0])
+
+    results = vdb.search_range("q", max_distance=4.5)
+    assert [r["text"] for r in results] == [f"t{i}" for i in range(5)]
+    assert [r["text"] for r in vdb.search_range("q", 4.5, limit=3)] == ["t0", "t1", "t2"]
+    assert len(vdb.search_range("q", 100)) == 10
+    with pytest.raises(ValueError):
+        vdb.search_range("q", -1)
@@ -0,0 +1,28 @@
+import subprocess
+import sys
+from pathlib import Path
+
+# Modules that must not be imported by ``import vectordb.cli`` because they
+# dominate the start-up time of short CLI commands.
+HEAVY_MODULES = ["fastapi", "uvicorn", "model2vec", "numpy", "pydantic"]
+
+
+def test_cli_import_is_lazy():
+    core = Path(__file__).resolve().parents[3]
+    code = (
+        "import sys, vectordb.cli, vectordb; "
+        f"print([m for m in {HEAVY_MODULES!r} if m in sys.modules])"
+    )
+
+    out = subprocess.check_output(
+        [sys.executable, "-c", code], cwd=core, env={"PYTHONPATH": str(core)}
+    )
+
+    assert out.decode().strip() == "[]"
+
+
+def test_lazy_package_attributes():
+    import vectordb
+
+    assert vectordb.create_app.__module__ == "vectordb.api"
+    assert vectordb.CollectionManager.__module__ == "vectordb.db.manager"